@@ -5,9 +5,12 @@ Find PFAS-tested sample points, connected aquifers, and water wells
 """
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 import pandas as pd
 from folium.plugins import StripePattern
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 from analysis_registry import AnalysisContext
 from analyses.aquifer_wells.queries import (
@@ -19,7 +22,8 @@ from filters.substance import render_sidebar_substance_selector
 from filters.concentration import render_concentration_filter, apply_concentration_filter
 
 from core.boundary import fetch_boundaries
-from core.geometry import create_geodataframe
+from core.geometry import create_geodataframe, simplify_geometries
+from core.query_cache import execute_cached_query
 from core.sparql import build_query_debug_entry
 from components.parameter_display import (
     build_concentration_params,
@@ -29,7 +33,7 @@ from components.parameter_display import (
 from components.result_display import render_step_results
 from components.map_rendering import (
     create_base_map, add_boundary_layers, add_point_layer,
-    add_sample_layer, finalize_map, render_map_legend, render_folium_map,
+    add_sample_layer, finalize_map, map_to_html, render_map_legend, render_folium_map,
     COLOR_AQUIFER, COLOR_WELL, COLOR_SAMPLE,
 )
 from components.execute_button import render_execute_button, check_required_fields
@@ -40,6 +44,7 @@ from components.eta_display import render_simple_eta
 from components.sample_popup import (
     aggregate_sample_popups,
     aggregate_sample_popups_lite,
+    compact_sample_results,
     SAMPLE_POPUP_FIELDS,
     SAMPLE_POPUP_FIELDS_LITE,
     SAMPLE_POPUP_KWDS,
@@ -122,7 +127,6 @@ def main(context: AnalysisContext) -> None:
         run_eta = estimate_eta(run_request)
 
         executor = StepExecutor(num_steps=3)
-        samples_raw_df = pd.DataFrame()
         aquifers_df = pd.DataFrame()
         wells_df = pd.DataFrame()
         executed_queries = []
@@ -136,52 +140,70 @@ def main(context: AnalysisContext) -> None:
             include_nondetects=include_nondetects,
         )
 
-        with executor.step(1, "Finding sample observations...") as step:
-            samples_raw_df, error, debug = execute_aquifer_samples_query(**query_args)
-            step_info = build_query_debug_entry(
-                "Step 1: Sample Observations", debug,
-                row_count=len(samples_raw_df), error=error,
-            )
-            executed_queries.append(step_info)
-            if error:
-                step.error(f"Step 1 failed: {error}")
-            elif not samples_raw_df.empty:
-                n_sp = samples_raw_df["samplePoint"].nunique() if "samplePoint" in samples_raw_df.columns else 0
-                step.success(f"Step 1: Found {len(samples_raw_df)} observations across {n_sp} sample points")
-            else:
-                step.warning("Step 1: No sample observations found")
+        # Boundaries load alongside Step 1; Steps 2 and 3 only share its parameters,
+        # so they are sent together once Step 1 has found observations
+        pool = ThreadPoolExecutor(
+            max_workers=3, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx()),
+        )
+        samples_future = pool.submit(execute_cached_query, execute_aquifer_samples_query, **query_args)
+        boundaries_future = pool.submit(
+            fetch_boundaries, context.selected_state_code, context.selected_county_code,
+        )
 
-        if samples_raw_df.empty:
-            st.warning("No sample points found — skipping aquifer and well queries. "
-                       "Without observations, aquifer/well results would be misleading.")
-        else:
-            with executor.step(2, "Finding connected aquifers...") as step:
-                aquifers_df, error, debug = execute_aquifer_aquifers_query(**query_args)
+        try:
+            with executor.step(1, "Finding sample observations...") as step:
+                samples_raw_df, error, debug = samples_future.result()
                 step_info = build_query_debug_entry(
-                    "Step 2: Aquifers", debug,
-                    row_count=len(aquifers_df), error=error,
+                    "Step 1: Sample Observations", debug,
+                    row_count=len(samples_raw_df), error=error,
                 )
                 executed_queries.append(step_info)
                 if error:
-                    step.error(f"Step 2 failed: {error}")
-                elif not aquifers_df.empty:
-                    step.success(f"Step 2: Found {len(aquifers_df)} aquifer(s)")
+                    step.error(f"Step 1 failed: {error}")
+                elif not samples_raw_df.empty:
+                    n_sp = samples_raw_df["samplePoint"].nunique() if "samplePoint" in samples_raw_df.columns else 0
+                    step.success(f"Step 1: Found {len(samples_raw_df)} observations across {n_sp} sample points")
                 else:
-                    step.warning("Step 2: No aquifers found")
+                    step.warning("Step 1: No sample observations found")
 
-            with executor.step(3, "Finding connected wells...") as step:
-                wells_df, error, debug = execute_aquifer_wells_query(**query_args)
-                step_info = build_query_debug_entry(
-                    "Step 3: Connected Wells", debug,
-                    row_count=len(wells_df), error=error,
-                )
-                executed_queries.append(step_info)
-                if error:
-                    step.error(f"Step 3 failed: {error}")
-                elif not wells_df.empty:
-                    step.success(f"Step 3: Found {len(wells_df)} well(s)")
-                else:
-                    step.warning("Step 3: No connected wells found")
+            if samples_raw_df.empty:
+                st.warning("No sample points found — skipping aquifer and well queries. "
+                           "Without observations, aquifer/well results would be misleading.")
+            else:
+                aquifers_future = pool.submit(execute_cached_query, execute_aquifer_aquifers_query, **query_args)
+                wells_future = pool.submit(execute_cached_query, execute_aquifer_wells_query, **query_args)
+                with executor.step(2, "Finding connected aquifers...") as step:
+                    aquifers_df, error, debug = aquifers_future.result()
+                    step_info = build_query_debug_entry(
+                        "Step 2: Aquifers", debug,
+                        row_count=len(aquifers_df), error=error,
+                    )
+                    executed_queries.append(step_info)
+                    if error:
+                        step.error(f"Step 2 failed: {error}")
+                    elif not aquifers_df.empty:
+                        step.success(f"Step 2: Found {len(aquifers_df)} aquifer(s)")
+                    else:
+                        step.warning("Step 2: No aquifers found")
+
+                with executor.step(3, "Finding connected wells...") as step:
+                    wells_df, error, debug = wells_future.result()
+                    step_info = build_query_debug_entry(
+                        "Step 3: Connected Wells", debug,
+                        row_count=len(wells_df), error=error,
+                    )
+                    executed_queries.append(step_info)
+                    if error:
+                        step.error(f"Step 3 failed: {error}")
+                    elif not wells_df.empty:
+                        step.success(f"Step 3: Found {len(wells_df)} well(s)")
+                    else:
+                        step.warning("Step 3: No connected wells found")
+
+            boundaries = boundaries_future.result()
+        finally:
+            # Don't block the rerun on queries whose results are being discarded
+            pool.shutdown(wait=False, cancel_futures=True)
 
         # Aggregate raw samples for map popups
         _LITE_THRESHOLD = 20_000
@@ -197,7 +219,9 @@ def main(context: AnalysisContext) -> None:
         else:
             samples_agg_df = aggregate_sample_popups(samples_raw_df)
 
-        boundaries = fetch_boundaries(context.selected_state_code, context.selected_county_code)
+        samples_raw_df, samples_agg_df, aquifers_df, wells_df = compact_sample_results(
+            samples_raw_df, samples_agg_df, aquifers_df, wells_df,
+        )
 
         record_executed_query_batch(
             request=run_request,
@@ -208,6 +232,7 @@ def main(context: AnalysisContext) -> None:
         state.set_results({
             "samples_raw_df": samples_raw_df,
             "samples_agg_df": samples_agg_df,
+            "summary": _summarize_results(samples_agg_df),
             "use_lite_popups": use_lite,
             "aquifers_df": aquifers_df,
             "wells_df": wells_df,
@@ -230,6 +255,7 @@ def main(context: AnalysisContext) -> None:
         samples_agg_df = results.get("samples_agg_df", pd.DataFrame())
         aquifers_df = results.get("aquifers_df", pd.DataFrame())
         wells_df = results.get("wells_df", pd.DataFrame())
+        summary = results.get("summary", {})
         boundaries = results.get("boundaries", {})
         params_data = results.get("params_data", [])
         query_region_code = results.get("query_region_code")
@@ -241,10 +267,8 @@ def main(context: AnalysisContext) -> None:
 
         if not samples_agg_df.empty:
             metrics = [{"label": "Sample Points", "value": len(samples_agg_df)}]
-            if "overall_max_result" in samples_agg_df.columns:
-                vals = pd.to_numeric(samples_agg_df["overall_max_result"], errors="coerce")
-                if vals.notna().any():
-                    metrics.append({"label": "Max Concentration", "value": f"{vals.max():.2f} ng/L"})
+            if summary.get("max_concentration") is not None:
+                metrics.append({"label": "Max Concentration", "value": f"{summary['max_concentration']:.2f} ng/L"})
             render_step_results(
                 "Sample Points", samples_raw_df, metrics,
                 "View Sample Observations Data",
@@ -273,78 +297,122 @@ def main(context: AnalysisContext) -> None:
             )
 
         use_lite = results.get("use_lite_popups", False)
-        _render_map(samples_agg_df, aquifers_df, wells_df, boundaries, context, use_lite)
+        layers = state.get_or_compute(
+            "map_layers",
+            lambda: _build_map_layers(samples_agg_df, aquifers_df, wells_df),
+        )
+        if layers is not None:
+            # Rendered once per result set; reruns reuse the HTML
+            try:
+                map_html = state.get_or_compute(
+                    "map_html",
+                    lambda: _build_map_html(layers, boundaries, query_region_code, use_lite),
+                )
+                _render_map(map_html)
+            except Exception as e:
+                st.error(f"Error rendering map: {e}")
 
     else:
         st.info("Select parameters in the sidebar and click 'Execute Query' to run the analysis.")
 
 
-def _render_map(samples_agg_df, aquifers_df, wells_df, boundaries, context, use_lite: bool = False) -> None:
-    """Render the interactive 3-layer map: aquifer polygons, sample points, wells."""
+def _summarize_results(samples_agg_df) -> dict:
+    """Compute the results-panel metrics once, at execute time."""
+    summary = {"max_concentration": None}
+    if not samples_agg_df.empty and "overall_max_result" in samples_agg_df.columns:
+        max_vals = pd.to_numeric(samples_agg_df["overall_max_result"], errors="coerce")
+        if max_vals.notna().any():
+            summary["max_concentration"] = float(max_vals.max())
+    return summary
+
+
+def _build_map_layers(samples_agg_df, aquifers_df, wells_df) -> dict | None:
+    """Parse result geometries into GeoDataFrames ready for the map.
+
+    Returns None when no result frame carries a WKT column.
+    """
     has_samples = not samples_agg_df.empty and "spWKT" in samples_agg_df.columns
     has_aquifers = not aquifers_df.empty and "aquiferwkt" in aquifers_df.columns
     has_wells = not wells_df.empty and "wellwkt" in wells_df.columns
 
     if not has_samples and not has_aquifers and not has_wells:
-        return
+        return None
+
+    return {
+        "samples": create_geodataframe(samples_agg_df, "spWKT") if has_samples else None,
+        # Aquifer outlines are detailed polygons; simplify them (topology-preserving) before serializing
+        "aquifers": simplify_geometries(create_geodataframe(aquifers_df, "aquiferwkt")) if has_aquifers else None,
+        "wells": create_geodataframe(wells_df, "wellwkt") if has_wells else None,
+    }
+
+
+def _build_map_html(layers, boundaries, region_code, use_lite: bool = False) -> str | None:
+    """Build the 3-layer map (aquifer polygons, sample points, wells) as HTML.
+
+    Returns None when none of the layers has parseable geometry.
+    """
+    samplepts_gdf = layers["samples"]
+    aquifers_gdf = layers["aquifers"]
+    wells_gdf = layers["wells"]
+
+    active_gdfs = [g for g in [samplepts_gdf, aquifers_gdf, wells_gdf] if g is not None]
+    if not active_gdfs:
+        return None
+
+    map_obj = create_base_map(gdf_list=active_gdfs, zoom=8)
+    add_boundary_layers(map_obj, boundaries, region_code)
+
+    if aquifers_gdf is not None and not aquifers_gdf.empty:
+        sp = StripePattern(angle=-30, color=COLOR_AQUIFER, space_color='white', space_opacity=0.75)
+        sp.add_to(map_obj)
+        # Every aquifer shares one style, so the per-feature callback returns the same dict
+        aquifer_style = {"fillPattern": sp}
+        # Only the popup field is serialized into the GeoJSON properties
+        aquifers_gdf[["aquifer", aquifers_gdf.geometry.name]].explore(
+            m=map_obj,
+            style_kwds={"color": COLOR_AQUIFER, "fillColor": COLOR_AQUIFER, "weight": 2.5, "style_function": lambda x: aquifer_style},
+            popup=["aquifer"],
+            tooltip=False,
+            name=f'<span style="color: {COLOR_AQUIFER};">Aquifers</span>',
+            show=True,
+        )
 
-    st.markdown("---")
-    st.markdown("### Interactive Map")
+    if wells_gdf is not None and not wells_gdf.empty:
+        fields = [c for c in ["welllabel", "Well Use", "Well Type", "Well Depth (ft)", "Overburden (ft)"] if c in wells_gdf.columns]
+        add_point_layer(
+            map_obj, wells_gdf,
+            name=f'<span style="color:{COLOR_WELL};">Connected Wells</span>',
+            color=COLOR_WELL, popup_fields=fields, radius=5,
+        )
 
-    try:
-        samplepts_gdf = create_geodataframe(samples_agg_df, "spWKT") if has_samples else None
-        aquifers_gdf = create_geodataframe(aquifers_df, "aquiferwkt") if has_aquifers else None
-        wells_gdf = create_geodataframe(wells_df, "wellwkt") if has_wells else None
-
-        active_gdfs = [g for g in [samplepts_gdf, aquifers_gdf, wells_gdf] if g is not None]
-        if not active_gdfs:
-            st.warning("Could not parse geometry data for mapping.")
-            return
-
-        map_obj = create_base_map(gdf_list=active_gdfs, zoom=8)
-        add_boundary_layers(map_obj, boundaries, context.region_code)
-
-        if aquifers_gdf is not None and not aquifers_gdf.empty:
-            sp = StripePattern(angle=-30, color=COLOR_AQUIFER, space_color='white', space_opacity=0.75)
-            sp.add_to(map_obj)
-            aquifers_gdf.explore(
-                m=map_obj,
-                color=COLOR_AQUIFER,
-                style_kwds={"weight": 2.5, "style_function": lambda x: {"fillPattern": sp}},
-                popup=["aquifer"],
-                tooltip=False,
-                name=f'<span style="color: {COLOR_AQUIFER};">Aquifers</span>',
-                show=True,
-            )
+    if samplepts_gdf is not None and not samplepts_gdf.empty:
+        popup_fields = SAMPLE_POPUP_FIELDS_LITE if use_lite else SAMPLE_POPUP_FIELDS
+        popup_kwds = {"max_width": 500, "max_height": 400, "parse_html": True} if use_lite else SAMPLE_POPUP_KWDS
+        add_sample_layer(
+            map_obj, samplepts_gdf,
+            popup_fields=popup_fields, popup_kwds=popup_kwds,
+            name=f'<span style="color:{COLOR_SAMPLE};">Sample Points</span>',
+            radius=7,
+        )
 
-        if wells_gdf is not None and not wells_gdf.empty:
-            fields = [c for c in ["welllabel", "Well Use", "Well Type", "Well Depth (ft)", "Overburden (ft)"] if c in wells_gdf.columns]
-            add_point_layer(
-                map_obj, wells_gdf,
-                name=f'<span style="color:{COLOR_WELL};">Connected Wells</span>',
-                color=COLOR_WELL, popup_fields=fields, radius=5,
-            )
+    finalize_map(map_obj)
+    return map_to_html(map_obj)
 
-        if samplepts_gdf is not None and not samplepts_gdf.empty:
-            popup_fields = SAMPLE_POPUP_FIELDS_LITE if use_lite else SAMPLE_POPUP_FIELDS
-            popup_kwds = {"max_width": 500, "max_height": 400, "parse_html": True} if use_lite else SAMPLE_POPUP_KWDS
-            add_sample_layer(
-                map_obj, samplepts_gdf,
-                popup_fields=popup_fields, popup_kwds=popup_kwds,
-                name=f'<span style="color:{COLOR_SAMPLE};">Sample Points</span>',
-                radius=7,
-            )
 
-        finalize_map(map_obj)
-        import streamlit.components.v1 as components
-        map_html = map_obj._repr_html_()
-        components.html(map_html, height=600)
-        render_map_legend([
-            "**Striped areas** = Aquifers connected to sample points",
-            "**Orange circles** = Sample points",
-            "**Dark blue circles** = Potentially connected water wells",
-            "**Boundary outline** = Selected region",
-        ])
-
-    except Exception as e:
-        st.error(f"Error rendering map: {e}")
+def _render_map(map_html: str | None) -> None:
+    """Render the interactive map from its prebuilt HTML."""
+    st.markdown("---")
+    st.markdown("### Interactive Map")
+
+    if map_html is None:
+        st.warning("Could not parse geometry data for mapping.")
+        return
+
+    import streamlit.components.v1 as components
+    components.html(map_html, height=600)
+    render_map_legend([
+        "**Striped areas** = Aquifers connected to sample points",
+        "**Orange circles** = Sample points",
+        "**Dark blue circles** = Potentially connected water wells",
+        "**Boundary outline** = Selected region",
+    ])
@@ -4,22 +4,21 @@ Trace contamination downstream from facilities of specific industry types
 """
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 import pandas as pd
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 from analysis_registry import AnalysisContext
-from analyses.pfas_downstream.queries import (
-    execute_downstream_facilities_query,
-    execute_downstream_streams_query,
-    execute_downstream_samples_query,
-)
+from analyses.pfas_downstream.queries import execute_cached_downstream_query
 from filters.industry import render_sidebar_industry_selector
 from filters.concentration import render_concentration_filter, apply_concentration_filter
 from filters.substance import render_sidebar_substance_selector
 
 # Shared components
 from core.boundary import fetch_boundaries
-from core.geometry import create_geodataframe, simplify_geometries
+from core.geometry import compact_line_geometries, create_geodataframe, thin_points
 from core.sparql import build_query_debug_entry
 from components.parameter_display import (
     build_concentration_params,
@@ -27,7 +26,7 @@ from components.parameter_display import (
     build_region_params,
     render_parameter_table,
 )
-from components.result_display import render_metrics_row, render_data_expander
+from components.result_display import clean_unit_encoding, render_metrics_row, render_data_expander
 from components.map_rendering import (
     FACILITY_MARKER_RADIUS,
     COLOR_SAMPLE, COLOR_FLOWLINE, FACILITY_COLORS_REDS,
@@ -36,11 +35,12 @@ from components.map_rendering import (
     add_naics_url_column,
     create_base_map, add_boundary_layers, add_point_layer, add_line_layer,
     add_sample_layer, add_grouped_point_layers,
-    finalize_map, render_map_legend, render_folium_map,
+    finalize_map, map_to_html, render_map_legend, render_folium_map,
 )
 from components.sample_popup import (
     aggregate_sample_popups,
     aggregate_sample_popups_lite,
+    compact_sample_results,
     SAMPLE_POPUP_FIELDS,
     SAMPLE_POPUP_FIELDS_LITE,
     SAMPLE_POPUP_KWDS,
@@ -60,6 +60,10 @@ from core.runtime_eta import (
 )
 
 
+# Sample points drawn on the map are thinned to this many (one per grid cell)
+_MAP_MAX_SAMPLE_POINTS = 2000
+
+
 def main(context: AnalysisContext) -> None:
     """Main function for PFAS Downstream Tracing analysis"""
     check_old_session_keys(['q5_conc_min', 'q5_conc_max', 'q5_has_results', 'q5_results'])
@@ -128,8 +132,6 @@ def main(context: AnalysisContext) -> None:
         if not selected_naics_code:
             st.error("**Missing required selections!** Please select: industry type")
         else:
-            boundaries = fetch_boundaries(context.selected_state_code, context.selected_county_code)
-
             params_data = [
                 build_industry_params(selected_industry_display),
                 build_region_params(context.region_display, default_label="All Regions"),
@@ -155,71 +157,114 @@ def main(context: AnalysisContext) -> None:
             run_eta = estimate_eta(run_request)
 
             executor = StepExecutor(num_steps=3)
-            facilities_df = pd.DataFrame()
             streams_df = pd.DataFrame()
             samples_df = pd.DataFrame()
+            stream_names = []
             executed_queries = []
             step_eta_by_label = {s.label: s for s in run_eta.step_estimates}
 
             def _record_step(step_info: dict) -> None:
                 executed_queries.append(step_info)
 
-            with executor.step(1, "Finding facilities...") as step:
-                facilities_df, error, debug = execute_downstream_facilities_query(
-                    naics_code=selected_naics_code, region_code=context.region_code)
-                step_info = build_query_debug_entry(
-                    "Step 1: Facilities",
-                    debug,
-                    row_count=len(facilities_df) if facilities_df is not None else 0,
-                    error=error,
-                )
-                _record_step(step_info)
-                if error:
-                    step.error(f"Step 1 failed: {error}")
-                elif not facilities_df.empty:
-                    step.success(f"Step 1: Found {len(facilities_df)} facilities")
-                else:
-                    step.warning("Step 1: No facilities found")
+            # The boundaries load alongside Step 1 (and are only kept when it finds
+            # facilities). Step 2 is sent once Step 1 has found facilities, and Step 3
+            # starts from Step 2's flowlines as soon as they arrive
+            pool = ThreadPoolExecutor(
+                max_workers=3, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx()),
+            )
+            facilities_future = pool.submit(
+                execute_cached_downstream_query, "facilities",
+                naics_code=selected_naics_code, region_code=context.region_code,
+            )
+            boundaries_future = pool.submit(
+                fetch_boundaries, context.selected_state_code, context.selected_county_code,
+            )
 
-            if facilities_df.empty:
-                st.warning("No facilities found — skipping downstream stream and sample queries.")
-            else:
-                with executor.step(2, "Tracing downstream streams...") as step:
-                    streams_df, error, debug = execute_downstream_streams_query(
-                        naics_code=selected_naics_code, region_code=context.region_code)
+            try:
+                with executor.step(1, "Finding facilities...") as step:
+                    facilities_df, error, debug = facilities_future.result()
                     step_info = build_query_debug_entry(
-                        "Step 2: Downstream Streams",
+                        "Step 1: Facilities",
                         debug,
-                        row_count=len(streams_df) if streams_df is not None else 0,
+                        row_count=len(facilities_df) if facilities_df is not None else 0,
                         error=error,
                     )
                     _record_step(step_info)
                     if error:
-                        step.error(f"Step 2 failed: {error}")
-                    elif not streams_df.empty:
-                        stream_count = streams_df["streamName"].dropna().nunique() if "streamName" in streams_df.columns else 0
-                        step.success(f"Step 2: Found {len(streams_df)} flowlines ({stream_count} named streams)")
+                        step.error(f"Step 1 failed: {error}")
+                    elif not facilities_df.empty:
+                        step.success(f"Step 1: Found {len(facilities_df)} facilities")
                     else:
-                        step.info("Step 2: No downstream flow paths found")
+                        step.warning("Step 1: No facilities found")
 
-                with executor.step(3, "Finding downstream samples...") as step:
-                    samples_df, error, debug = execute_downstream_samples_query(
+                boundaries = {}
+                if facilities_df.empty:
+                    for step_num in (2, 3):
+                        with executor.step(step_num, f"Step {step_num}") as step:
+                            step.info(f"Step {step_num}: Skipped — no facilities to trace downstream from")
+                else:
+                    # Steps 2 and 3 start from Step 1's facilities, sent in VALUES batches
+                    facility_uris = (
+                        sorted(facilities_df["facility"].dropna().astype(str).unique())
+                        if "facility" in facilities_df.columns else None
+                    )
+                    streams_future = pool.submit(
+                        execute_cached_downstream_query, "streams",
                         naics_code=selected_naics_code, region_code=context.region_code,
+                        facility_uris=facility_uris,
+                    )
+                    samples_future = pool.submit(
+                        _run_samples_step, streams_future,
+                        naics_code=selected_naics_code, region_code=context.region_code,
+                        facility_uris=facility_uris,
                         min_conc=min_conc, max_conc=max_conc, include_nondetects=include_nondetects,
-                        substance_uri=selected_substance_uri)
-                    step_info = build_query_debug_entry(
-                        "Step 3: Downstream Samples",
-                        debug,
-                        row_count=len(samples_df) if samples_df is not None else 0,
-                        error=error,
+                        substance_uri=selected_substance_uri,
                     )
-                    _record_step(step_info)
-                    if error:
-                        step.error(f"Step 3 failed: {error}")
-                    elif not samples_df.empty:
-                        step.success(f"Step 3: Found {len(samples_df)} downstream samples")
-                    else:
-                        step.info("Step 3: No downstream samples found")
+                    with executor.step(2, "Tracing downstream streams...") as step:
+                        streams_df, error, debug = streams_future.result()
+                        step_info = build_query_debug_entry(
+                            "Step 2: Downstream Streams",
+                            debug,
+                            row_count=len(streams_df) if streams_df is not None else 0,
+                            error=error,
+                        )
+                        _record_step(step_info)
+                        if error:
+                            step.error(f"Step 2 failed: {error}")
+                        elif not streams_df.empty:
+                            if "streamName" in streams_df.columns:
+                                stream_names = sorted(streams_df["streamName"].dropna().unique())
+                            step.success(f"Step 2: Found {len(streams_df)} flowlines ({len(stream_names)} named streams)")
+                        else:
+                            step.info("Step 2: No downstream flow paths found")
+
+                    with executor.step(3, "Finding downstream samples...") as step:
+                        samples_result = samples_future.result()
+                        if samples_result is None:
+                            step.info("Step 3: Skipped — no downstream flowlines to search")
+                        else:
+                            samples_df, error, debug = samples_result
+                            step_info = build_query_debug_entry(
+                                "Step 3: Downstream Samples",
+                                debug,
+                                row_count=len(samples_df) if samples_df is not None else 0,
+                                error=error,
+                            )
+                            _record_step(step_info)
+                            if error:
+                                step.error(f"Step 3 failed: {error}")
+                            elif not samples_df.empty:
+                                step.success(f"Step 3: Found {len(samples_df)} downstream samples")
+                            else:
+                                step.info("Step 3: No downstream samples found")
+
+                    boundaries = boundaries_future.result()
+            finally:
+                # Don't block the rerun on queries whose results are being discarded
+                pool.shutdown(wait=False, cancel_futures=True)
+
+            # Fix unit mojibake once, so popups, tables and downloads all share it
+            samples_df = clean_unit_encoding(samples_df, ['unit', 'result'])
 
             # Aggregate raw samples for map popups
             _LITE_THRESHOLD = 20_000
@@ -235,6 +280,10 @@ def main(context: AnalysisContext) -> None:
             else:
                 samples_agg_df = aggregate_sample_popups(samples_df)
 
+            samples_df, samples_agg_df, facilities_df, streams_df = compact_sample_results(
+                samples_df, samples_agg_df, facilities_df, streams_df,
+            )
+
             record_executed_query_batch(
                 request=run_request,
                 executed_queries=executed_queries,
@@ -245,6 +294,7 @@ def main(context: AnalysisContext) -> None:
                 "facilities_df": facilities_df, "streams_df": streams_df,
                 "samples_df": samples_df, "samples_agg_df": samples_agg_df,
                 "use_lite_popups": use_lite,
+                "summary": _summarize_results(facilities_df, stream_names, samples_df, samples_agg_df),
                 "boundaries": boundaries, "params_data": params_data,
                 "query_region_code": context.region_code, "selected_industry": selected_industry_display,
                 "executed_queries": executed_queries,
@@ -259,6 +309,7 @@ def main(context: AnalysisContext) -> None:
         streams_df = results.get('streams_df', pd.DataFrame())
         samples_df = results.get('samples_df', pd.DataFrame())
         samples_agg_df = results.get('samples_agg_df', pd.DataFrame())
+        summary = results.get('summary', {})
         boundaries = results.get('boundaries', {})
         params_data = results.get('params_data', [])
         query_region_code = results.get('query_region_code')
@@ -274,10 +325,12 @@ def main(context: AnalysisContext) -> None:
         if not facilities_df.empty:
             st.markdown("### Step 1: Facilities")
             metrics = [{"label": "Total Facilities", "value": len(facilities_df)}]
-            if 'industryName' in facilities_df.columns:
-                metrics.append({"label": "Industry Types", "value": facilities_df['industryName'].nunique()})
+            if summary.get("industry_types") is not None:
+                metrics.append({"label": "Industry Types", "value": summary["industry_types"]})
             render_metrics_row(metrics, num_columns=2)
-            facilities_table_df = add_naics_url_column(facilities_df)
+            facilities_table_df = state.get_or_compute(
+                "facilities_table_df", lambda: add_naics_url_column(facilities_df),
+            )
             render_data_expander("View Facilities Data", facilities_table_df,
                 display_columns=['facilityName', 'industryName', 'industryCode_url', 'facility'],
                 download_filename=f"downstream_facilities_{query_region_code or 'all'}.csv",
@@ -294,10 +347,9 @@ def main(context: AnalysisContext) -> None:
         # Step 2: Streams
         if not streams_df.empty:
             st.markdown("### Step 2: Downstream Streams")
-            stream_names = streams_df["streamName"].dropna().unique() if "streamName" in streams_df.columns else []
             render_metrics_row([
                 {"label": "Total Flowlines", "value": len(streams_df)},
-                {"label": "Named Streams", "value": len(stream_names)}
+                {"label": "Named Streams", "value": len(summary.get("stream_names", []))}
             ], num_columns=2)
             render_data_expander("View Streams Data", streams_df,
                 display_columns=['streamName', 'fl_type', 'downstream_flowline'],
@@ -307,15 +359,12 @@ def main(context: AnalysisContext) -> None:
         # Step 3: Samples
         if not samples_df.empty:
             st.markdown("### Step 3: Downstream Samples")
-            n_sample_points = samples_df['samplePoint'].nunique() if 'samplePoint' in samples_df.columns else 0
             metrics = [
                 {"label": "Total Observations", "value": len(samples_df)},
-                {"label": "Unique Sample Points", "value": n_sample_points},
+                {"label": "Unique Sample Points", "value": summary.get("sample_points", 0)},
             ]
-            if not samples_agg_df.empty and "overall_max_result" in samples_agg_df.columns:
-                max_vals = pd.to_numeric(samples_agg_df["overall_max_result"], errors="coerce")
-                if max_vals.notna().any():
-                    metrics.append({"label": "Max Concentration", "value": f"{max_vals.max():.2f} ng/L"})
+            if summary.get("max_concentration") is not None:
+                metrics.append({"label": "Max Concentration", "value": f"{summary['max_concentration']:.2f} ng/L"})
             render_metrics_row(metrics, num_columns=3)
             render_data_expander("View Samples Data", samples_df,
                 download_filename=f"downstream_samples_{query_region_code or 'all'}.csv",
@@ -323,35 +372,114 @@ def main(context: AnalysisContext) -> None:
 
         # Map
         use_lite = results.get("use_lite_popups", False)
-        _render_map(facilities_df, streams_df, samples_agg_df, boundaries, context, use_lite)
+        layers = state.get_or_compute(
+            "map_layers",
+            lambda: _build_map_layers(facilities_df, streams_df, samples_agg_df),
+        )
+        if layers is not None:
+            map_html = state.get_or_compute(
+                "map_html",
+                lambda: map_to_html(_build_map(layers, boundaries, query_region_code, use_lite)),
+            )
+            _render_map(layers, map_html, summary.get("stream_names", []))
     else:
         st.info("Select an industry type in the sidebar, then click 'Execute Query' to run the analysis")
 
 
-def _render_map(facilities_df, streams_df, samples_agg_df, boundaries, context, use_lite: bool = False) -> None:
-    """Render the interactive map."""
-    has_facilities = not facilities_df.empty and 'facWKT' in facilities_df.columns
-    has_streams = not streams_df.empty and 'dsflWKT' in streams_df.columns
-    has_samples = not samples_agg_df.empty and 'spWKT' in samples_agg_df.columns
+def _run_samples_step(streams_future, **params):
+    """Step 3, started from Step 2's downstream flowlines.
 
-    if not has_facilities and not has_streams and not has_samples:
-        return
+    Falls back to the self-contained Step 3 query only if Step 2 failed (or
+    returned no flowline column). Returns None when there is nothing to search
+    (Step 2 found no downstream flowlines).
+    """
+    streams_df, error, _ = streams_future.result()
+    if not error and streams_df.empty:
+        return None
+    if error or "downstream_flowline" not in streams_df.columns:
+        return execute_cached_downstream_query("samples", **params)
+    flowline_uris = sorted(streams_df["downstream_flowline"].dropna().unique())
+    if not flowline_uris:
+        return None
+    return execute_cached_downstream_query("samples", downstream_flowline_uris=flowline_uris, **params)
 
-    st.markdown("---")
-    st.markdown("### Interactive Map")
-
-    facilities_gdf = create_geodataframe(facilities_df, 'facWKT') if has_facilities else None
-    streams_gdf = simplify_geometries(create_geodataframe(streams_df, 'dsflWKT')) if has_streams else None
-    samples_gdf = create_geodataframe(samples_agg_df, 'spWKT') if has_samples else None
 
+def _build_facilities_layer(facilities_df):
+    facilities_gdf = create_geodataframe(facilities_df, 'facWKT')
     # Add facility links and NAICS code links
     if facilities_gdf is not None and 'facility' in facilities_gdf.columns:
         facilities_gdf = add_facility_link_column(facilities_gdf)
     if facilities_gdf is not None and 'industryCode' in facilities_gdf.columns:
         facilities_gdf = add_naics_link_column(facilities_gdf)
+    return facilities_gdf
+
+
+def _summarize_results(facilities_df, stream_names, samples_df, samples_agg_df) -> dict:
+    """Compute the results-panel metrics once, at execute time."""
+    summary = {
+        "industry_types": (
+            int(facilities_df["industryName"].nunique())
+            if "industryName" in facilities_df.columns else None
+        ),
+        "stream_names": stream_names,
+        "sample_points": (
+            int(samples_df["samplePoint"].nunique())
+            if "samplePoint" in samples_df.columns else 0
+        ),
+        "max_concentration": None,
+    }
+    if not samples_agg_df.empty and "overall_max_result" in samples_agg_df.columns:
+        max_vals = pd.to_numeric(samples_agg_df["overall_max_result"], errors="coerce")
+        if max_vals.notna().any():
+            summary["max_concentration"] = float(max_vals.max())
+    return summary
+
+
+def _build_streams_layer(streams_df):
+    streams_gdf = create_geodataframe(streams_df, 'dsflWKT')
+    return compact_line_geometries(streams_gdf)
+
+
+def _build_map_layers(facilities_df, streams_df, samples_agg_df) -> dict | None:
+    """Parse result geometries into GeoDataFrames ready for the map.
+
+    The three layers are built on worker threads; the GEOS calls behind WKT
+    parsing and simplification release the GIL, so they overlap.
+    Returns None when no result frame carries a WKT column.
+    """
+    has_facilities = not facilities_df.empty and 'facWKT' in facilities_df.columns
+    has_streams = not streams_df.empty and 'dsflWKT' in streams_df.columns
+    has_samples = not samples_agg_df.empty and 'spWKT' in samples_agg_df.columns
+
+    if not has_facilities and not has_streams and not has_samples:
+        return None
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        facilities_future = pool.submit(_build_facilities_layer, facilities_df) if has_facilities else None
+        streams_future = pool.submit(_build_streams_layer, streams_df) if has_streams else None
+        samples_future = pool.submit(create_geodataframe, samples_agg_df, 'spWKT') if has_samples else None
+
+        facilities_gdf = facilities_future.result() if facilities_future else None
+        streams_gdf = streams_future.result() if streams_future else None
+        samples_gdf = samples_future.result() if samples_future else None
+
+    samples_total = len(samples_gdf) if samples_gdf is not None else 0
+    samples_gdf = thin_points(samples_gdf, _MAP_MAX_SAMPLE_POINTS, value_column="overall_max_result")
+
+    return {
+        "facilities": facilities_gdf, "streams": streams_gdf, "samples": samples_gdf,
+        "samples_total": samples_total,
+    }
+
+
+def _build_map(layers, boundaries, region_code, use_lite: bool = False):
+    """Build the folium map from parsed result layers."""
+    facilities_gdf = layers["facilities"]
+    streams_gdf = layers["streams"]
+    samples_gdf = layers["samples"]
 
     map_obj = create_base_map(gdf_list=[samples_gdf, facilities_gdf, streams_gdf], zoom=8)
-    add_boundary_layers(map_obj, boundaries, context.region_code, warn_fn=st.warning)
+    add_boundary_layers(map_obj, boundaries, region_code, warn_fn=st.warning)
 
     # Add samples with popup (PuOr concentration palette)
     if samples_gdf is not None and not samples_gdf.empty:
@@ -376,7 +504,21 @@ def _render_map(facilities_df, streams_df, samples_agg_df, boundaries, context,
                                  tooltip_kwds={"parse_html": True})
 
     finalize_map(map_obj)
-    render_folium_map(map_obj)
+    return map_obj
+
+
+def _render_map(layers, map_html: str, stream_names: list) -> None:
+    """Render the interactive map."""
+    st.markdown("---")
+    st.markdown("### Interactive Map")
+
+    samples_gdf = layers["samples"]
+    if samples_gdf is not None and len(samples_gdf) < layers["samples_total"]:
+        st.caption(
+            f"Showing {len(samples_gdf):,} of {layers['samples_total']:,} sample points "
+            "(highest concentration per map area); the full set is in the table above."
+        )
+    render_folium_map(map_html)
     render_map_legend([
         "**Boundary outline** = Selected region",
         "**Orange circles** = PFAS samples downstream",
@@ -384,9 +526,6 @@ def _render_map(facilities_df, streams_df, samples_agg_df, boundaries, context,
         "**Red markers** = Facilities (by industry)"
     ])
 
-    # Stream names
-    if streams_gdf is not None and 'streamName' in streams_gdf.columns:
-        names = sorted(streams_gdf['streamName'].dropna().unique())
-        if names:
-            with st.expander(f"Stream Names ({len(names)} unique)"):
-                st.write(", ".join(names))
+    if stream_names:
+        with st.expander(f"Stream Names ({len(stream_names)} unique)"):
+            st.write(", ".join(stream_names))
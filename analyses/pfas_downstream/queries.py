@@ -7,38 +7,44 @@ Implements a 3-step pipeline:
 """
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
 import pandas as pd
 
 from core.sparql import (
     ENDPOINT_URLS,
     parse_sparql_results,
+    post_sparql_csv_with_debug,
     post_sparql_with_debug,
     build_county_region_filter,
     build_facility_values,
     concentration_filter_sparql,
     sparql_values_uri,
 )
-from core.naics_utils import normalize_naics_codes, build_naics_values_and_hierarchy
-
-
-def _build_industry_filter(naics_code: Optional[str]) -> tuple[str, str]:
-    """
-    Build NAICS VALUES clause and hierarchy for downstream queries.
+from core.query_cache import execute_cached_query
+from core.naics_utils import build_industry_filter, industry_code_is_bound
 
-    Supports all NAICS levels:
-      - 2 digits (sector): builds full hierarchy chain
-      - 3 digits (subsector): builds hierarchy to subsector
-      - 4 digits (group): binds ?industryGroup directly
-      - 5-6 digits (industry): binds ?industryCode directly
 
-    Returns:
-        (industry_values, industry_hierarchy) tuple
-    """
-    codes = normalize_naics_codes(naics_code)
-    if not codes:
-        return "", ""
-    return build_naics_values_and_hierarchy(codes[0])
+# Shared by all three steps; unused declarations cost the endpoint nothing
+_PREFIXES = """
+PREFIX dcterms: <http://purl.org/dc/terms/>
+PREFIX qudt: <http://qudt.org/schema/qudt/>
+PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
+PREFIX geo: <http://www.opengis.net/ont/geosparql#>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+PREFIX naics: <http://w3id.org/fio/v1/naics#>
+PREFIX spatial: <http://purl.org/spatialai/spatial/spatial-full#>
+PREFIX kwgr: <http://stko-kwg.geog.ucsb.edu/lod/resource/>
+PREFIX kwg-ont: <http://stko-kwg.geog.ucsb.edu/lod/ontology/>
+PREFIX coso: <http://w3id.org/coso/v1/contaminoso#>
+PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+PREFIX fio: <http://w3id.org/fio/v1/fio#>
+PREFIX hyf: <https://www.opengis.net/def/schema/hy_features/hyf/>
+PREFIX nhdplusv2: <http://nhdplusv2.spatialai.org/v1/nhdplusv2#>
+PREFIX owl: <http://www.w3.org/2002/07/owl#>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+"""
 
 
 def _build_downstream_facility_region_filter(region_code: Optional[str], county_var: str = "?facCounty") -> str:
@@ -61,96 +67,116 @@ def _build_downstream_facility_region_filter(region_code: Optional[str], county_
     )
 
 
+_FACILITY_BATCH_SIZE = 50
+_FLOWLINE_BATCH_SIZE = 500
+_MAX_CONCURRENT_BATCHES = 4
+
+
+def _post_json_frame(query: str) -> Tuple[pd.DataFrame, Optional[str], Dict[str, Any]]:
+    results_json, error, debug_info = post_sparql_with_debug("federation", query)
+    if error or not results_json:
+        return pd.DataFrame(), error, debug_info
+    return parse_sparql_results(results_json), None, debug_info
+
+
+def _post_csv_frame(query: str) -> Tuple[pd.DataFrame, Optional[str], Dict[str, Any]]:
+    df, error, debug_info = post_sparql_csv_with_debug("federation", query)
+    if error or df is None:
+        return pd.DataFrame(), error, debug_info
+    return df, None, debug_info
+
+
+def _run_query_batches(
+    queries: List[str],
+    post_frame: Callable[[str], Tuple[pd.DataFrame, Optional[str], Dict[str, Any]]],
+) -> Tuple[pd.DataFrame, Optional[str], Dict[str, Any]]:
+    """Send independent batch queries concurrently and stack their rows in batch order."""
+    if len(queries) == 1:
+        return post_frame(queries[0])
+    with ThreadPoolExecutor(max_workers=min(_MAX_CONCURRENT_BATCHES, len(queries))) as pool:
+        results = list(pool.map(post_frame, queries))
+
+    frames = []
+    debug_info: Dict[str, Any] = {}
+    elapsed_ms = 0.0
+    for df, error, debug_info in results:
+        elapsed_ms = max(elapsed_ms, debug_info.get("elapsed_ms") or 0.0)
+        if error:
+            return pd.DataFrame(), error, debug_info
+        frames.append(df)
+
+    debug_info = {**debug_info, "query": "\n".join(queries), "elapsed_ms": elapsed_ms, "batches": len(queries)}
+    df = pd.concat(frames, ignore_index=True).drop_duplicates(ignore_index=True)
+    return df, None, debug_info
+
+
+def _facility_values_batches(facility_uris: Optional[List[str]]) -> List[str]:
+    """VALUES ?facility clauses of at most _FACILITY_BATCH_SIZE URIs each."""
+    if not isinstance(facility_uris, list):
+        return []
+    clauses = (
+        build_facility_values(facility_uris[i:i + _FACILITY_BATCH_SIZE])
+        for i in range(0, len(facility_uris), _FACILITY_BATCH_SIZE)
+    )
+    return [clause for clause in clauses if clause]
+
+
+def _industry_patterns(naics_code: Optional[str]) -> str:
+    """NAICS VALUES clause plus the triples linking ?industryCode to the selection.
+
+    A 6-digit selection binds ?industryCode directly, so the ?industryGroup
+    and fio:subcodeOf joins are only added for broader codes.
+    """
+    industry_values, industry_hierarchy = build_industry_filter(naics_code)
+    if not industry_values or industry_code_is_bound(naics_code):
+        return industry_values
+    return f"""{industry_values}
+        {industry_hierarchy}
+        ?industryCode a naics:NAICS-IndustryCode;
+            fio:subcodeOf ?industryGroup ."""
+
+
 def execute_downstream_facilities_query(
     naics_code: Optional[str],
     region_code: Optional[str],
 ) -> Tuple[pd.DataFrame, Optional[str], Dict[str, Any]]:
     """Step 1: Find facilities by NAICS industry type in a region."""
-    industry_values, industry_hierarchy = _build_industry_filter(naics_code)
+    industry_patterns = _industry_patterns(naics_code)
     region_filter = build_county_region_filter(region_code, county_var="?facCounty")
 
-    if not industry_values:
+    if not industry_patterns:
         return pd.DataFrame(), "Industry type is required for downstream tracing", {"error": "No industry selected"}
 
-    query = f"""
-PREFIX geo: <http://www.opengis.net/ont/geosparql#>
-PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-PREFIX naics: <http://w3id.org/fio/v1/naics#>
-PREFIX spatial: <http://purl.org/spatialai/spatial/spatial-full#>
-PREFIX kwgr: <http://stko-kwg.geog.ucsb.edu/lod/resource/>
-PREFIX kwg-ont: <http://stko-kwg.geog.ucsb.edu/lod/ontology/>
-PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-PREFIX fio: <http://w3id.org/fio/v1/fio#>
-
+    query = f"""{_PREFIXES}
 SELECT DISTINCT ?facility ?facWKT ?facilityName ?industryCode ?industryName WHERE {{
-    ?facility fio:ofIndustry ?industryGroup;
-        fio:ofIndustry ?industryCode ;
+    {industry_patterns}
+    ?facility fio:ofIndustry ?industryCode ;
         spatial:connectedTo ?facCounty ;
         geo:hasGeometry/geo:asWKT ?facWKT;
         rdfs:label ?facilityName.
     {region_filter}
-    ?industryCode a naics:NAICS-IndustryCode;
-        fio:subcodeOf ?industryGroup ;
-        rdfs:label ?industryName.
-    {industry_hierarchy}
-    {industry_values}
+    ?industryCode rdfs:label ?industryName.
 }}
 """
-    results_json, error, debug_info = post_sparql_with_debug("federation", query)
-    if error or not results_json:
-        return pd.DataFrame(), error, debug_info
-    df = parse_sparql_results(results_json)
-    return df, None, debug_info
-
-
-def execute_downstream_streams_query(
-    naics_code: Optional[str],
-    region_code: Optional[str],
-    facility_uris: Optional[List[str]] = None,
-) -> Tuple[pd.DataFrame, Optional[str], Dict[str, Any]]:
-    """Step 2: Find downstream flowlines/streams from facilities."""
-    if facility_uris is not None and not isinstance(facility_uris, list):
-        facility_uris = None
-
-    facility_values_clause = build_facility_values(facility_uris)
-    industry_values, industry_hierarchy = _build_industry_filter(naics_code)
-    region_filter = build_county_region_filter(region_code, county_var="?facCounty")
-
-    if facility_values_clause:
-        industry_values = ""
-        industry_hierarchy = ""
-        region_filter = ""
-    elif not industry_values:
-        return pd.DataFrame(), "Industry type is required", {"error": "No industry selected"}
+    return _post_csv_frame(query)
 
-    query = f"""
-PREFIX geo: <http://www.opengis.net/ont/geosparql#>
-PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-PREFIX naics: <http://w3id.org/fio/v1/naics#>
-PREFIX spatial: <http://purl.org/spatialai/spatial/spatial-full#>
-PREFIX kwgr: <http://stko-kwg.geog.ucsb.edu/lod/resource/>
-PREFIX kwg-ont: <http://stko-kwg.geog.ucsb.edu/lod/ontology/>
-PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-PREFIX fio: <http://w3id.org/fio/v1/fio#>
-PREFIX hyf: <https://www.opengis.net/def/schema/hy_features/hyf/>
-PREFIX nhdplusv2: <http://nhdplusv2.spatialai.org/v1/nhdplusv2#>
-PREFIX owl: <http://www.w3.org/2002/07/owl#>
 
+def _build_streams_query(
+    industry_patterns: str,
+    facility_values_clause: str,
+    region_filter: str,
+) -> str:
+    return f"""{_PREFIXES}
 SELECT DISTINCT ?downstream_flowline ?dsflWKT ?fl_type ?streamName
 WHERE {{
     {{SELECT DISTINCT ?s2 WHERE {{
+        {industry_patterns}
         ?s2 spatial:connectedTo ?facility.
         ?s2 rdf:type kwg-ont:S2Cell_Level13 .
         {facility_values_clause}
-        ?facility fio:ofIndustry ?industryGroup;
-            fio:ofIndustry ?industryCode;
+        ?facility fio:ofIndustry ?industryCode;
             spatial:connectedTo ?facCounty.
         {region_filter}
-        ?industryCode a naics:NAICS-IndustryCode;
-            fio:subcodeOf ?industryGroup ;
-            rdfs:label ?industryName.
-        {industry_hierarchy}
-        {industry_values}
     }}}}
 
     ?s2 kwg-ont:sfTouches|owl:sameAs ?s2neighbor.
@@ -164,77 +190,103 @@ WHERE {{
     OPTIONAL {{?downstream_flowline rdfs:label ?streamName}}
 }}
 """
-    results_json, error, debug_info = post_sparql_with_debug("federation", query)
-    if error or not results_json:
-        return pd.DataFrame(), error, debug_info
-    df = parse_sparql_results(results_json)
-    return df, None, debug_info
 
 
-def execute_downstream_samples_query(
+def execute_downstream_streams_query(
     naics_code: Optional[str],
     region_code: Optional[str],
     facility_uris: Optional[List[str]] = None,
-    min_conc: float = 0.0,
-    max_conc: float = 500.0,
-    include_nondetects: bool = False,
-    substance_uri: Optional[str] = None,
 ) -> Tuple[pd.DataFrame, Optional[str], Dict[str, Any]]:
-    """Step 3: Find raw per-observation sample rows downstream of facilities.
+    """Step 2: Find downstream flowlines/streams from facilities.
 
-    Returns one row per observation with columns: samplePoint, samplePointName,
-    spWKT, sample, sampleIdentifier, date, substance, result, unit, sampleType.
+    Explicit ``facility_uris`` are sent in concurrent VALUES batches of
+    _FACILITY_BATCH_SIZE instead of one large VALUES clause.
     """
-    if facility_uris is not None and not isinstance(facility_uris, list):
-        facility_uris = None
-
-    facility_values_clause = build_facility_values(facility_uris)
-    industry_values, industry_hierarchy = _build_industry_filter(naics_code)
-    facility_region_filter = _build_downstream_facility_region_filter(region_code, county_var="?facCounty")
+    facility_clauses = _facility_values_batches(facility_uris)
+    if facility_clauses:
+        queries = [_build_streams_query("", clause, "") for clause in facility_clauses]
+        return _run_query_batches(queries, _post_csv_frame)
 
-    if facility_values_clause:
-        industry_values = ""
-        industry_hierarchy = ""
-        facility_region_filter = ""
-    elif not industry_values:
+    industry_patterns = _industry_patterns(naics_code)
+    if not industry_patterns:
         return pd.DataFrame(), "Industry type is required", {"error": "No industry selected"}
+    region_filter = build_county_region_filter(region_code, county_var="?facCounty")
 
-    conc_filter = concentration_filter_sparql(min_conc, max_conc, include_nondetects)
-    subst_filter = sparql_values_uri("substanceURI", substance_uri)
+    return _post_csv_frame(_build_streams_query(industry_patterns, "", region_filter))
 
-    query = f"""
-PREFIX dcterms: <http://purl.org/dc/terms/>
-PREFIX qudt: <http://qudt.org/schema/qudt/>
-PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
-PREFIX geo: <http://www.opengis.net/ont/geosparql#>
-PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-PREFIX naics: <http://w3id.org/fio/v1/naics#>
-PREFIX spatial: <http://purl.org/spatialai/spatial/spatial-full#>
-PREFIX kwgr: <http://stko-kwg.geog.ucsb.edu/lod/resource/>
-PREFIX kwg-ont: <http://stko-kwg.geog.ucsb.edu/lod/ontology/>
-PREFIX coso: <http://w3id.org/coso/v1/contaminoso#>
-PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-PREFIX fio: <http://w3id.org/fio/v1/fio#>
-PREFIX hyf: <https://www.opengis.net/def/schema/hy_features/hyf/>
-PREFIX owl: <http://www.w3.org/2002/07/owl#>
-PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
 
+def _build_samples_query(s2cell_block: str, conc_filter: str, subst_filter: str) -> str:
+    """Step 3 query: observations at sample points in the S2 cells bound by ``s2cell_block``.
+
+    The sub-select walks S2 cell -> sample point -> observation -> result and applies
+    the concentration filter there, so only in-range observations at the downstream
+    sample points are joined to the label and OPTIONAL patterns.
+    """
+    return f"""{_PREFIXES}
 SELECT DISTINCT ?samplePoint ?samplePointName ?spWKT
     ?sample ?sampleIdentifier ?date ?substance ?result ?unit ?sampleType
 WHERE {{
-    {{ SELECT DISTINCT ?s2cell WHERE {{
+    {{ SELECT DISTINCT ?samplePoint ?spWKT ?observation ?sample ?substanceURI ?result ?unit WHERE {{
+        {s2cell_block}
+
+        ?samplePoint spatial:connectedTo ?s2cell ;
+            rdf:type coso:SamplePoint ;
+            geo:hasGeometry/geo:asWKT ?spWKT .
+        ?s2cell rdf:type kwg-ont:S2Cell_Level13.
+        ?observation rdf:type coso:ContaminantObservation;
+            coso:observedAtSamplePoint ?samplePoint;
+            coso:analyzedSample ?sample ;
+            coso:ofDSSToxSubstance ?substanceURI ;
+            coso:hasResult ?res .
+        {subst_filter}
+        ?res coso:measurementValue ?result;
+            coso:measurementUnit/qudt:symbol ?unit.
+        OPTIONAL {{ ?res qudt:quantityValue/qudt:numericValue ?numericResult }}
+        OPTIONAL {{ ?res qudt:enumeratedValue ?enumDetected }}
+        BIND(
+          (BOUND(?enumDetected) || LCASE(STR(?result)) = "non-detect" || STR(?result) = STR(coso:non-detect))
+          as ?isNonDetect
+        )
+        BIND(
+          IF(
+            ?isNonDetect,
+            0,
+            COALESCE(xsd:decimal(?numericResult), xsd:decimal(?result))
+          ) as ?numericValue
+        )
+        {conc_filter}
+    }}}}
+    OPTIONAL {{ ?samplePoint rdfs:label ?samplePointName }}
+    ?substanceURI skos:altLabel ?substance .
+    OPTIONAL {{ ?sample dcterms:identifier ?sampleIdentifier }}
+    OPTIONAL {{ ?sample coso:sampleOfMaterialType/rdfs:label ?sampleType }}
+    OPTIONAL {{ ?observation coso:observedTime ?date }}
+}}
+"""
+
+
+def _flowline_s2cell_block(downstream_flowline_uris: List[str]) -> str:
+    flowline_values = " ".join(f"<{uri.strip('<>')}>" for uri in downstream_flowline_uris)
+    return f"""{{ SELECT DISTINCT ?s2cell WHERE {{
+        VALUES ?downstream_flowline {{ {flowline_values} }}
+        ?s2cell spatial:connectedTo ?downstream_flowline ;
+              rdf:type kwg-ont:S2Cell_Level13 .
+    }}}}"""
+
+
+def _facility_s2cell_block(
+    industry_patterns: str,
+    facility_values_clause: str,
+    facility_region_filter: str,
+) -> str:
+    return f"""{{ SELECT DISTINCT ?s2cell WHERE {{
+        {industry_patterns}
         ?s2origin spatial:connectedTo ?facility.
         ?s2origin rdf:type kwg-ont:S2Cell_Level13 .
         {facility_values_clause}
-        ?facility fio:ofIndustry ?industryGroup;
-            fio:ofIndustry ?industryCode;
+        ?facility fio:ofIndustry ?industryCode;
             spatial:connectedTo ?facCounty.
         {facility_region_filter}
-        ?industryCode a naics:NAICS-IndustryCode;
-            fio:subcodeOf ?industryGroup ;
-            rdfs:label ?industryName.
-        {industry_hierarchy}
-        {industry_values}
 
         ?s2origin kwg-ont:sfTouches|owl:sameAs ?s2neighbor.
         ?s2neighbor rdf:type kwg-ont:S2Cell_Level13;
@@ -244,43 +296,77 @@ WHERE {{
               hyf:downstreamFlowPathTC ?downstream_flowline .
         ?s2cell spatial:connectedTo ?downstream_flowline ;
               rdf:type kwg-ont:S2Cell_Level13 .
-    }}}}
+    }}}}"""
 
-    ?samplePoint spatial:connectedTo ?s2cell ;
-        rdf:type coso:SamplePoint ;
-        geo:hasGeometry/geo:asWKT ?spWKT .
-    OPTIONAL {{ ?samplePoint rdfs:label ?samplePointName }}
-    ?s2cell rdf:type kwg-ont:S2Cell_Level13.
-    ?observation rdf:type coso:ContaminantObservation;
-        coso:observedAtSamplePoint ?samplePoint;
-        coso:analyzedSample ?sample ;
-        coso:ofDSSToxSubstance ?substanceURI ;
-        coso:hasResult ?res .
-    {subst_filter}
-    ?substanceURI skos:altLabel ?substance .
-    OPTIONAL {{ ?sample dcterms:identifier ?sampleIdentifier }}
-    OPTIONAL {{ ?sample coso:sampleOfMaterialType/rdfs:label ?sampleType }}
-    OPTIONAL {{ ?observation coso:observedTime ?date }}
-    ?res coso:measurementValue ?result;
-        coso:measurementUnit/qudt:symbol ?unit.
-    OPTIONAL {{ ?res qudt:quantityValue/qudt:numericValue ?numericResult }}
-    OPTIONAL {{ ?res qudt:enumeratedValue ?enumDetected }}
-    BIND(
-      (BOUND(?enumDetected) || LCASE(STR(?result)) = "non-detect" || STR(?result) = STR(coso:non-detect))
-      as ?isNonDetect
-    )
-    BIND(
-      IF(
-        ?isNonDetect,
-        0,
-        COALESCE(xsd:decimal(?numericResult), xsd:decimal(?result))
-      ) as ?numericValue
-    )
-    {conc_filter}
-}}
-"""
-    results_json, error, debug_info = post_sparql_with_debug("federation", query)
-    if error or not results_json:
-        return pd.DataFrame(), error, debug_info
-    df = parse_sparql_results(results_json)
-    return df, None, debug_info
+
+def execute_downstream_samples_query(
+    naics_code: Optional[str],
+    region_code: Optional[str],
+    facility_uris: Optional[List[str]] = None,
+    min_conc: float = 0.0,
+    max_conc: float = 500.0,
+    include_nondetects: bool = False,
+    substance_uri: Optional[str] = None,
+    downstream_flowline_uris: Optional[List[str]] = None,
+) -> Tuple[pd.DataFrame, Optional[str], Dict[str, Any]]:
+    """Step 3: Find raw per-observation sample rows downstream of facilities.
+
+    When Step 2's ``downstream_flowline_uris`` are passed, the query starts from
+    those flowlines instead of repeating the facility -> S2 -> flowline traversal.
+    Flowlines and explicit ``facility_uris`` are sent in concurrent VALUES batches.
+
+    Returns one row per observation with columns: samplePoint, samplePointName,
+    spWKT, sample, sampleIdentifier, date, substance, result, unit, sampleType.
+    """
+    conc_filter = concentration_filter_sparql(min_conc, max_conc, include_nondetects)
+    subst_filter = sparql_values_uri("substanceURI", substance_uri)
+
+    if downstream_flowline_uris:
+        queries = [
+            _build_samples_query(
+                _flowline_s2cell_block(downstream_flowline_uris[i:i + _FLOWLINE_BATCH_SIZE]),
+                conc_filter,
+                subst_filter,
+            )
+            for i in range(0, len(downstream_flowline_uris), _FLOWLINE_BATCH_SIZE)
+        ]
+        return _run_query_batches(queries, _post_json_frame)
+
+    facility_clauses = _facility_values_batches(facility_uris)
+    if facility_clauses:
+        queries = [
+            _build_samples_query(_facility_s2cell_block("", clause, ""), conc_filter, subst_filter)
+            for clause in facility_clauses
+        ]
+        return _run_query_batches(queries, _post_json_frame)
+
+    industry_patterns = _industry_patterns(naics_code)
+    if not industry_patterns:
+        return pd.DataFrame(), "Industry type is required", {"error": "No industry selected"}
+    facility_region_filter = _build_downstream_facility_region_filter(region_code, county_var="?facCounty")
+
+    s2cell_block = _facility_s2cell_block(industry_patterns, "", facility_region_filter)
+    return _post_json_frame(_build_samples_query(s2cell_block, conc_filter, subst_filter))
+
+
+# =============================================================================
+# CACHED STEP EXECUTION
+# =============================================================================
+
+_STEP_QUERIES = {
+    "facilities": execute_downstream_facilities_query,
+    "streams": execute_downstream_streams_query,
+    "samples": execute_downstream_samples_query,
+}
+
+def execute_cached_downstream_query(
+    step: str,
+    **params: Any,
+) -> Tuple[pd.DataFrame, Optional[str], Dict[str, Any]]:
+    """Run one downstream step ("facilities", "streams" or "samples") through st.cache_data.
+
+    Repeat runs with the same parameters are served from memory for 15 minutes. On a
+    cache hit the debug info reports ``cache_hit`` and zero elapsed time, so runtime
+    telemetry does not record the original query duration a second time.
+    """
+    return execute_cached_query(_STEP_QUERIES[step], **params)
@@ -4,19 +4,22 @@ Trace contamination upstream to identify potential sources
 """
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 import pandas as pd
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 from analysis_registry import AnalysisContext
 from analyses.pfas_upstream.queries import run_upstream
 from filters.industry import render_sidebar_industry_selector
 from filters.substance import render_sidebar_substance_selector
-from filters.material import get_cached_material_types_with_labels
+from filters.material import get_cached_material_type_options
 from filters.concentration import render_concentration_filter, apply_concentration_filter
 
 # Shared components
 from core.boundary import fetch_boundaries
-from core.geometry import create_geodataframe
+from core.geometry import compact_line_geometries, create_geodataframe, thin_points
 from components.parameter_display import (
     build_concentration_params,
     render_parameter_table,
@@ -30,11 +33,12 @@ from components.map_rendering import (
     add_naics_url_column,
     create_base_map, add_boundary_layers, add_point_layer,
     add_line_layer, add_sample_layer, add_grouped_point_layers,
-    finalize_map, render_map_legend, render_folium_map,
+    finalize_map, map_to_html, render_map_legend, render_folium_map,
 )
 from components.sample_popup import (
     aggregate_sample_popups,
     aggregate_sample_popups_lite,
+    compact_sample_results,
     SAMPLE_POPUP_FIELDS,
     SAMPLE_POPUP_FIELDS_LITE,
     SAMPLE_POPUP_KWDS,
@@ -54,6 +58,10 @@ from core.runtime_eta import (
 )
 
 
+# Sample points drawn on the map are thinned to this many (one per grid cell)
+_MAP_MAX_SAMPLE_POINTS = 2000
+
+
 def main(context: AnalysisContext) -> None:
     """Main function for PFAS Upstream Tracing analysis"""
     # Check for old session state keys
@@ -88,17 +96,12 @@ def main(context: AnalysisContext) -> None:
     # Material type selector
     is_subdivision = len(context.region_code) > 5 if context.region_code else False
     st.sidebar.markdown("### Sample Material Type")
-    material_types_view = (
-        get_cached_material_types_with_labels(context.region_code, is_subdivision)
+    material_type_map = (
+        get_cached_material_type_options(context.region_code, is_subdivision)
         if context.region_code
-        else pd.DataFrame()
+        else {}
     )
 
-    material_type_map = {}
-    if not material_types_view.empty:
-        for _, row in material_types_view.iterrows():
-            material_type_map[row["display_name"]] = row["matType"]
-
     selected_material_display = st.sidebar.selectbox(
         "Select Material Type (Optional)",
         ["-- All Material Types --"] + list(material_type_map.keys()),
@@ -180,13 +183,16 @@ def main(context: AnalysisContext) -> None:
             )
             run_eta = estimate_eta(run_request)
 
-            boundaries = fetch_boundaries(context.selected_state_code, context.selected_county_code)
             executor = StepExecutor(num_steps=3)
-            samples_df = pd.DataFrame()
-            upstream_s2_df = pd.DataFrame()
-            upstream_flowlines_df = pd.DataFrame()
-            facilities_df = pd.DataFrame()
-            executed_queries = []
+
+            # Boundaries don't depend on the queries, so they load while the queries run
+            pool = ThreadPoolExecutor(
+                max_workers=1, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx()),
+            )
+            boundaries_future = pool.submit(
+                fetch_boundaries, context.selected_state_code, context.selected_county_code,
+            )
+            pool.shutdown(wait=False)
 
             with st.spinner("Running upstream tracing (3 federation queries)..."):
                 (
@@ -213,12 +219,16 @@ def main(context: AnalysisContext) -> None:
                     step.warning("No PFAS samples found")
             with executor.step(2, "Step 2") as step:
                 n_fl = len(upstream_flowlines_df)
-                if n_fl:
+                if samples_df.empty:
+                    step.info("Skipped: no PFAS samples to trace upstream from")
+                elif n_fl:
                     step.success(f"Traced {n_fl} upstream flowlines")
                 else:
                     step.info("No upstream flow paths found")
             with executor.step(3, "Step 3") as step:
-                if not facilities_df.empty:
+                if samples_df.empty:
+                    step.info("Skipped: no PFAS samples to trace upstream from")
+                elif not facilities_df.empty:
                     step.success(f"Found {len(facilities_df)} facilities")
                 else:
                     step.info("No facilities found")
@@ -232,6 +242,9 @@ def main(context: AnalysisContext) -> None:
                 step_eta_by_label=step_eta_by_label,
             )
 
+            # Boundaries are only drawn on the map, which needs at least one sample
+            boundaries = boundaries_future.result() if not samples_df.empty else {}
+
             # Aggregate raw samples for map popups
             _LITE_THRESHOLD = 20_000
             use_lite = len(samples_df) > _LITE_THRESHOLD
@@ -246,6 +259,12 @@ def main(context: AnalysisContext) -> None:
             else:
                 samples_agg_df = aggregate_sample_popups(samples_df)
 
+            samples_df, samples_agg_df, facilities_df, upstream_s2_df, upstream_flowlines_df = (
+                compact_sample_results(
+                    samples_df, samples_agg_df, facilities_df, upstream_s2_df, upstream_flowlines_df,
+                )
+            )
+
             state.set('executed_queries', executed_queries)
             # Store results
             state.set_results({
@@ -256,6 +275,7 @@ def main(context: AnalysisContext) -> None:
                 'upstream_flowlines_df': upstream_flowlines_df,
                 'facilities_df': facilities_df,
                 'boundaries': boundaries,
+                'summary': _summarize_results(samples_df, samples_agg_df, facilities_df),
                 'params_data': params_data,
                 'query_region_code': context.region_code,
                 'selected_material_name': selected_material_name,
@@ -273,6 +293,7 @@ def main(context: AnalysisContext) -> None:
         upstream_flowlines_df = results.get('upstream_flowlines_df', pd.DataFrame())
         facilities_df = results.get('facilities_df', pd.DataFrame())
         boundaries = results.get('boundaries', {})
+        summary = results.get('summary', {})
         params_data = results.get('params_data', [])
         query_region_code = results.get('query_region_code')
         saved_material_name = results.get('selected_material_name')
@@ -284,17 +305,14 @@ def main(context: AnalysisContext) -> None:
 
         # Step 1 Results
         if not samples_df.empty:
-            n_sample_points = samples_df['samplePoint'].nunique() if 'samplePoint' in samples_df.columns else len(samples_agg_df)
             metrics = [
                 {"label": "Total Observations", "value": len(samples_df)},
-                {"label": "Unique Sample Points", "value": n_sample_points},
+                {"label": "Unique Sample Points", "value": summary.get("sample_points", len(samples_agg_df))},
             ]
             if saved_material_name:
                 metrics.append({"label": "Material Type", "value": saved_material_name})
-            if not samples_agg_df.empty and "overall_max_result" in samples_agg_df.columns:
-                max_vals = pd.to_numeric(samples_agg_df["overall_max_result"], errors="coerce")
-                if max_vals.notna().any():
-                    metrics.append({"label": "Max Concentration", "value": f"{max_vals.max():.2f} ng/L"})
+            if summary.get("max_concentration") is not None:
+                metrics.append({"label": "Max Concentration", "value": f"{summary['max_concentration']:.2f} ng/L"})
             render_step_results("Step 1: PFAS Samples", samples_df, metrics, "View PFAS Samples Data",
                 download_filename=f"contaminated_samples_{query_region_code}.csv",
                 download_key=f"download_{context.analysis_key}_samples",
@@ -309,9 +327,11 @@ def main(context: AnalysisContext) -> None:
         # Step 3 Results
         if not facilities_df.empty:
             metrics = [{"label": "Total Facilities", "value": len(facilities_df)}]
-            if 'industryName' in facilities_df.columns:
-                metrics.append({"label": "Industry Types", "value": facilities_df['industryName'].nunique()})
-            facilities_table_df = add_naics_url_column(facilities_df)
+            if summary.get("industry_types") is not None:
+                metrics.append({"label": "Industry Types", "value": summary["industry_types"]})
+            facilities_table_df = state.get_or_compute(
+                "facilities_table_df", lambda: add_naics_url_column(facilities_df),
+            )
             render_step_results("Step 3: Potential Source Facilities", facilities_table_df, metrics, "View Facilities Data",
                 display_columns=['facilityName', 'industryCode_url', 'industryName', 'facility'],
                 download_filename=f"upstream_facilities_{query_region_code}.csv",
@@ -328,49 +348,88 @@ def main(context: AnalysisContext) -> None:
 
             # Industry breakdown
             if 'industryName' in facilities_df.columns:
-                _render_industry_breakdown(facilities_df)
+                breakdown_df = state.get_or_compute(
+                    "industry_breakdown", lambda: _industry_breakdown_table(facilities_df),
+                )
+                with st.expander("Industry Breakdown", expanded=False):
+                    st.dataframe(breakdown_df, use_container_width=True, hide_index=True)
 
-        # Map
+        # Map (built once per result set; reruns reuse the rendered HTML)
         use_lite = results.get("use_lite_popups", False)
-        _render_map(samples_agg_df, facilities_df, upstream_s2_df, upstream_flowlines_df, boundaries, context, use_lite)
-
-
-def _render_industry_breakdown(facilities_df: pd.DataFrame) -> None:
-    """Render the industry breakdown expander."""
-    with st.expander("Industry Breakdown", expanded=False):
-        flat_data = facilities_df.copy()
-        flat_data['industryName'] = flat_data['industryName'].astype(str).str.strip()
-
-        if 'industryCode' in flat_data.columns:
-            flat_data['code_clean'] = flat_data['industryCode'].apply(
-                lambda x: x.split('-')[-1] if isinstance(x, str) and '-' in x else '')
-            flat_data['code_len'] = flat_data['code_clean'].str.len()
-            flat_data = flat_data.sort_values(['facility', 'code_len'], ascending=[True, False])
-            flat_data = flat_data.drop_duplicates(subset=['facility'], keep='first')
-            flat_data['display_name'] = flat_data.apply(
-                lambda r: f"{r['industryName']} ({r['code_clean']})" if r['code_clean'] else r['industryName'], axis=1)
-        else:
-            flat_data['display_name'] = flat_data['industryName']
-            flat_data = flat_data.drop_duplicates(subset=['facility'], keep='first')
-
-        summary = flat_data.groupby('display_name').agg(Facilities=('facility', 'nunique')).reset_index()
-        total = flat_data['facility'].nunique()
-        summary['Percentage'] = (summary['Facilities'] / total * 100).map('{:.1f}%'.format) if total > 0 else "0.0%"
-        summary.columns = ['Industry', 'Facilities', 'Percentage']
-        st.dataframe(summary.sort_values('Facilities', ascending=False).reset_index(drop=True),
-                     use_container_width=True, hide_index=True)
-
-
-def _render_map(samples_agg_df, facilities_df, upstream_s2_df, upstream_flowlines_df, boundaries, context, use_lite: bool = False) -> None:
-    """Render the interactive map."""
+        rendered_map = state.get_or_compute(
+            "rendered_map",
+            lambda: _build_map(
+                samples_agg_df, facilities_df, upstream_s2_df, upstream_flowlines_df,
+                boundaries, query_region_code, use_lite,
+            ),
+        )
+        if rendered_map is not None:
+            _render_map(rendered_map)
+
+
+def _summarize_results(samples_df, samples_agg_df, facilities_df) -> dict:
+    """Compute the results-panel metrics once, at execute time."""
+    summary = {
+        "sample_points": (
+            int(samples_df["samplePoint"].nunique())
+            if "samplePoint" in samples_df.columns else len(samples_agg_df)
+        ),
+        "industry_types": (
+            int(facilities_df["industryName"].nunique())
+            if "industryName" in facilities_df.columns else None
+        ),
+        "max_concentration": None,
+    }
+    if not samples_agg_df.empty and "overall_max_result" in samples_agg_df.columns:
+        max_vals = samples_agg_df["overall_max_result"]
+        if max_vals.notna().any():
+            summary["max_concentration"] = float(max_vals.max())
+    return summary
+
+
+def _industry_breakdown_table(facilities_df: pd.DataFrame) -> pd.DataFrame:
+    """Facilities per industry (most specific code per facility), largest first."""
+    flat_data = facilities_df.copy()
+    flat_data['industryName'] = flat_data['industryName'].astype("string").str.strip().fillna("Unknown")
+
+    if 'industryCode' in flat_data.columns:
+        codes = flat_data['industryCode'].astype("string")
+        flat_data['code_clean'] = (
+            codes.str.rsplit('-', n=1).str[-1]
+            .where(codes.str.contains('-', regex=False, na=False), '')
+            .fillna('')
+        )
+        # Longest (most specific) code first; ties keep their row order
+        longest_first = (-flat_data['code_clean'].str.len().to_numpy()).argsort(kind='stable')
+        flat_data = flat_data.iloc[longest_first].drop_duplicates(subset=['facility'], keep='first')
+        flat_data['display_name'] = flat_data['industryName'].where(
+            flat_data['code_clean'] == '',
+            flat_data['industryName'] + ' (' + flat_data['code_clean'] + ')',
+        )
+    else:
+        flat_data['display_name'] = flat_data['industryName']
+        flat_data = flat_data.drop_duplicates(subset=['facility'], keep='first')
+
+    summary = flat_data.groupby('display_name').agg(Facilities=('facility', 'nunique')).reset_index()
+    total = flat_data['facility'].nunique()
+    summary['Percentage'] = (summary['Facilities'] / total * 100).map('{:.1f}%'.format) if total > 0 else "0.0%"
+    summary.columns = ['Industry', 'Facilities', 'Percentage']
+    return summary.sort_values('Facilities', ascending=False).reset_index(drop=True)
+
+
+def _build_map(
+    samples_agg_df, facilities_df, upstream_s2_df, upstream_flowlines_df, boundaries, region_code, use_lite: bool = False,
+) -> dict | None:
+    """Build the interactive map.
+
+    Returns a dict with the map ``html`` and the drawn/total sample point counts,
+    or None if there is nothing to draw.
+    """
     has_samples = not samples_agg_df.empty and 'spWKT' in samples_agg_df.columns
     has_facilities = not facilities_df.empty and 'facWKT' in facilities_df.columns
 
     if not has_samples and not has_facilities:
-        return
-
-    st.markdown("---")
-    st.markdown("### Interactive Map")
+        return None
 
     samples_gdf = create_geodataframe(samples_agg_df, 'spWKT') if has_samples else None
     facilities_gdf = create_geodataframe(facilities_df, 'facWKT') if has_facilities else None
@@ -383,10 +442,16 @@ def _render_map(samples_agg_df, facilities_df, upstream_s2_df, upstream_flowline
         flowlines_gdf = create_geodataframe(upstream_s2_df, 'upstream_flowlineWKT')
 
     if samples_gdf is None and facilities_gdf is None and flowlines_gdf is None:
-        return
+        return None
+
+    # NHD flowlines are dense polylines; thin their vertices before serializing to the map
+    flowlines_gdf = compact_line_geometries(flowlines_gdf)
+
+    samples_total = len(samples_gdf) if samples_gdf is not None else 0
+    samples_gdf = thin_points(samples_gdf, _MAP_MAX_SAMPLE_POINTS, value_column="overall_max_result")
 
     map_obj = create_base_map(gdf_list=[samples_gdf, facilities_gdf, flowlines_gdf], zoom=8)
-    add_boundary_layers(map_obj, boundaries, context.region_code)
+    add_boundary_layers(map_obj, boundaries, region_code)
 
     if flowlines_gdf is not None and not flowlines_gdf.empty:
         add_line_layer(map_obj, flowlines_gdf, f'<span style="color:{COLOR_FLOWLINE};">Upstream Flowlines</span>',
@@ -416,7 +481,23 @@ def _render_map(samples_agg_df, facilities_df, upstream_s2_df, upstream_flowline
                                  tooltip_kwds={"parse_html": True})
 
     finalize_map(map_obj)
-    render_folium_map(map_obj)
+    return {
+        "html": map_to_html(map_obj),
+        "samples_shown": len(samples_gdf) if samples_gdf is not None else 0,
+        "samples_total": samples_total,
+    }
+
+
+def _render_map(rendered_map: dict) -> None:
+    """Render the interactive map."""
+    st.markdown("---")
+    st.markdown("### Interactive Map")
+    if rendered_map["samples_shown"] < rendered_map["samples_total"]:
+        st.caption(
+            f"Showing {rendered_map['samples_shown']:,} of {rendered_map['samples_total']:,} sample points "
+            "(highest concentration per map area); the full set is in the table above."
+        )
+    render_folium_map(rendered_map["html"])
     render_map_legend([
         "**Orange circles** = PFAS sample locations",
         "**Blue lines** = Upstream flow paths",
@@ -9,7 +9,7 @@ executed_queries entries include "query" (exact SPARQL sent) for debug display.
 """
 from __future__ import annotations
 
-from typing import Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 import pandas as pd
 
 from core.sparql import (
@@ -21,6 +21,7 @@ from core.sparql import (
     sparql_values_uri,
 )
 from core.naics_utils import build_naics_values_and_hierarchy, normalize_naics_codes
+from core.query_cache import execute_cached_query
 
 
 def _build_upstream_industry_filter(naics_code: Optional[str]) -> tuple[str, str]:
@@ -41,6 +42,17 @@ def _build_upstream_industry_filter(naics_code: Optional[str]) -> tuple[str, str
     return build_naics_values_and_hierarchy(code)
 
 
+def _run_federation_query(
+    query: str,
+    timeout: Optional[int] = None,
+) -> Tuple[pd.DataFrame, Optional[str], Dict[str, Any]]:
+    """POST one step's query and parse the bindings; cached by query text via execute_cached_query."""
+    results_json, error, debug_info = post_sparql_with_debug("federation", query, timeout=timeout)
+    if error or not results_json:
+        return pd.DataFrame(), error, debug_info
+    return parse_sparql_results(results_json), None, debug_info
+
+
 def run_upstream(
     substance_uri: Optional[str],
     material_uri: Optional[str],
@@ -57,6 +69,7 @@ def run_upstream(
     Returns:
         (samples_df, upstream_s2_df, upstream_flowlines_df, facilities_df, executed_queries, error)
         - upstream_s2_df is always empty; Step 2 info is in upstream_flowlines_df.
+        - Steps 2-3 are skipped (not sent) when Step 1 finds no samples.
         - executed_queries: list of dicts with label, endpoint, response_status, row_count, error, query (exact SPARQL run).
     """
     if not (region_code and region_code.strip()):
@@ -162,19 +175,21 @@ WHERE {{
     {conc_filter}
 }}
 """
-    js1, err1, dbg1 = post_sparql_with_debug("federation", q1, timeout=timeout)
+    samples_df, err1, dbg1 = execute_cached_query(_run_federation_query, query=q1, timeout=timeout)
     executed_queries.append(
         build_query_debug_entry(
             "Step 1: PFAS Samples",
             dbg1,
-            row_count=len(parse_sparql_results(js1)) if js1 else 0,
+            row_count=len(samples_df),
             error=err1,
             query=q1,
         )
     )
     if err1:
         return samples_df, pd.DataFrame(), upstream_flowlines_df, facilities_df, executed_queries, err1
-    samples_df = parse_sparql_results(js1) if js1 else pd.DataFrame()
+    if samples_df.empty:
+        # Steps 2-3 trace upstream from the same sample set, so they cannot match anything
+        return samples_df, pd.DataFrame(), upstream_flowlines_df, facilities_df, executed_queries, None
 
     # Step 2: Upstream flowlines
     q2 = f"""
@@ -209,25 +224,23 @@ WHERE {{
                        nhdplusv2:hasFTYPE ?us_ftype .
 }}
 """
-    js2, err2, dbg2 = post_sparql_with_debug("federation", q2, timeout=timeout)
+    upstream_flowlines_df, err2, dbg2 = execute_cached_query(_run_federation_query, query=q2, timeout=timeout)
     executed_queries.append(
         build_query_debug_entry(
             "Step 2: Upstream Flowlines",
             dbg2,
-            row_count=len(parse_sparql_results(js2)) if js2 else 0,
+            row_count=len(upstream_flowlines_df),
             error=err2,
             query=q2,
         )
     )
     if err2:
         return samples_df, pd.DataFrame(), upstream_flowlines_df, facilities_df, executed_queries, err2
-    upstream_flowlines_df = parse_sparql_results(js2) if js2 else pd.DataFrame()
 
     # Step 3: Upstream facilities
     if industry_values:
         facility_industry_pattern = f"""
-    ?facility fio:ofIndustry ?industryGroup ;
-             fio:ofIndustry ?industryCode ;
+    ?facility fio:ofIndustry ?industryCode ;
              geo:hasGeometry/geo:asWKT ?facWKT ;
              rdfs:label ?facilityName .
     ?industryCode a naics:NAICS-IndustryCode ;
@@ -284,19 +297,18 @@ WHERE {{
     {facility_industry_pattern}
 }}
 """
-    js3, err3, dbg3 = post_sparql_with_debug("federation", q3, timeout=timeout)
+    facilities_df, err3, dbg3 = execute_cached_query(_run_federation_query, query=q3, timeout=timeout)
     executed_queries.append(
         build_query_debug_entry(
             "Step 3: Upstream Facilities",
             dbg3,
-            row_count=len(parse_sparql_results(js3)) if js3 else 0,
+            row_count=len(facilities_df),
             error=err3,
             query=q3,
         )
     )
     if err3:
         return samples_df, pd.DataFrame(), upstream_flowlines_df, facilities_df, executed_queries, err3
-    facilities_df = parse_sparql_results(js3) if js3 else pd.DataFrame()
 
     upstream_s2_df = pd.DataFrame()
     return samples_df, upstream_s2_df, upstream_flowlines_df, facilities_df, executed_queries, None
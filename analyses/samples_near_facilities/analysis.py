@@ -4,8 +4,11 @@ Find PFAS samples near facilities of a specific industry type
 """
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 import pandas as pd
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 from analysis_registry import AnalysisContext
 from analyses.samples_near_facilities.queries import (
@@ -19,6 +22,7 @@ from filters.substance import render_sidebar_substance_selector
 # Shared components
 from core.boundary import fetch_boundaries
 from core.geometry import create_geodataframe
+from core.query_cache import execute_cached_query
 from core.sparql import build_query_debug_entry
 from components.parameter_display import (
     build_concentration_params,
@@ -38,12 +42,14 @@ from components.map_rendering import (
     add_point_layer,
     add_sample_layer,
     finalize_map,
+    map_to_html,
     render_map_legend,
     render_folium_map,
 )
 from components.sample_popup import (
     aggregate_sample_popups,
     aggregate_sample_popups_lite,
+    compact_sample_results,
     SAMPLE_POPUP_FIELDS,
     SAMPLE_POPUP_FIELDS_LITE,
     SAMPLE_POPUP_KWDS,
@@ -144,16 +150,24 @@ def main(context: AnalysisContext) -> None:
         run_eta = estimate_eta(run_request)
 
         executor = StepExecutor(num_steps=2)
-        facilities_df = pd.DataFrame()
-        samples_df = pd.DataFrame()
         executed_queries = []
         step_eta_by_label = {s.label: s for s in run_eta.step_estimates}
 
         def _record_step(step_info: dict) -> None:
             executed_queries.append(step_info)
 
+        # Boundaries don't depend on the queries, so they load while the queries run
+        pool = ThreadPoolExecutor(
+            max_workers=1, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx()),
+        )
+        boundaries_future = pool.submit(
+            fetch_boundaries, context.selected_state_code, context.selected_county_code,
+        )
+        pool.shutdown(wait=False)
+
         with executor.step(1, "Finding facilities...") as step:
-            facilities_df, error, debug = execute_nearby_facilities_query(
+            facilities_df, error, debug = execute_cached_query(
+                execute_nearby_facilities_query,
                 naics_code=selected_naics_code,
                 region_code=context.region_code,
             )
@@ -176,7 +190,8 @@ def main(context: AnalysisContext) -> None:
             samples_df = pd.DataFrame()
         else:
             with executor.step(2, "Finding PFAS samples...") as step:
-                samples_df, error, debug = execute_nearby_samples_query(
+                samples_df, error, debug = execute_cached_query(
+                    execute_nearby_samples_query,
                     naics_code=selected_naics_code,
                     region_code=context.region_code,
                     min_concentration=min_conc,
@@ -213,17 +228,22 @@ def main(context: AnalysisContext) -> None:
         else:
             samples_agg_df = aggregate_sample_popups(samples_df)
 
+        samples_df, samples_agg_df, facilities_df = compact_sample_results(
+            samples_df, samples_agg_df, facilities_df,
+        )
+
         record_executed_query_batch(
             request=run_request,
             executed_queries=executed_queries,
             step_eta_by_label=step_eta_by_label,
         )
-        boundaries = fetch_boundaries(context.selected_state_code, context.selected_county_code)
+        boundaries = boundaries_future.result()
 
         state.set("executed_queries", executed_queries)
         state.set_results({
             "facilities_df": facilities_df, "samples_df": samples_df,
             "samples_agg_df": samples_agg_df,
+            "summary": _summarize_results(facilities_df, samples_df, samples_agg_df),
             "use_lite_popups": use_lite,
             "industry_display": selected_industry_display, "boundaries": boundaries,
             "params_data": [
@@ -245,6 +265,7 @@ def main(context: AnalysisContext) -> None:
         facilities_df = results.get("facilities_df", pd.DataFrame())
         samples_df = results.get("samples_df", pd.DataFrame())
         samples_agg_df = results.get("samples_agg_df", pd.DataFrame())
+        summary = results.get("summary", {})
         industry_display = results.get("industry_display", "")
         boundaries = results.get("boundaries", {})
         params_data = results.get("params_data", [])
@@ -258,9 +279,11 @@ def main(context: AnalysisContext) -> None:
         # Step 1: Facilities
         if not facilities_df.empty:
             metrics = [{"label": "Total Facilities", "value": len(facilities_df)}]
-            if 'industryName' in facilities_df.columns:
-                metrics.append({"label": "Industry Types", "value": facilities_df['industryName'].nunique()})
-            facilities_table_df = add_naics_url_column(facilities_df)
+            if summary.get("industry_types") is not None:
+                metrics.append({"label": "Industry Types", "value": summary["industry_types"]})
+            facilities_table_df = state.get_or_compute(
+                "facilities_table_df", lambda: add_naics_url_column(facilities_df),
+            )
             render_step_results("Step 1: Facilities", facilities_table_df, metrics, "View Facilities Data",
                 display_columns=['facilityName', 'industryCode_url', 'industryName', 'facility'],
                 download_filename=f"near_facilities_{query_region_code or 'all'}.csv",
@@ -277,15 +300,12 @@ def main(context: AnalysisContext) -> None:
 
         # Step 2: Samples
         if not samples_df.empty:
-            n_sample_points = samples_df['samplePoint'].nunique() if 'samplePoint' in samples_df.columns else len(samples_agg_df)
             metrics = [
                 {"label": "Total Observations", "value": len(samples_df)},
-                {"label": "Unique Sample Points", "value": n_sample_points},
+                {"label": "Unique Sample Points", "value": summary.get("sample_points", len(samples_agg_df))},
             ]
-            if not samples_agg_df.empty and "overall_max_result" in samples_agg_df.columns:
-                max_vals = pd.to_numeric(samples_agg_df["overall_max_result"], errors="coerce")
-                if max_vals.notna().any():
-                    metrics.append({"label": "Max Concentration", "value": f"{max_vals.max():.2f} ng/L"})
+            if summary.get("max_concentration") is not None:
+                metrics.append({"label": "Max Concentration", "value": f"{summary['max_concentration']:.2f} ng/L"})
 
             render_step_results("Step 2: PFAS Samples", samples_df, metrics, "View Samples Data",
                 download_filename=f"near_facilities_samples_{query_region_code or 'all'}.csv",
@@ -294,7 +314,22 @@ def main(context: AnalysisContext) -> None:
 
         # Map
         use_lite = results.get("use_lite_popups", False)
-        _render_map(facilities_df, samples_agg_df, industry_display, boundaries, query_region_code, context, use_lite)
+        if not facilities_df.empty and 'facWKT' not in facilities_df.columns:
+            st.warning("No facility location data available for mapping")
+        layers = state.get_or_compute(
+            "map_layers",
+            lambda: _build_map_layers(facilities_df, samples_agg_df),
+        )
+        if layers is not None:
+            # Rendered once per result set; reruns reuse the HTML
+            try:
+                map_html = state.get_or_compute(
+                    "map_html",
+                    lambda: map_to_html(_build_map(layers, industry_display, boundaries, query_region_code, use_lite)),
+                )
+                _render_map(map_html)
+            except Exception as e:
+                st.error(f"Error creating map: {e}")
 
         if facilities_df.empty and samples_df.empty:
             st.warning("No results found. Try a different industry type or region.")
@@ -302,58 +337,84 @@ def main(context: AnalysisContext) -> None:
         st.info("Select parameters in the sidebar and click 'Execute Query' to run the analysis")
 
 
-def _render_map(facilities_df, samples_agg_df, industry_display, boundaries, query_region_code, context, use_lite: bool = False) -> None:
+def _summarize_results(facilities_df, samples_df, samples_agg_df) -> dict:
+    """Compute the results-panel metrics once, at execute time."""
+    summary = {
+        "industry_types": (
+            int(facilities_df["industryName"].nunique())
+            if "industryName" in facilities_df.columns else None
+        ),
+        "sample_points": (
+            int(samples_df["samplePoint"].nunique())
+            if "samplePoint" in samples_df.columns else len(samples_agg_df)
+        ),
+        "max_concentration": None,
+    }
+    if not samples_agg_df.empty and "overall_max_result" in samples_agg_df.columns:
+        max_vals = pd.to_numeric(samples_agg_df["overall_max_result"], errors="coerce")
+        if max_vals.notna().any():
+            summary["max_concentration"] = float(max_vals.max())
+    return summary
+
+
+def _build_map_layers(facilities_df, samples_agg_df) -> dict | None:
+    """Parse result geometries into GeoDataFrames ready for the map.
+
+    Returns None when there are no facility locations to map.
+    """
+    facilities_gdf = create_geodataframe(facilities_df, 'facWKT')
+    if facilities_gdf is None or facilities_gdf.empty:
+        return None
+
+    # Add facility links and NAICS code links
+    if "facility" in facilities_gdf.columns:
+        facilities_gdf = add_facility_link_column(facilities_gdf)
+    if "industryCode" in facilities_gdf.columns:
+        facilities_gdf = add_naics_link_column(facilities_gdf)
+
+    samples_gdf = None
+    if not samples_agg_df.empty and 'spWKT' in samples_agg_df.columns:
+        samples_gdf = create_geodataframe(samples_agg_df, 'spWKT')
+
+    return {"facilities": facilities_gdf, "samples": samples_gdf}
+
+
+def _build_map(layers, industry_display, boundaries, query_region_code, use_lite: bool = False):
+    """Build the facilities and nearby samples map."""
+    facilities_gdf = layers["facilities"]
+    samples_gdf = layers["samples"]
+
+    map_obj = create_base_map(gdf_list=[facilities_gdf] + ([samples_gdf] if samples_gdf is not None else []), zoom=8)
+    add_boundary_layers(map_obj, boundaries, query_region_code)
+
+    facility_color = FACILITY_COLORS_REDS[3]  # #cb181d — strong red
+    facility_fields = [c for c in ["Facility ID", "facilityName", "industryName", "NAICS Code"] if c in facilities_gdf.columns]
+    add_point_layer(map_obj, facilities_gdf,
+        name=f'<span style="color:{facility_color};">{industry_display} ({len(facilities_gdf)})</span>',
+        color=facility_color, popup_fields=facility_fields, radius=FACILITY_MARKER_RADIUS,
+        popup_kwds={"max_width": 650, "parse_html": True},
+        tooltip_kwds={"sticky": True, "parse_html": True})
+
+    # Add samples with popup (PuOr concentration palette)
+    if samples_gdf is not None and not samples_gdf.empty:
+        popup_fields = SAMPLE_POPUP_FIELDS_LITE if use_lite else SAMPLE_POPUP_FIELDS
+        popup_kwds = SAMPLE_POPUP_KWDS if not use_lite else {"max_width": 500, "max_height": 400, "parse_html": True}
+        add_sample_layer(map_obj, samples_gdf,
+            popup_fields=popup_fields, popup_kwds=popup_kwds,
+            name=f'<span style="color:{COLOR_SAMPLE};">PFAS Samples ({len(samples_gdf)})</span>',
+            radius=6)
+
+    finalize_map(map_obj)
+    return map_obj
+
+
+def _render_map(map_html: str) -> None:
     """Render the interactive map."""
-    if facilities_df.empty or 'facWKT' not in facilities_df.columns:
-        if not facilities_df.empty:
-            st.warning("No facility location data available for mapping")
-        return
-
     st.markdown("---")
     st.markdown("### Interactive Map")
-
-    try:
-        facilities_gdf = create_geodataframe(facilities_df, 'facWKT')
-        if facilities_gdf is None or facilities_gdf.empty:
-            return
-
-        samples_gdf = None
-        if not samples_agg_df.empty and 'spWKT' in samples_agg_df.columns:
-            samples_gdf = create_geodataframe(samples_agg_df, 'spWKT')
-
-        map_obj = create_base_map(gdf_list=[facilities_gdf] + ([samples_gdf] if samples_gdf is not None else []), zoom=8)
-        add_boundary_layers(map_obj, boundaries, query_region_code)
-
-        # Add facility links and NAICS code links
-        if "facility" in facilities_gdf.columns:
-            facilities_gdf = add_facility_link_column(facilities_gdf)
-        if "industryCode" in facilities_gdf.columns:
-            facilities_gdf = add_naics_link_column(facilities_gdf)
-
-        facility_color = FACILITY_COLORS_REDS[3]  # #cb181d — strong red
-        facility_fields = [c for c in ["Facility ID", "facilityName", "industryName", "NAICS Code"] if c in facilities_gdf.columns]
-        add_point_layer(map_obj, facilities_gdf,
-            name=f'<span style="color:{facility_color};">{industry_display} ({len(facilities_gdf)})</span>',
-            color=facility_color, popup_fields=facility_fields, radius=FACILITY_MARKER_RADIUS,
-            popup_kwds={"max_width": 650, "parse_html": True},
-            tooltip_kwds={"sticky": True, "parse_html": True})
-
-        # Add samples with popup (PuOr concentration palette)
-        if samples_gdf is not None and not samples_gdf.empty:
-            popup_fields = SAMPLE_POPUP_FIELDS_LITE if use_lite else SAMPLE_POPUP_FIELDS
-            popup_kwds = SAMPLE_POPUP_KWDS if not use_lite else {"max_width": 500, "max_height": 400, "parse_html": True}
-            add_sample_layer(map_obj, samples_gdf,
-                popup_fields=popup_fields, popup_kwds=popup_kwds,
-                name=f'<span style="color:{COLOR_SAMPLE};">PFAS Samples ({len(samples_gdf)})</span>',
-                radius=6)
-
-        finalize_map(map_obj)
-        render_folium_map(map_obj)
-        render_map_legend([
-            "**Boundary** = Selected region",
-            "**Red markers** = Facilities of selected industry type",
-            "**Orange circles** = PFAS sample points nearby"
-        ])
-
-    except Exception as e:
-        st.error(f"Error creating map: {e}")
+    render_folium_map(map_html)
+    render_map_legend([
+        "**Boundary** = Selected region",
+        "**Red markers** = Facilities of selected industry type",
+        "**Orange circles** = PFAS sample points nearby"
+    ])
@@ -13,15 +13,7 @@ from core.sparql import (
     post_sparql_with_debug,
     sparql_values_uri,
 )
-from core.naics_utils import build_naics_values_and_hierarchy, normalize_naics_codes
-
-
-
-def _build_industry_filter(naics_code: str | list[str]) -> tuple[str, str]:
-    naics_codes = normalize_naics_codes(naics_code)
-    if not naics_codes:
-        return "", ""
-    return build_naics_values_and_hierarchy(naics_codes[0])
+from core.naics_utils import build_industry_filter
 
 
 def _build_region_filter(region_code: Optional[str]) -> str:
@@ -51,7 +43,7 @@ def execute_nearby_facilities_query(
     region_code: Optional[str],
 ) -> Tuple[pd.DataFrame, Optional[str], Dict[str, Any]]:
     """Step 1: Find facilities in selected industry/region."""
-    industry_values, industry_hierarchy = _build_industry_filter(naics_code)
+    industry_values, industry_hierarchy = build_industry_filter(naics_code)
     region_filter = _build_region_filter(region_code)
 
     query = f"""
@@ -66,8 +58,7 @@ PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
 PREFIX fio: <http://w3id.org/fio/v1/fio#>
 
 SELECT DISTINCT ?facility ?facWKT ?facilityName ?industryCode ?industryName WHERE {{
-    ?facility fio:ofIndustry ?industryGroup;
-              fio:ofIndustry ?industryCode;
+    ?facility fio:ofIndustry ?industryCode;
               spatial:connectedTo ?county;
               geo:hasGeometry/geo:asWKT ?facWKT;
               rdfs:label ?facilityName.
@@ -104,7 +95,7 @@ def execute_nearby_samples_query(
     Returns one row per observation with columns: samplePoint, samplePointName,
     spWKT, sample, sampleIdentifier, date, substance, result, unit, sampleType.
     """
-    industry_values, industry_hierarchy = _build_industry_filter(naics_code)
+    industry_values, industry_hierarchy = build_industry_filter(naics_code)
     region_filter = _build_region_filter(region_code)
     conc_filter = concentration_filter_sparql(min_concentration, max_concentration, include_nondetects)
     subst_filter = sparql_values_uri("substance1", substance_uri)
@@ -133,8 +124,7 @@ WHERE {{
     {{SELECT DISTINCT ?s2neighbor WHERE {{
         ?s2cell rdf:type kwg-ont:S2Cell_Level13 ;
                 kwg-ont:sfContains ?facility.
-        ?facility fio:ofIndustry ?industryGroup;
-                  fio:ofIndustry ?industryCode;
+        ?facility fio:ofIndustry ?industryCode;
                   spatial:connectedTo ?county .
         {region_filter}
         ?industryCode a naics:NAICS-IndustryCode;
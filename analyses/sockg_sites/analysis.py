@@ -9,7 +9,7 @@ import pandas as pd
 
 from analysis_registry import AnalysisContext
 from analyses.sockg_sites.queries import get_sockg_locations, get_sockg_facilities
-from filters.region import get_region_boundary, add_region_boundary_layers
+from filters.region import get_cached_region_boundary, add_region_boundary_layers
 
 # Shared components
 from core.geometry import create_geodataframe, convert_to_centroids
@@ -22,6 +22,7 @@ from components.map_rendering import (
     create_base_map,
     add_point_layer,
     finalize_map,
+    map_to_html,
     render_map_legend,
     render_folium_map,
 )
@@ -93,8 +94,6 @@ def main(context: AnalysisContext) -> None:
         run_eta = estimate_eta(run_request)
 
         executor = StepExecutor(num_steps=2)
-        sites_df = pd.DataFrame()
-        facilities_df = pd.DataFrame()
         executed_queries = []
         step_eta_by_label = {s.label: s for s in run_eta.step_estimates}
 
@@ -127,7 +126,7 @@ def main(context: AnalysisContext) -> None:
         state.set_results({
             "sites_df": sites_df, "facilities_df": facilities_df,
             "state_display": state_display, "state_code": state_code,
-            "region_boundary_df": get_region_boundary(state_code) if state_code else None,
+            "region_boundary_df": get_cached_region_boundary(state_code) if state_code else None,
             "params_data": [{"Parameter": "State filter", "Value": state_display}],
             "executed_queries": executed_queries,
         })
@@ -182,27 +181,44 @@ def main(context: AnalysisContext) -> None:
         )
 
     # Map
-    _render_map(sites_df, facilities_df, region_boundary_df, state_code)
+    layers = state.get_or_compute("map_layers", lambda: _build_map_layers(sites_df, facilities_df))
+    if layers is not None:
+        # Rendered once per result set; reruns reuse the HTML
+        map_html = state.get_or_compute(
+            "map_html",
+            lambda: map_to_html(_build_map(layers, region_boundary_df, state_code)),
+        )
+        _render_map(map_html)
 
 
-def _render_map(sites_df, facilities_df, region_boundary_df, state_code) -> None:
-    """Render the interactive map."""
+def _build_map_layers(sites_df, facilities_df) -> dict | None:
+    """Parse result geometries into point GeoDataFrames ready for the map.
+
+    Returns None when neither result frame has mappable geometry.
+    """
     sites_gdf = create_geodataframe(sites_df, 'locationGeometry') if not sites_df.empty else None
-    facilities_gdf = None
+    facilities_gdf = create_geodataframe(facilities_df, 'facWKT') if not facilities_df.empty else None
+    if sites_gdf is None and facilities_gdf is None:
+        return None
 
-    if not facilities_df.empty and "facWKT" in facilities_df.columns:
-        fac_with_wkt = facilities_df[facilities_df["facWKT"].notna()].copy()
-        if not fac_with_wkt.empty:
-            fac_with_wkt["PFASusing"] = fac_with_wkt["PFASusing"].astype(str).str.lower() == "true"
-            facilities_gdf = create_geodataframe(fac_with_wkt, 'facWKT')
+    if facilities_gdf is not None:
+        facilities_gdf["PFASusing"] = facilities_gdf["PFASusing"].astype(str).str.lower() == "true"
 
-    if sites_gdf is None and facilities_gdf is None:
-        return
+    # The parsed geometries set the map extent; markers are drawn at their centroids
+    return {
+        "sites_gdf": sites_gdf,
+        "facilities_gdf": facilities_gdf,
+        "sites": convert_to_centroids(sites_gdf) if sites_gdf is not None and not sites_gdf.empty else None,
+        "facilities": (
+            convert_to_centroids(facilities_gdf)
+            if facilities_gdf is not None and not facilities_gdf.empty else None
+        ),
+    }
 
-    st.markdown("---")
-    st.markdown("### Interactive Map")
 
-    map_obj = create_base_map(gdf_list=[sites_gdf, facilities_gdf], zoom=6)
+def _build_map(layers, region_boundary_df, state_code):
+    """Build the SOCKG locations and facilities map."""
+    map_obj = create_base_map(gdf_list=[layers["sites_gdf"], layers["facilities_gdf"]], zoom=6)
 
     tooltip_style = (
         "background-color: white; border-radius: 3px; box-shadow: 3px 3px 5px grey; "
@@ -210,8 +226,8 @@ def _render_map(sites_df, facilities_df, region_boundary_df, state_code) -> None
     )
 
     # Add SOCKG sites
-    if sites_gdf is not None and not sites_gdf.empty:
-        sites_points = convert_to_centroids(sites_gdf)
+    sites_points = layers["sites"]
+    if sites_points is not None:
         site_fields = [c for c in ["locationId", "locationDescription", "location"] if c in sites_points.columns]
         site_color = FACILITY_COLORS_PURPLES[3]  # #6a51a3
         add_point_layer(map_obj, sites_points,
@@ -221,8 +237,8 @@ def _render_map(sites_df, facilities_df, region_boundary_df, state_code) -> None
             popup_kwds=dict(aliases=site_fields, localize=True, labels=True, style=tooltip_style))
 
     # Add facilities (split by PFAS status)
-    if facilities_gdf is not None and not facilities_gdf.empty:
-        facilities_points = convert_to_centroids(facilities_gdf)
+    facilities_points = layers["facilities"]
+    if facilities_points is not None:
         pfas_facilities = facilities_points[facilities_points["PFASusing"]]
         other_facilities = facilities_points[~facilities_points["PFASusing"]]
 
@@ -249,7 +265,14 @@ def _render_map(sites_df, facilities_df, region_boundary_df, state_code) -> None
 
     add_region_boundary_layers(map_obj, region_boundary_df=region_boundary_df, region_code=state_code)
     finalize_map(map_obj)
-    render_folium_map(map_obj)
+    return map_obj
+
+
+def _render_map(map_html: str) -> None:
+    """Render the interactive map."""
+    st.markdown("---")
+    st.markdown("### Interactive Map")
+    render_folium_map(map_html)
     render_map_legend([
         "**Purple circles** = SOCKG locations (ARS sites)",
         "**Light purple circles** = Other facilities",
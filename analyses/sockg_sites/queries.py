@@ -8,6 +8,7 @@ from typing import Any, Dict, Optional, Tuple
 import pandas as pd
 import streamlit as st
 
+from core.query_cache import execute_cached_query
 from core.sparql import ENDPOINT_URLS, parse_sparql_results, post_sparql_with_debug
 
 
@@ -49,13 +50,7 @@ SELECT DISTINCT ?ar1 WHERE {
     return df[["ar1", "fips_code"]].reset_index(drop=True)
 
 
-def get_sockg_locations(state_code: Optional[str] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
-    """
-    Fetch SOCKG locations (optionally filtered by state).
-
-    Args:
-        state_code: Optional 2-digit FIPS state code (e.g., "19" for Iowa)
-    """
+def _run_locations_query(state_code: Optional[str]) -> Tuple[pd.DataFrame, Optional[str], Dict[str, Any]]:
     # Build state filter - URIs use zero-padded 2-digit codes (e.g., USA.01 not USA.1)
     state_filter = ""
     if state_code:
@@ -85,23 +80,36 @@ WHERE {{
 """
     results, error, debug_info = post_sparql_with_debug("federation", query)
     df = parse_sparql_results(results) if results else pd.DataFrame()
-    debug_info.update({
+    return df, error, debug_info
+
+
+def get_sockg_locations(state_code: Optional[str] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Fetch SOCKG locations (optionally filtered by state).
+
+    Repeat runs for the same state are served from the query cache.
+
+    Args:
+        state_code: Optional 2-digit FIPS state code (e.g., "19" for Iowa)
+    """
+    df, error, debug_info = execute_cached_query(_run_locations_query, state_code=state_code)
+    debug_info = {
+        **debug_info,
         "label": "Step 1: SOCKG Locations",
         "error": error,
         "row_count": len(df),
-    })
+    }
     if df.empty:
         return pd.DataFrame(columns=["location", "locationGeometry", "locationId", "locationDescription"]), debug_info
     return df.reset_index(drop=True), debug_info
 
 
-def get_sockg_facilities(state_code: Optional[str] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
-    """
-    Fetch facilities near SOCKG locations (optionally filtered by state).
+_FACILITY_GROUP_COLUMNS = [
+    "facility", "facilityName", "facWKT", "PFASusing", "industrySector", "industrySubsector",
+]
 
-    Args:
-        state_code: Optional 2-digit FIPS state code (e.g., "19" for Iowa)
-    """
+
+def _run_facilities_query(state_code: Optional[str]) -> Tuple[pd.DataFrame, Optional[str], Dict[str, Any]]:
     # Build state filter - URIs use zero-padded 2-digit codes (e.g., USA.01 not USA.1)
     state_filter = ""
     if state_code:
@@ -124,8 +132,7 @@ PREFIX naics: <http://w3id.org/fio/v1/naics#>
 PREFIX fio-pfas:  <http://w3id.org/fio/v1/pfas#>
 
 SELECT DISTINCT ?facility ?facilityName ?facWKT ?PFASusing ?industrySector ?industrySubsector
-       (GROUP_CONCAT(DISTINCT ?industry; SEPARATOR='; ') as ?industries)
-       (GROUP_CONCAT(DISTINCT ?locationId; SEPARATOR='; ') as ?locations)
+       ?industry ?locationId
 WHERE {{
     ?location a sockg:Location ;
               dcterms:identifier ?locationId ;
@@ -155,15 +162,30 @@ WHERE {{
     }}
     BIND(BOUND(?pfasList) as ?PFASusing)
 }}
-GROUP BY ?facility ?facilityName ?facWKT ?PFASusing ?industrySector ?industrySubsector
 """
     results, error, debug_info = post_sparql_with_debug("federation", query)
     df = parse_sparql_results(results) if results else pd.DataFrame()
-    debug_info.update({
+    if not df.empty:
+        df = _concat_facility_rows(df)
+    return df, error, debug_info
+
+
+def get_sockg_facilities(state_code: Optional[str] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Fetch facilities near SOCKG locations (optionally filtered by state).
+
+    Repeat runs for the same state are served from the query cache.
+
+    Args:
+        state_code: Optional 2-digit FIPS state code (e.g., "19" for Iowa)
+    """
+    df, error, debug_info = execute_cached_query(_run_facilities_query, state_code=state_code)
+    debug_info = {
+        **debug_info,
         "label": "Step 2: SOCKG Nearby Facilities",
         "error": error,
         "row_count": len(df),
-    })
+    }
     if df.empty:
         return pd.DataFrame(
             columns=[
@@ -180,6 +202,23 @@ GROUP BY ?facility ?facilityName ?facWKT ?PFASusing ?industrySector ?industrySub
     return df.reset_index(drop=True), debug_info
 
 
+def _join_distinct(values: pd.Series) -> str:
+    return "; ".join(values.dropna().unique())
+
+
+def _concat_facility_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Collapse per-industry/per-location rows to one row per facility group.
+
+    Done here rather than with GROUP_CONCAT(DISTINCT ...) so the endpoint only
+    streams bindings.
+    """
+    return (
+        df.groupby(_FACILITY_GROUP_COLUMNS, sort=False, dropna=False)
+        .agg(industries=("industry", _join_distinct), locations=("locationId", _join_distinct))
+        .reset_index()
+    )
+
+
 # Cached versions for use in app
 @st.cache_data(ttl=3600)
 def get_sockg_state_code_set() -> set:
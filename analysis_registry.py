@@ -4,6 +4,7 @@ Analysis Registry - Centralized configuration for all analyses
 from __future__ import annotations
 
 from dataclasses import dataclass
+from importlib import import_module
 from typing import Callable, Literal, Optional
 import pandas as pd
 
@@ -69,18 +70,27 @@ def _disabled_stub(key: str) -> Callable[[AnalysisContext], None]:
     return _run
 
 
+def _lazy_runner(module_name: str) -> Callable[[AnalysisContext], None]:
+    """Create a runner that imports the analysis module on first use."""
+    def _run(context: AnalysisContext) -> None:
+        import_module(module_name).main(context)
+    return _run
+
+
 def build_registry() -> dict[str, AnalysisSpec]:
     """
     Build the analysis registry with lazy imports to avoid loading all modules at startup.
+
+    Analysis modules (and the geopandas/folium stack they pull in) are only
+    imported when their analysis is first run.
     """
-    # Lazy imports from new folder structure
-    from analyses.pfas_upstream.analysis import main as upstream_main
-    from analyses.pfas_downstream.analysis import main as downstream_main
-    from analyses.samples_near_facilities.analysis import main as near_facilities_main
-    from analyses.regional_overview.analysis import main as regional_main
-    from analyses.facility_risk.analysis import main as risk_main
-    from analyses.sockg_sites.analysis import main as sockg_main
-    from analyses.aquifer_wells.analysis import main as aquifer_wells_main
+    upstream_main = _lazy_runner("analyses.pfas_upstream.analysis")
+    downstream_main = _lazy_runner("analyses.pfas_downstream.analysis")
+    near_facilities_main = _lazy_runner("analyses.samples_near_facilities.analysis")
+    regional_main = _lazy_runner("analyses.regional_overview.analysis")
+    risk_main = _lazy_runner("analyses.facility_risk.analysis")
+    sockg_main = _lazy_runner("analyses.sockg_sites.analysis")
+    aquifer_wells_main = _lazy_runner("analyses.aquifer_wells.analysis")
     
     specs = [
         AnalysisSpec(
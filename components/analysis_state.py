@@ -4,7 +4,7 @@ Consolidates the repeated session state patterns.
 """
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 import streamlit as st
 
 
@@ -58,6 +58,22 @@ class AnalysisState:
         st.session_state[self._results_key] = results
         st.session_state[self._has_results_key] = True
 
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Get a value derived from the stored results, computing it only once.
+
+        The value is kept inside the results dict, so it is reused across
+        reruns and discarded automatically when set_results() stores a new run.
+
+        Args:
+            key: Name of the derived value within the results dict
+            compute: Zero-argument callable that builds the value
+        """
+        results = self.get_results()
+        if key not in results:
+            results[key] = compute()
+        return results[key]
+
     def clear_results(self) -> None:
         """Clear stored results from session state."""
         if self._results_key in st.session_state:
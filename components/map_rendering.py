@@ -125,15 +125,13 @@ def add_facility_link_column(
     if df is None or df.empty or source_col not in df.columns:
         return df
 
-    def _link_for(value: Any) -> Any:
-        uri = str(value).strip() if value else ""
-        if not uri or uri == "nan":
-            return value
-        label = uri.rsplit("/", 1)[-1].rsplit("#", 1)[-1]
-        return f'<a href="{uri}" target="_blank">{label}</a>'
+    values = df[source_col]
+    uris = values.astype(str).str.strip()
+    labels = uris.str.extract(r"([^/#]*)$", expand=False)
+    links = '<a href="' + uris + '" target="_blank">' + labels + "</a>"
 
     result = df.copy()
-    result[target_col] = result[source_col].apply(_link_for)
+    result[target_col] = links.where(values.notna() & ~uris.isin(["", "nan"]), values)
     return result
 
 
@@ -147,10 +145,11 @@ def add_short_code_column(
     if df is None or df.empty or source_col not in df.columns:
         return df
 
+    values = df[source_col]
+    codes = values.astype(str).str.rsplit(delimiter, n=1).str[-1]
+
     result = df.copy()
-    result[target_col] = result[source_col].apply(
-        lambda x: str(x).split(delimiter)[-1] if x else x
-    )
+    result[target_col] = codes.where(values.notna() & values.astype(bool), values)
     return result
 
 
@@ -161,6 +160,11 @@ def extract_naics_code(uri: Any) -> str:
     return match.group(1) if match else ""
 
 
+def _extract_naics_codes(values: pd.Series) -> pd.Series:
+    """Vectorized extract_naics_code; rows without a trailing code are NaN."""
+    return values.where(values.notna(), "").astype(str).str.strip().str.extract(r"(\d+)$", expand=False)
+
+
 def add_naics_link_column(
     df: pd.DataFrame,
     source_col: str = "industryCode",
@@ -173,17 +177,15 @@ def add_naics_link_column(
     if df is None or df.empty or source_col not in df.columns:
         return df
 
-    def _link(value: Any) -> Any:
-        code = extract_naics_code(value)
-        if not code:
-            return value
-        return (
-            f'<a href="https://www.naics.com/naics-code-description/?code={code}"'
-            f' target="_blank">{code}</a>'
-        )
+    values = df[source_col]
+    codes = _extract_naics_codes(values)
+    links = (
+        '<a href="https://www.naics.com/naics-code-description/?code=' + codes
+        + '" target="_blank">' + codes + "</a>"
+    )
 
     result = df.copy()
-    result[target_col] = result[source_col].apply(_link)
+    result[target_col] = links.where(codes.notna(), values)
     return result
 
 
@@ -198,42 +200,38 @@ def add_naics_url_column(
     if df is None or df.empty or source_col not in df.columns:
         return df
 
-    def _url(value: Any) -> Any:
-        code = extract_naics_code(value)
-        if not code:
-            return None
-        return f"https://www.naics.com/naics-code-description/?code={code}"
+    codes = _extract_naics_codes(df[source_col])
+    urls = "https://www.naics.com/naics-code-description/?code=" + codes
 
     result = df.copy()
-    result[target_col] = result[source_col].apply(_url)
+    result[target_col] = urls.where(codes.notna(), None)
     return result
 
 
-def _concentration_to_color(value) -> str:
-    """Map a concentration value (ng/L) to a PuOr palette color."""
-    if value is None:
-        return SAMPLE_PUOR_PALETTE[0]
-    try:
-        v = float(value)
-    except (ValueError, TypeError):
-        return SAMPLE_PUOR_PALETTE[0]
-    if v <= 0:
-        return SAMPLE_PUOR_PALETTE[0]
-    for i, brk in enumerate(SAMPLE_CONC_BREAKS):
-        if v <= brk:
-            return SAMPLE_PUOR_PALETTE[i]
-    return SAMPLE_PUOR_PALETTE[-1]
+SAMPLE_POINT_STYLE = {
+    "radius": 6,
+    "fillColor": COLOR_SAMPLE,
+    "color": "DimGray",
+    "fillOpacity": 0.7,
+    "opacity": 0.3,
+}
 
 
 def sample_point_style(feature: Dict[str, Any]) -> Dict[str, Any]:
     """Shared marker style for sample points — single orange color."""
-    return {
-        "radius": 6,
-        "fillColor": COLOR_SAMPLE,
-        "color": "DimGray",
-        "fillOpacity": 0.7,
-        "opacity": 0.3,
-    }
+    return dict(SAMPLE_POINT_STYLE)
+
+
+def _layer_columns(gdf: gpd.GeoDataFrame, *field_lists: Optional[List[str]]) -> gpd.GeoDataFrame:
+    """Keep only the listed fields plus geometry, so explore() does not inline unused columns."""
+    keep: List[str] = []
+    for fields in field_lists:
+        for field in fields or []:
+            if field in gdf.columns and field not in keep and field != gdf.geometry.name:
+                keep.append(field)
+    if len(keep) + 1 >= len(gdf.columns):
+        return gdf
+    return gdf[keep + [gdf.geometry.name]]
 
 
 def add_sample_layer(
@@ -247,21 +245,21 @@ def add_sample_layer(
     """Add a sample-point layer colored by PuOr concentration palette.
 
     This is the canonical way to render PFAS sample points on any analysis map.
-    Uses ``sample_point_style`` for per-feature color and size.
+    The style is the same for every point, so it is passed as static
+    ``SAMPLE_POINT_STYLE`` rather than a per-feature style function.
     """
     if gdf is None or gdf.empty:
         return
 
     label = name or f'<span style="color:{COLOR_SAMPLE};">Samples</span>'
-    gdf.explore(
+    _layer_columns(gdf, popup_fields).explore(
         m=map_obj,
         name=label,
-        color=COLOR_SAMPLE,
         marker_kwds=dict(radius=radius),
         marker_type="circle_marker",
         popup=popup_fields,
         popup_kwds=popup_kwds or {},
-        style_kwds=dict(style_function=sample_point_style),
+        style_kwds=dict(SAMPLE_POINT_STYLE),
     )
 
 
@@ -290,13 +288,12 @@ def create_base_map(
     else:
         map_center = (39.8, -98.5)  # Default: center of US
 
-    map_obj = folium.Map(location=list(map_center), zoom_start=zoom)
+    # Canvas renderer draws circle markers on one <canvas> instead of one SVG node each
+    map_obj = folium.Map(location=list(map_center), zoom_start=zoom, prefer_canvas=True)
 
+    # The map renders in its own iframe, so page-level st.markdown CSS would not reach it
     if apply_popup_css:
-        try:
-            map_obj.get_root().header.add_child(folium.Element(POPUP_CSS))
-        except Exception:
-            pass
+        map_obj.get_root().header.add_child(folium.Element(POPUP_CSS), name="popup_css")
 
     return map_obj
 
@@ -364,15 +361,24 @@ def add_point_layer(
     if tooltip_fields is None:
         tooltip_fields = popup_fields
 
-    # Build explore kwargs
+    # A custom style function may read any property, and no popup fields means "show all"
+    if popup_fields and not style_function:
+        gdf = _layer_columns(gdf, popup_fields, tooltip_fields)
+
+    # The color goes in the static style rather than explore(color=...), which
+    # would copy the frame to add the same color as a property on every feature
+    style_kwds = {'fillColor': color, 'color': color}
+    if style_function:
+        style_kwds['style_function'] = style_function
+
     explore_kwargs = {
         'm': map_obj,
         'name': name,
-        'color': color,
         'marker_kwds': {'radius': radius},
         'marker_type': marker_type,
         'popup': popup_fields if popup_fields else True,
         'tooltip': tooltip_fields if tooltip_fields else None,
+        'style_kwds': style_kwds,
         'show': show
     }
 
@@ -381,10 +387,6 @@ def add_point_layer(
     if tooltip_kwds:
         explore_kwargs['tooltip_kwds'] = tooltip_kwds
 
-    # Add style function if provided
-    if style_function:
-        explore_kwargs['style_kwds'] = {'style_function': style_function}
-
     gdf.explore(**explore_kwargs)
 
 
@@ -414,11 +416,10 @@ def add_line_layer(
     if gdf is None or gdf.empty:
         return
 
-    gdf.explore(
+    _layer_columns(gdf, popup_fields).explore(
         m=map_obj,
         name=name,
-        color=color,
-        style_kwds={'weight': weight, 'opacity': opacity},
+        style_kwds={'fillColor': color, 'color': color, 'weight': weight, 'opacity': opacity},
         popup=popup_fields if popup_fields else False,
         tooltip=False,
         show=show
@@ -465,10 +466,21 @@ def add_grouped_point_layers(
         return
 
     colors = colors or LAYER_COLORS
-    unique_groups = sorted(gdf[group_column].dropna().unique())
 
-    for idx, group in enumerate(unique_groups):
-        group_gdf = gdf[gdf[group_column] == group]
+    # Narrow the frame once so every group slices only the serialized columns
+    if popup_fields:
+        gdf = _layer_columns(gdf, popup_fields, [group_column])
+
+    # explore() casts object columns to "string" on every call; do it once for all groups
+    object_columns = gdf.select_dtypes(include="object").columns
+    if len(object_columns):
+        gdf = gdf.astype({c: "string" for c in object_columns})
+
+    # One hash pass over the column gives each group's row positions
+    group_positions = gdf.groupby(group_column).indices
+    for idx, group in enumerate(sorted(group_positions)):
+        positions = group_positions[group]
+        group_gdf = gdf.take(positions)
         color = colors[idx % len(colors)]
         count = len(group_gdf)
 
@@ -506,16 +518,27 @@ def render_map_legend(legend_items: List[str]) -> None:
     st.info(legend_text)
 
 
+def map_to_html(map_obj: folium.Map) -> str:
+    """Render a folium map to a standalone HTML document."""
+    return map_obj.get_root().render()
+
+
 def render_folium_map(map_obj, height: int = 1000) -> None:
     """
-    Render a folium map with height proportional to its rendered width (16:9).
-    Uses a JS ResizeObserver injected via components.html so it works in both
-    normal and wide/full-screen modes even after st_folium sets height via JS.
+    Render a folium map as a display-only iframe via components.html.
+
+    Accepts either a folium Map or HTML already produced by map_to_html, so
+    callers can cache the rendered document across reruns. Unlike st_folium
+    there is no bidirectional state sync, so the map is sent to the browser
+    once instead of being re-serialized on every widget interaction.
+
+    The iframe height is kept proportional to its rendered width (16:9) by a
+    JS snippet, so it works in both normal and wide/full-screen modes.
     """
     import streamlit.components.v1 as components
-    from streamlit_folium import st_folium
 
-    st_folium(map_obj, width=None, height=height, returned_objects=[])
+    html = map_obj if isinstance(map_obj, str) else map_to_html(map_obj)
+    components.html(html, height=height)
 
     # Inject 0-height iframe with JS that finds the map iframe (height > 100px)
     # and resizes it to maintain 16:9, updating on every window resize.
@@ -527,7 +550,7 @@ def render_folium_map(map_obj, height: int = 1000) -> None:
                 var doc = window.parent.document;
                 function resizeMaps() {
                     doc.querySelectorAll(
-                        '[data-testid="stCustomComponentV1"] iframe'
+                        'iframe[data-testid="stIFrame"]'
                     ).forEach(function (f) {
                         if (f.offsetHeight > 100) {
                             var w = f.getBoundingClientRect().width;
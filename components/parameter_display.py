@@ -6,7 +6,6 @@ from __future__ import annotations
 
 from typing import List, Dict, Any
 import streamlit as st
-import pandas as pd
 
 
 def render_parameter_table(params: List[Dict[str, str]], title: str = "Selected Parameters (from executed query)") -> None:
@@ -26,9 +25,8 @@ def render_parameter_table(params: List[Dict[str, str]], title: str = "Selected
     if not params:
         return
 
-    params_df = pd.DataFrame(params)
     st.markdown(f"### {title}")
-    st.table(params_df)
+    st.table(params)
 
 
 def build_region_params(
@@ -42,6 +42,7 @@ def _build_metadata_line(query_info: Mapping[str, Any]) -> str:
 def _render_query_list(
     queries: list[Mapping[str, Any]],
     start_index: int = 1,
+    show_text: bool = True,
 ) -> None:
     """Render a list of query debug entries."""
     for index, query_info in enumerate(queries, start=start_index):
@@ -52,11 +53,12 @@ def _render_query_list(
         if metadata:
             st.caption(metadata)
 
-        query_text = str(query_info.get("query") or "").strip()
-        if query_text:
-            st.code(query_text, language="sparql")
-        else:
-            st.info("No query text captured for this step.")
+        if show_text:
+            query_text = str(query_info.get("query") or "").strip()
+            if query_text:
+                st.code(query_text, language="sparql")
+            else:
+                st.info("No query text captured for this step.")
 
         error_message = query_info.get("error") or query_info.get("exception")
         if error_message:
@@ -65,6 +67,7 @@ def _render_query_list(
         st.markdown("---")
 
 
+@st.fragment
 def render_executed_queries(
     executed_queries: Iterable[Mapping[str, Any]] | None,
     title: str = "Debug: Executed Queries",
@@ -76,6 +79,9 @@ def render_executed_queries(
     1. Analysis queries (passed explicitly via executed_queries)
     2. Filter/component queries (logged automatically by execute_sparql_query)
 
+    Query texts are only rendered while the "Show query text" toggle is on.
+    Runs as a fragment, so flipping the toggle reruns only this expander.
+
     Args:
         executed_queries: Iterable of query metadata dicts. Each item may include
             label, endpoint, timeout_sec, response_status, row_count, error, query.
@@ -88,12 +94,16 @@ def render_executed_queries(
         return
 
     with st.expander(title):
-        st.caption("Exact query text sent to the endpoint. Use the copy button in each code block.")
+        # Expander contents are sent on every rerun even when collapsed, and query
+        # texts with large VALUES blocks can run to hundreds of KB, so they are opt-in
+        show_text = st.toggle("Show query text", key="query_debug_show_text")
+        if show_text:
+            st.caption("Exact query text sent to the endpoint. Use the copy button in each code block.")
 
         if analysis_queries:
             st.markdown("### Analysis Queries")
-            _render_query_list(analysis_queries)
+            _render_query_list(analysis_queries, show_text=show_text)
 
         if filter_queries:
             st.markdown("### Filter / Component Queries")
-            _render_query_list(filter_queries)
+            _render_query_list(filter_queries, show_text=show_text)
@@ -5,8 +5,45 @@ Consolidates repeated metrics, expanders, and download buttons.
 from __future__ import annotations
 
 from typing import List, Dict, Any, Optional, Callable
+import io
+import numpy as np
 import streamlit as st
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _df_to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """Encode a DataFrame as CSV once per distinct content, not on every rerun.
+
+    Uses Arrow's CSV writer (string fields are quoted); frames Arrow cannot
+    convert, such as mixed-type object columns, fall back to pandas.
+    """
+    buf = io.BytesIO()
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowException, ValueError):
+        # Written straight to the byte buffer, skipping the intermediate str
+        df.to_csv(buf, index=False, encoding="utf-8")
+    else:
+        pa_csv.write_csv(table, buf)
+    return buf.getvalue()
+
+
+def _select_columns(df: pd.DataFrame, display_columns: Optional[List[str]]) -> pd.DataFrame:
+    """Return ``df`` narrowed to the present display columns, in their given order.
+
+    The frame is returned as-is (no copy) when nothing is requested, none of the
+    columns exist, or the selection already matches its columns.
+    """
+    if not display_columns:
+        return df
+    present = set(df.columns)
+    available_cols = [c for c in display_columns if c in present]
+    if not available_cols or available_cols == df.columns.tolist():
+        return df
+    return df[available_cols]
 
 
 def render_metrics_row(metrics: List[Dict[str, Any]], num_columns: Optional[int] = None) -> None:
@@ -63,41 +100,34 @@ def render_data_expander(
         return
 
     with st.expander(title):
-        # Filter to display columns if specified
-        if display_columns:
-            available_cols = [c for c in display_columns if c in df.columns]
-            if available_cols:
-                st.dataframe(df[available_cols], use_container_width=True, column_config=column_config)
-            else:
-                st.dataframe(df, use_container_width=True, column_config=column_config)
-        else:
-            st.dataframe(df, use_container_width=True, column_config=column_config)
+        st.dataframe(_select_columns(df, display_columns), use_container_width=True, column_config=column_config)
 
         # Show statistics if requested
         if show_stats and stats_column and stats_column in df.columns:
             st.markdown("##### Concentration Statistics")
             try:
-                vals = pd.to_numeric(df[stats_column], errors='coerce')
-                if vals.notna().any():
+                vals = pd.to_numeric(df[stats_column], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+                vals = vals[~np.isnan(vals)]
+                if vals.size:
                     col1, col2, col3 = st.columns(3)
                     with col1:
                         st.metric("Max (ng/L)", f"{vals.max():.2f}")
                     with col2:
                         st.metric("Mean (ng/L)", f"{vals.mean():.2f}")
                     with col3:
-                        st.metric("Median (ng/L)", f"{vals.median():.2f}")
+                        st.metric("Median (ng/L)", f"{np.median(vals):.2f}")
             except Exception:
                 pass
 
         # Download button
         if download_filename and download_key:
-            csv_data = df.to_csv(index=False)
             st.download_button(
                 label="Download CSV",
-                data=csv_data,
+                data=_df_to_csv_bytes(df),
                 file_name=download_filename,
                 mime="text/csv",
-                key=download_key
+                key=download_key,
+                on_click="ignore",
             )
 
 
@@ -154,19 +184,19 @@ def clean_unit_encoding(df: pd.DataFrame, columns: List[str] = None) -> pd.DataF
         columns: Columns to clean (default: ['unit', 'datedresults', 'results'])
 
     Returns:
-        DataFrame with cleaned encoding
+        DataFrame with cleaned encoding (``df`` itself when nothing needs fixing)
     """
     if df is None or df.empty:
         return df
 
-    result = df.copy()
-    target_cols = columns or ['unit', 'datedresults', 'results']
-
+    target_cols = [c for c in (columns or ['unit', 'datedresults', 'results']) if c in df.columns]
+    cleaned = {}
     for col in target_cols:
-        if col in result.columns:
-            mask = result[col].notna()
-            result.loc[mask, col] = (
-                result.loc[mask, col].astype(str).str.replace('Î¼', 'μ')
-            )
-
-    return result
+        if not pd.api.types.is_object_dtype(df[col]) and not pd.api.types.is_string_dtype(df[col]):
+            continue
+        needs_fix = df[col].str.contains('Î¼', regex=False, na=False).astype(bool)
+        if needs_fix.any():
+            cleaned[col] = df[col].where(~needs_fix, df[col].str.replace('Î¼', 'μ', regex=False))
+
+    # Only the affected columns are replaced; geometry and other columns are shared
+    return df.assign(**cleaned) if cleaned else df
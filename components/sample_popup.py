@@ -24,116 +24,65 @@ SAMPLE_POPUP_FIELDS_LITE = ["samplePointName", "Max Substance", "Max Result (ng/
 SAMPLE_POPUP_KWDS = {"max_width": 900, "max_height": 500, "parse_html": True}
 
 
-def _is_empty(x) -> bool:
-    if x is None:
-        return True
-    if isinstance(x, float) and pd.isna(x):
-        return True
-    if isinstance(x, str) and (x.strip() == "" or x.lower() == "nan"):
-        return True
-    return False
-
-
-def _group_to_html(group: pd.DataFrame) -> pd.Series:
-    """Build rich HTML popup content for a single sample point's observations."""
-    html_parts: list[str] = []
-    max_result_parts: list[str] = []
-    overall_max_result = -1.0
-    overall_max_unit = None
-    overall_max_substance = None
-    overall_max_sample_id = None
-    overall_max_date = None
-
-    for _, obs_row in group.iterrows():
-        result_str = obs_row.get("result")
-        if not _is_empty(result_str) and result_str != "non-detect":
-            try:
-                current_numeric_result = float(result_str)
-                if current_numeric_result > overall_max_result:
-                    overall_max_result = current_numeric_result
-                    overall_max_unit = obs_row.get("unit")
-                    overall_max_substance = obs_row.get("substance")
-                    overall_max_sample_id = obs_row.get("sampleIdentifier")
-                    overall_max_date = obs_row.get("date")
-            except ValueError:
-                pass
-
-    if overall_max_result != -1.0:
-        max_result_parts.append("<div style='padding-bottom: 5px;'>")
-        max_result_parts.append(
-            f"<b>{html_mod.escape(str(overall_max_substance))}</b>: "
-            f"{overall_max_result} {html_mod.escape(str(overall_max_unit))}"
-        )
-        if not _is_empty(overall_max_sample_id):
-            max_result_parts.append(
-                f" (from Sample ID: {html_mod.escape(str(overall_max_sample_id))} "
-                f"{str(overall_max_date)[0:4]})"
-            )
-        max_result_parts.append("<br/></div>")
-
-    sample_level_group_cols = ["sample", "sampleIdentifier", "date", "sampleType"]
-    available_sample_cols = [c for c in sample_level_group_cols if c in group.columns]
-
-    if available_sample_cols:
-        grouped = group.groupby(available_sample_cols, dropna=False, sort=False)
-    else:
-        grouped = [(None, group)]
-
-    for sample_key_tuple, sample_group_df in grouped:
-        if available_sample_cols and sample_key_tuple is not None:
-            if len(available_sample_cols) == 4:
-                sample_uri_link, sample_id, sample_date, sample_type = sample_key_tuple
-            else:
-                keys = dict(zip(available_sample_cols, sample_key_tuple if isinstance(sample_key_tuple, tuple) else (sample_key_tuple,)))
-                sample_uri_link = keys.get("sample")
-                sample_id = keys.get("sampleIdentifier")
-                sample_date = keys.get("date")
-                sample_type = keys.get("sampleType")
-        else:
-            sample_uri_link = sample_id = sample_date = sample_type = None
-
-        html_parts.append(
-            "<div style='margin-left: 15px; border-bottom: 1px solid #eee; "
-            "padding-top: 5px; padding-bottom: 5px;'>"
-        )
-        if not _is_empty(sample_uri_link):
-            uri_str = str(sample_uri_link)
-            short = uri_str.split("#")[-1] if "#" in uri_str else uri_str.rsplit("/", 1)[-1]
-            html_parts.append(
-                f"<b>Sample URI</b>: <a href='{uri_str}' target='_blank'>{html_mod.escape(short)}</a><br/>"
-            )
-        if not _is_empty(sample_id):
-            html_parts.append(f"<b>Sample ID</b>: {html_mod.escape(str(sample_id))}<br/>")
-        if not _is_empty(sample_date):
-            html_parts.append(f"<b>Date</b>: {html_mod.escape(str(sample_date))}<br/>")
-        if not _is_empty(sample_type):
-            html_parts.append(f"<b>Sample Type</b>: {html_mod.escape(str(sample_type))}<br/>")
-
-        html_parts.append(
-            "<table style='width:100%; border-collapse: collapse;'>"
-            "<thead><tr>"
-            "<th style='border: 1px solid #ddd; padding: 2px; text-align: left;'>Substance</th>"
-            "<th style='border: 1px solid #ddd; padding: 2px; text-align: left;'>Result</th>"
-            "</tr></thead><tbody>"
-        )
-        for _, obs_row in sample_group_df.iterrows():
-            result_val = obs_row.get("result")
-            substance_val = obs_row.get("substance")
-            unit_val = obs_row.get("unit")
-            if not _is_empty(result_val):
-                html_parts.append(
-                    f"<tr>"
-                    f"<td style='border: 1px solid #ddd; padding: 2px;'>{html_mod.escape(str(substance_val))}</td>"
-                    f"<td style='border: 1px solid #ddd; padding: 2px;'>{result_val} {html_mod.escape(str(unit_val))}</td>"
-                    f"</tr>"
-                )
-        html_parts.append("</tbody></table></div>")
-
-    return pd.Series({
-        "Max Result": "".join(max_result_parts),
-        "Samples": "".join(html_parts),
-        "overall_max_result": overall_max_result if overall_max_result != -1.0 else None,
-    })
+_SAMPLE_COLS = ["sample", "sampleIdentifier", "date", "sampleType"]
+
+_TD = "<td style='border: 1px solid #ddd; padding: 2px;'>"
+_TD_RIGHT = "<td style='border: 1px solid #ddd; padding: 2px; text-align: right;'>"
+
+_SAMPLE_TABLE_HEAD = (
+    "<table style='width:100%; border-collapse: collapse;'>"
+    "<thead><tr>"
+    "<th style='border: 1px solid #ddd; padding: 2px; text-align: left;'>Substance</th>"
+    "<th style='border: 1px solid #ddd; padding: 2px; text-align: left;'>Result</th>"
+    "</tr></thead><tbody>"
+)
+
+_LITE_TABLE_HEAD = (
+    "<table style='width:100%; border-collapse: collapse;'>"
+    "<thead><tr>"
+    "<th style='border: 1px solid #ddd; padding: 2px; text-align: left;'>Substance</th>"
+    "<th style='border: 1px solid #ddd; padding: 2px; text-align: right;'>Obs</th>"
+    "<th style='border: 1px solid #ddd; padding: 2px; text-align: right;'>Max (ng/L)</th>"
+    "</tr></thead><tbody>"
+)
+
+
+def _column(df: pd.DataFrame, name: str, default=None) -> pd.Series:
+    """Return ``df[name]``, or a constant column when it is missing."""
+    if name in df.columns:
+        return df[name]
+    return pd.Series([default] * len(df), index=df.index, dtype=object)
+
+
+def _empty_mask(values: pd.Series) -> pd.Series:
+    """True where a value is missing, blank or the string "nan"."""
+    text = values.astype(str)
+    return values.isna() | text.str.strip().eq("") | text.str.lower().eq("nan")
+
+
+def _escaped(values: pd.Series) -> pd.Series:
+    """HTML-escape ``str(value)`` for each entry, escaping each distinct value once."""
+    text = values.astype(str)
+    return text.map({v: html_mod.escape(v) for v in text.unique()})
+
+
+def _numeric_results(result: pd.Series, empty: pd.Series) -> pd.Series:
+    """Parse detected results as floats; empty, non-detect and unparseable values become NaN."""
+    return pd.to_numeric(result.where(~empty & result.ne("non-detect")), errors="coerce").astype("float64")
+
+
+def _prepare(df: pd.DataFrame, group_cols, column_map) -> tuple[pd.DataFrame, list[str]]:
+    """Apply ``column_map`` and return the frame with the group columns it has."""
+    work = df.rename(columns=column_map) if column_map else df
+    grp = group_cols or GROUP_COLS
+    return work.reset_index(drop=True), [c for c in grp if c in work.columns]
+
+
+def _max_rows(numeric: pd.Series, point_ids: pd.Series) -> pd.Series:
+    """Row position of the first maximum detected result per point id."""
+    detected = numeric[numeric > -1.0].sort_values(ascending=False, kind="stable")
+    best = detected.index[~point_ids.loc[detected.index].duplicated()]
+    return pd.Series(best, index=point_ids.loc[best].values)
 
 
 def aggregate_sample_popups(
@@ -163,80 +112,77 @@ def aggregate_sample_popups(
     if df.empty:
         return df
 
-    work = df.copy()
-    if column_map:
-        work = work.rename(columns=column_map)
-
-    grp = group_cols or GROUP_COLS
-    available_grp = [c for c in grp if c in work.columns]
+    work, available_grp = _prepare(df, group_cols, column_map)
     if not available_grp:
         return work
 
-    agg = (
-        work.groupby(available_grp, dropna=False, sort=False)
-        .apply(_group_to_html, include_groups=False)
-        .reset_index()
+    # Rows are numbered by sample point and by sample within it, in first-appearance
+    # order, so popup HTML is built column-wise and then joined per group
+    point_ids = work.groupby(available_grp, dropna=False, sort=False).ngroup()
+    sample_cols = [c for c in _SAMPLE_COLS if c in work.columns]
+    sample_ids = (
+        work.groupby(available_grp + sample_cols, dropna=False, sort=False).ngroup()
+        if sample_cols else point_ids
     )
-    return agg
-
 
-def _group_to_lite(group: pd.DataFrame) -> pd.Series:
-    """Lightweight aggregation with per-substance breakdown.
-
-    Produces a compact HTML table showing each detected substance with its
-    observation count and max concentration, plus an overall summary.
-    """
-    substance_stats: dict[str, dict] = {}
-    total_obs = len(group)
-    overall_max_val = -1.0
-    overall_max_substance = None
-
-    for _, row in group.iterrows():
-        r = row.get("result")
-        substance = str(row.get("substance", "Unknown"))
-        if _is_empty(r) or r == "non-detect":
-            substance_stats.setdefault(substance, {"count": 0, "max": 0.0})
-            substance_stats[substance]["count"] += 1
-            continue
-        try:
-            v = float(r)
-        except ValueError:
-            continue
-        stats = substance_stats.setdefault(substance, {"count": 0, "max": 0.0})
-        stats["count"] += 1
-        if v > stats["max"]:
-            stats["max"] = v
-        if v > overall_max_val:
-            overall_max_val = v
-            overall_max_substance = substance
-
-    # Build compact HTML table for per-substance breakdown
-    html_parts: list[str] = []
-    html_parts.append(
-        "<table style='width:100%; border-collapse: collapse;'>"
-        "<thead><tr>"
-        "<th style='border: 1px solid #ddd; padding: 2px; text-align: left;'>Substance</th>"
-        "<th style='border: 1px solid #ddd; padding: 2px; text-align: right;'>Obs</th>"
-        "<th style='border: 1px solid #ddd; padding: 2px; text-align: right;'>Max (ng/L)</th>"
-        "</tr></thead><tbody>"
+    result = _column(work, "result")
+    empty = _empty_mask(result)
+    substance = _escaped(_column(work, "substance"))
+    unit = _escaped(_column(work, "unit"))
+
+    row_html = (
+        "<tr>" + _TD + substance + "</td>"
+        + _TD + result.astype(str) + " " + unit + "</td></tr>"
+    ).where(~empty, "")
+    rows_by_sample = row_html.groupby(sample_ids, sort=True).agg("".join)
+
+    first_of_sample = ~sample_ids.duplicated()
+    samples = work.loc[first_of_sample]
+    uri = _column(samples, "sample")
+    uri_text = uri.astype(str)
+    short_uri = uri_text.str.split("#").str[-1].where(
+        uri_text.str.contains("#", regex=False), uri_text.str.rsplit("/", n=1).str[-1]
+    )
+    sample_id = _column(samples, "sampleIdentifier")
+    sample_date = _column(samples, "date")
+    sample_type = _column(samples, "sampleType")
+    section_html = (
+        "<div style='margin-left: 15px; border-bottom: 1px solid #eee; "
+        "padding-top: 5px; padding-bottom: 5px;'>"
+        + ("<b>Sample URI</b>: <a href='" + uri_text + "' target='_blank'>"
+           + _escaped(short_uri) + "</a><br/>").where(~_empty_mask(uri), "")
+        + ("<b>Sample ID</b>: " + _escaped(sample_id) + "<br/>").where(~_empty_mask(sample_id), "")
+        + ("<b>Date</b>: " + _escaped(sample_date) + "<br/>").where(~_empty_mask(sample_date), "")
+        + ("<b>Sample Type</b>: " + _escaped(sample_type) + "<br/>").where(~_empty_mask(sample_type), "")
+        + _SAMPLE_TABLE_HEAD
+        + rows_by_sample.loc[sample_ids[first_of_sample]].values
+        + "</tbody></table></div>"
     )
-    for subst, stats in sorted(substance_stats.items(), key=lambda x: x[1]["max"], reverse=True):
-        html_parts.append(
-            f"<tr>"
-            f"<td style='border: 1px solid #ddd; padding: 2px;'>{html_mod.escape(subst)}</td>"
-            f"<td style='border: 1px solid #ddd; padding: 2px; text-align: right;'>{stats['count']}</td>"
-            f"<td style='border: 1px solid #ddd; padding: 2px; text-align: right;'>{stats['max']:.2f}</td>"
-            f"</tr>"
+    samples_html = section_html.groupby(point_ids[first_of_sample].values, sort=True).agg("".join)
+
+    numeric = _numeric_results(result, empty)
+    best = _max_rows(numeric, point_ids)
+    # No detected result anywhere (e.g. all non-detects): every Max Result stays empty
+    max_html = pd.Series(dtype=object)
+    if not best.empty:
+        best_rows = work.loc[best.values]
+        best_id = _column(best_rows, "sampleIdentifier")
+        max_html = pd.Series(
+            (
+                "<div style='padding-bottom: 5px;'><b>" + substance.loc[best.values] + "</b>: "
+                + numeric.loc[best.values].astype(str) + " " + unit.loc[best.values]
+                + (" (from Sample ID: " + _escaped(best_id) + " "
+                   + _column(best_rows, "date").astype(str).str[0:4] + ")").where(~_empty_mask(best_id), "")
+                + "<br/></div>"
+            ).values,
+            index=best.index,
         )
-    html_parts.append("</tbody></table>")
 
-    return pd.Series({
-        "Max Substance": overall_max_substance if overall_max_val != -1.0 else None,
-        "Max Result (ng/L)": round(overall_max_val, 2) if overall_max_val != -1.0 else None,
-        "Observations": total_obs,
-        "Substance Summary": "".join(html_parts),
-        "overall_max_result": overall_max_val if overall_max_val != -1.0 else None,
-    })
+    agg = work.loc[~point_ids.duplicated(), available_grp].reset_index(drop=True)
+    agg["Max Result"] = max_html.reindex(agg.index, fill_value="").values
+    agg["Samples"] = samples_html.values
+    agg["overall_max_result"] = numeric.loc[best.values].set_axis(best.index).reindex(agg.index).values
+    return agg
 
 
 def aggregate_sample_popups_lite(
@@ -251,15 +197,74 @@ def aggregate_sample_popups_lite(
     """
     if df.empty:
         return df
-    work = df.copy()
-    if column_map:
-        work = work.rename(columns=column_map)
-    grp = group_cols or GROUP_COLS
-    available_grp = [c for c in grp if c in work.columns]
+    work, available_grp = _prepare(df, group_cols, column_map)
     if not available_grp:
         return work
-    return (
-        work.groupby(available_grp, dropna=False, sort=False)
-        .apply(_group_to_lite, include_groups=False)
+
+    point_ids = work.groupby(available_grp, dropna=False, sort=False).ngroup()
+    result = _column(work, "result")
+    empty_or_nd = _empty_mask(result) | result.eq("non-detect")
+    numeric = _numeric_results(result, _empty_mask(result))
+    substance = _column(work, "substance", "Unknown").astype(str)
+
+    # Non-detects count as observations of their substance; unparseable results are skipped
+    counted = empty_or_nd | numeric.notna()
+    stats = (
+        pd.DataFrame({
+            "point": point_ids[counted],
+            "substance": substance[counted],
+            "value": numeric[counted].clip(lower=0.0).fillna(0.0),
+        })
+        .groupby(["point", "substance"], sort=False)
+        .agg(count=("value", "size"), max=("value", "max"))
         .reset_index()
+        .sort_values("max", ascending=False, kind="stable")
+        .sort_values("point", kind="stable")
+    )
+    n_points = int(point_ids.max()) + 1
+    # No countable result anywhere (e.g. all "<0.5"): every summary table is left empty
+    rows_by_point = pd.Series("", index=range(n_points), dtype=object)
+    if not stats.empty:
+        stats_html = (
+            "<tr>" + _TD + _escaped(stats["substance"]) + "</td>"
+            + _TD_RIGHT + stats["count"].astype(str) + "</td>"
+            + _TD_RIGHT + stats["max"].map("{:.2f}".format) + "</td></tr>"
+        )
+        rows_by_point = stats_html.groupby(stats["point"].values).agg("".join).reindex(range(n_points), fill_value="")
+
+    best = _max_rows(numeric, point_ids)
+    overall_max = numeric.loc[best.values].set_axis(best.index).reindex(range(n_points))
+
+    agg = work.loc[~point_ids.duplicated(), available_grp].reset_index(drop=True)
+    max_substance = substance.loc[best.values].set_axis(best.index).reindex(agg.index)
+    agg["Max Substance"] = max_substance.astype(object).where(max_substance.notna(), None).values
+    agg["Max Result (ng/L)"] = overall_max.map(lambda v: round(v, 2), na_action="ignore").values
+    agg["Observations"] = point_ids.value_counts().sort_index().values
+    agg["Substance Summary"] = (_LITE_TABLE_HEAD + rows_by_point + "</tbody></table>").values
+    agg["overall_max_result"] = overall_max.values
+    return agg
+
+
+def compact_sample_results(
+    samples_df: pd.DataFrame,
+    samples_agg_df: pd.DataFrame,
+    *other_dfs: pd.DataFrame,
+) -> tuple[pd.DataFrame, ...]:
+    """Shrink an analysis's result frames before they are kept in session state.
+
+    Call once the popups are built. From then on the raw observations and the
+    other result frames are only tabled, mapped and downloaded, so they move to
+    Arrow-backed dtypes, whose strings take a fraction of the memory of object
+    columns. The per-point maximum is only compared and formatted, so it is
+    stored as float32. Returns ``(samples_df, samples_agg_df, *other_dfs)``;
+    empty frames are passed through.
+    """
+    if not samples_agg_df.empty and "overall_max_result" in samples_agg_df.columns:
+        samples_agg_df = samples_agg_df.assign(
+            overall_max_result=samples_agg_df["overall_max_result"].astype("float32")
+        )
+    arrow_dfs = tuple(
+        df if df.empty else df.convert_dtypes(dtype_backend="pyarrow")
+        for df in (samples_df, *other_dfs)
     )
+    return (arrow_dfs[0], samples_agg_df, *arrow_dfs[1:])
@@ -11,7 +11,9 @@ from core.sparql import (
     convertToDataframe,
     execute_sparql_query,
     get_sparql_wrapper,
+    parse_sparql_csv,
     parse_sparql_results,
+    post_sparql_csv_with_debug,
     post_sparql_with_debug,
     region_pattern_sparql,
     sparql_values_uri,
@@ -38,7 +40,9 @@ __all__ = [
     "convertToDataframe",
     "execute_sparql_query",
     "get_sparql_wrapper",
+    "parse_sparql_csv",
     "parse_sparql_results",
+    "post_sparql_csv_with_debug",
     "post_sparql_with_debug",
     "region_pattern_sparql",
     "sparql_values_uri",
@@ -7,7 +7,7 @@ from __future__ import annotations
 from typing import Optional, Dict, Any
 import pandas as pd
 
-from filters.region import get_region_boundary
+from filters.region import get_cached_region_boundary
 
 
 def fetch_boundaries(
@@ -28,10 +28,10 @@ def fetch_boundaries(
         - 'region': The most specific boundary (county if available, else state)
     """
     state_boundary_df = (
-        get_region_boundary(state_code) if state_code else None
+        get_cached_region_boundary(state_code) if state_code else None
     )
     county_boundary_df = (
-        get_region_boundary(county_code) if county_code else None
+        get_cached_region_boundary(county_code) if county_code else None
     )
 
     # Use county boundary if available and not empty, otherwise fall back to state
@@ -5,6 +5,9 @@ Handles static CSV data and cached availability queries.
 from __future__ import annotations
 
 import os
+from types import MappingProxyType
+from typing import Mapping
+
 import streamlit as st
 import pandas as pd
 
@@ -43,9 +46,12 @@ def load_material_types_data() -> pd.DataFrame:
     return df
 
 
-@st.cache_data
-def load_naics_dict() -> dict[str, str]:
-    """Load NAICS 2022 code → title from data/naics_2022.csv."""
+@st.cache_resource
+def load_naics_dict() -> Mapping[str, str]:
+    """Load NAICS 2022 code → title from data/naics_2022.csv.
+
+    Shared read-only across reruns and sessions, so it is never re-copied.
+    """
     csv_path = os.path.join(PROJECT_DIR, "data", "naics_2022.csv")
     df = pd.read_csv(csv_path, skiprows=1)
     code_col = "2022 NAICS Code"
@@ -59,7 +65,7 @@ def load_naics_dict() -> dict[str, str]:
         title = out.pop("31-33")
         for sector in ("31", "32", "33"):
             out[sector] = title
-    return out
+    return MappingProxyType(out)
 
 
 def omit_alaska_regions(
@@ -118,11 +124,11 @@ def parse_regions(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, pd.Data
         counties['county_name'] = counties['label'].str.replace('Geometry of ', '', regex=False)
         # Extract state name (everything after the last comma)
         counties['state_name_county'] = counties['label'].str.split(', ').str[-1]
-        # Get state code (first 2 digits of FIPS)
+        # Get county code (5-digit FIPS) and state code (its first 2 digits)
         # IMPORTANT: Must zfill(5) BEFORE slicing to handle leading zeros (e.g., 1001 -> 01001 -> 01)
-        counties['state_code'] = counties['fipsCode'].astype(str).str.zfill(5).str[:2]
-        # Get county code (5-digit FIPS)
-        counties['county_code'] = counties['fipsCode'].astype(str).str.zfill(5)
+        county_codes = counties['fipsCode'].astype(str).str.zfill(5)
+        counties['state_code'] = county_codes.str[:2]
+        counties['county_code'] = county_codes
         # Remove duplicate counties (keep first occurrence based on county_code)
         counties = counties.drop_duplicates(subset=['county_code'], keep='first')
 
@@ -133,16 +139,17 @@ def parse_regions(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, pd.Data
     # Parse county information from subdivision labels
     # Pattern: "Geometry of [Subdivision], [County], [State]"
     if not subdivisions.empty:
-        # Extract subdivision, county, and state from label
-        subdivisions['subdivision_name'] = subdivisions['label'].str.replace('Geometry of ', '', regex=False).str.split(', ').str[0]
-        subdivisions['county_name'] = subdivisions['label'].str.split(', ').str[-2]
-        subdivisions['state_name_sub'] = subdivisions['label'].str.split(', ').str[-1]
+        # Extract subdivision, county, and state from one split of the label
+        label_parts = subdivisions['label'].str.split(', ')
+        subdivisions['subdivision_name'] = label_parts.str[0].str.replace('Geometry of ', '', regex=False)
+        subdivisions['county_name'] = label_parts.str[-2]
+        subdivisions['state_name_sub'] = label_parts.str[-1]
 
-        # Get state code (first 2 digits of FIPS)
+        # Get state code (first 2 digits of FIPS) and county code (first 5 digits)
         # IMPORTANT: Must zfill(10) BEFORE slicing to handle leading zeros
-        subdivisions['state_code'] = subdivisions['fipsCode'].astype(str).str.zfill(10).str[:2]
-        # Get county code (first 5 digits of FIPS)
-        subdivisions['county_code'] = subdivisions['fipsCode'].astype(str).str.zfill(10).str[:5]
+        padded_fips = subdivisions['fipsCode'].astype(str).str.zfill(10)
+        subdivisions['state_code'] = padded_fips.str[:2]
+        subdivisions['county_code'] = padded_fips.str[:5]
 
     states, counties, subdivisions = omit_alaska_regions(states, counties, subdivisions)
     return states, counties, subdivisions
@@ -157,12 +164,12 @@ def build_substance_options(substances_df: pd.DataFrame) -> tuple[list, dict]:
     if substances_df.empty:
         return ["-- All Substances --"], {}
 
-    display_map = {}
-    for _, row in substances_df.iterrows():
-        display_name = row["display_name"]
-        uri = row["substance"]
-        if display_name not in display_map or uri.endswith("_A"):
-            display_map[display_name] = uri
+    # Prefer the "_A" variant of a substance URI when several share a display name
+    preferred = substances_df.assign(
+        _is_a=substances_df["substance"].str.endswith("_A")
+    ).sort_values("_is_a", ascending=False, kind="stable")
+    preferred = preferred.drop_duplicates(subset="display_name")
+    display_map = dict(zip(preferred["display_name"], preferred["substance"]))
 
     options = ["-- All Substances --"] + sorted(display_map.keys())
     return options, display_map
@@ -173,11 +180,8 @@ def build_material_type_options(material_types_df: pd.DataFrame) -> tuple[list,
     if material_types_df.empty:
         return ["-- All Material Types --"], {}
 
-    display_map = {}
-    for _, row in material_types_df.iterrows():
-        display_name = row["display_name"]
-        uri = row["matType"]
-        display_map.setdefault(display_name, uri)
+    first = material_types_df.drop_duplicates(subset="display_name")
+    display_map = dict(zip(first["display_name"], first["matType"]))
 
     options = ["-- All Material Types --"] + sorted(display_map.keys())
     return options, display_map
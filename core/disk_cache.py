@@ -0,0 +1,74 @@
+"""
+On-disk DataFrame cache for slow-changing SPARQL lookups.
+
+Second-level cache behind ``st.cache_data``: entries are Parquet files that
+survive process restarts, so a cold start reads a local file instead of
+re-running the lookup query.
+"""
+from __future__ import annotations
+
+from hashlib import blake2b
+from pathlib import Path
+from typing import Callable, Optional
+import os
+import time
+
+import pandas as pd
+
+
+_DEFAULT_CACHE_DIRNAME = "cache"
+DEFAULT_MAX_AGE_SECONDS = 24 * 3600
+
+
+def get_disk_cache_dir() -> Path:
+    """Return the directory that holds cached Parquet files."""
+    override = os.getenv("SAWGRAPH_DISK_CACHE_DIR", "").strip()
+    if override:
+        return Path(override).expanduser().resolve()
+    return (Path(__file__).resolve().parents[1] / "data" / _DEFAULT_CACHE_DIRNAME).resolve()
+
+
+def _cache_path(key: str) -> Path:
+    digest = blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+    return get_disk_cache_dir() / f"{digest}.parquet"
+
+
+def read_cached_frame(key: str, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS) -> Optional[pd.DataFrame]:
+    """Return the cached DataFrame for ``key``, or None if missing, stale or unreadable."""
+    path = _cache_path(key)
+    try:
+        if time.time() - path.stat().st_mtime > max_age_seconds:
+            return None
+        return pd.read_parquet(path)
+    except Exception:
+        return None
+
+
+def write_cached_frame(key: str, df: pd.DataFrame) -> None:
+    """Store ``df`` under ``key``. Failures are ignored; the cache is best effort."""
+    path = _cache_path(key)
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+
+
+def cached_frame(
+    key: str,
+    compute: Callable[[], pd.DataFrame],
+    max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+) -> pd.DataFrame:
+    """Return the disk-cached frame for ``key``, computing and storing it on a miss.
+
+    Empty results are not persisted, since they usually mean the query failed.
+    """
+    df = read_cached_frame(key, max_age_seconds)
+    if df is not None:
+        return df
+    df = compute()
+    if df is not None and not df.empty:
+        write_cached_frame(key, df)
+    return df
@@ -5,9 +5,11 @@ Consolidates repeated geometry parsing logic across analyses.
 from __future__ import annotations
 
 from typing import Optional, List
+import numpy as np
 import pandas as pd
 import geopandas as gpd
-from shapely import wkt
+import shapely
+from shapely import from_wkt
 
 
 def create_geodataframe(
@@ -24,7 +26,9 @@ def create_geodataframe(
         crs: Coordinate reference system (default: EPSG:4326)
 
     Returns:
-        GeoDataFrame with parsed geometries, or None if parsing fails or no valid geometries
+        GeoDataFrame with parsed geometries (the WKT column is replaced by
+        ``geometry``; rows with malformed WKT are dropped), or None if no
+        geometries could be parsed
     """
     if df is None or df.empty:
         return None
@@ -32,19 +36,46 @@ def create_geodataframe(
     if wkt_column not in df.columns:
         return None
 
-    # Filter to rows with valid WKT
-    with_wkt = df[df[wkt_column].notna()].copy()
-    if with_wkt.empty:
+    wkt_values = df[wkt_column].to_numpy()
+    present = pd.notna(wkt_values)
+    if not present.any():
         return None
 
     try:
-        with_wkt['geometry'] = with_wkt[wkt_column].apply(wkt.loads)
-        gdf = gpd.GeoDataFrame(with_wkt, geometry='geometry')
-        gdf.set_crs(crs, inplace=True, allow_override=True)
-        return gdf
+        geoms = np.full(len(df), None, dtype=object)
+        geoms[present] = from_wkt(wkt_values[present], on_invalid="ignore")
     except Exception:
         return None
 
+    # Select the kept rows once; missing or malformed WKT rows are dropped
+    parsed = ~shapely.is_missing(geoms)
+    if not parsed.any():
+        return None
+    columns = df.columns.drop(wkt_column)
+    frame = df[columns] if parsed.all() else df.loc[parsed, columns]
+    return gpd.GeoDataFrame(frame, geometry=geoms[parsed], crs=crs)
+
+
+def get_map_bounds(
+    gdf_list: List[Optional[gpd.GeoDataFrame]],
+) -> Optional[tuple]:
+    """
+    Get the bounding box of the first non-empty GeoDataFrame in a list.
+
+    Args:
+        gdf_list: List of GeoDataFrames to check (in priority order)
+
+    Returns:
+        ((south, west), (north, east)) in Leaflet order, or None if no valid geometries
+    """
+    for gdf in gdf_list:
+        if gdf is not None and not gdf.empty:
+            minx, miny, maxx, maxy = gdf.total_bounds
+            if np.isfinite([minx, miny, maxx, maxy]).all():
+                return ((miny, minx), (maxy, maxx))
+
+    return None
+
 
 def get_map_center(
     gdf_list: List[Optional[gpd.GeoDataFrame]],
@@ -52,7 +83,7 @@ def get_map_center(
 ) -> tuple:
     """
     Calculate the center point for a map from a list of GeoDataFrames.
-    Uses the first non-empty GeoDataFrame's centroid.
+    Uses the center of the first non-empty GeoDataFrame's bounding box.
 
     Args:
         gdf_list: List of GeoDataFrames to check (in priority order)
@@ -61,36 +92,132 @@ def get_map_center(
     Returns:
         Tuple of (latitude, longitude)
     """
-    for gdf in gdf_list:
-        if gdf is not None and not gdf.empty:
-            try:
-                centroids = gdf.geometry.centroid
-                center_lat = centroids.y.mean()
-                center_lon = centroids.x.mean()
-                if pd.notna(center_lat) and pd.notna(center_lon):
-                    return (center_lat, center_lon)
-            except Exception:
-                continue
+    return get_bounds_center(get_map_bounds(gdf_list), default_center)
 
-    return default_center
+
+def get_bounds_center(bounds: Optional[tuple], default_center: tuple = (39.8, -98.5)) -> tuple:
+    """Return the (lat, lon) center of bounds from get_map_bounds, or default_center if None."""
+    if bounds is None:
+        return default_center
+
+    (south, west), (north, east) = bounds
+    return ((south + north) / 2, (west + east) / 2)
 
 
 def simplify_geometries(
     gdf: gpd.GeoDataFrame,
     tolerance: float = 0.001,
+    preserve_topology: bool = True,
 ) -> gpd.GeoDataFrame:
     """Simplify geometries to reduce data size for map rendering.
 
     Uses Douglas-Peucker simplification. A tolerance of 0.001 degrees
     (~100 m) works well for state-level maps without visible loss.
+    Line-only layers such as flowlines should use compact_line_geometries,
+    which runs the cheaper plain Douglas-Peucker pass; keep the default
+    ``preserve_topology`` for polygons, which that pass could make invalid.
     """
     if gdf is None or gdf.empty:
         return gdf
     result = gdf.copy()
-    result["geometry"] = result.geometry.simplify(tolerance, preserve_topology=True)
+    result["geometry"] = result.geometry.simplify(tolerance, preserve_topology=preserve_topology)
     return result
 
 
+def compact_line_geometries(
+    gdf: gpd.GeoDataFrame,
+    max_coordinates: int = 50_000,
+    grid_size: float = 1e-5,
+) -> gpd.GeoDataFrame:
+    """Simplify a line layer and bound its GeoJSON payload.
+
+    Applies a plain Douglas-Peucker pass at 0.001 degrees (~100 m), then
+    re-simplifies with a doubling tolerance (up to 0.064 degrees) until the
+    layer has at most ``max_coordinates`` vertices, and finally snaps
+    coordinates to ``grid_size`` degrees (1e-5 is ~1 m) so each serializes
+    with five decimals instead of full float precision. The frame is copied
+    once, at the end.
+    """
+    if gdf is None or gdf.empty:
+        return gdf
+
+    tolerance = 0.001
+    geoms = shapely.simplify(gdf.geometry.values, tolerance, preserve_topology=False)
+    while shapely.get_num_coordinates(geoms).sum() > max_coordinates and tolerance < 0.064:
+        tolerance *= 2
+        geoms = shapely.simplify(geoms, tolerance, preserve_topology=False)
+
+    result = gdf.copy()
+    result["geometry"] = shapely.set_precision(geoms, grid_size)
+    return result
+
+
+_EARTH_RADIUS_M = 6378137.0
+
+
+def _web_mercator_xy(gdf: gpd.GeoDataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Web Mercator x/y arrays for a point layer.
+
+    Lon/lat points are projected with the closed-form spherical Mercator formula
+    on the coordinate arrays, skipping pyproj and the rebuilt GeoSeries. Other
+    CRSs are reprojected, and their coordinates are read straight from the
+    geometry array rather than through the per-call type checks of
+    ``GeoSeries.x``/``.y``.
+    """
+    if gdf.crs is None or gdf.crs.to_epsg() != 4326:
+        projected = gdf.geometry.to_crs(epsg=3857).values
+        return shapely.get_x(projected), shapely.get_y(projected)
+    lon = np.radians(shapely.get_x(gdf.geometry.values))
+    lat = np.radians(shapely.get_y(gdf.geometry.values))
+    return lon * _EARTH_RADIUS_M, np.log(np.tan(np.pi / 4 + lat / 2)) * _EARTH_RADIUS_M
+
+
+def thin_points(
+    gdf: gpd.GeoDataFrame,
+    max_points: int = 2000,
+    value_column: Optional[str] = None,
+) -> gpd.GeoDataFrame:
+    """Thin a point layer to at most ``max_points`` rows for map rendering.
+
+    Points are binned into a square Web Mercator grid whose cell size grows
+    until no more than ``max_points`` cells are occupied; one point is kept
+    per cell. When ``value_column`` is given, the point with the highest
+    numeric value in each cell is kept so hotspots stay visible.
+
+    Args:
+        gdf: GeoDataFrame with point geometries
+        max_points: Maximum number of points to keep
+        value_column: Optional numeric column used to pick each cell's point
+
+    Returns:
+        The input unchanged if it is already small enough, else a thinned copy
+    """
+    if gdf is None or len(gdf) <= max_points:
+        return gdf
+
+    x, y = _web_mercator_xy(gdf)
+
+    if value_column and value_column in gdf.columns:
+        values = pd.to_numeric(gdf[value_column], errors="coerce").fillna(-np.inf).to_numpy()
+        order = np.argsort(-values, kind="stable")
+    else:
+        order = np.arange(len(gdf))
+
+    extent = max(np.nanmax(x) - np.nanmin(x), np.nanmax(y) - np.nanmin(y))
+    if not extent > 0:
+        return gdf.iloc[order[:1]]
+
+    cell_size = extent / np.sqrt(max_points)
+    while True:
+        cells = pd.DataFrame({"cx": np.floor(x / cell_size), "cy": np.floor(y / cell_size)})
+        keep = ~cells.iloc[order].duplicated().to_numpy()
+        if keep.sum() <= max_points:
+            break
+        cell_size *= 1.25
+
+    return gdf.iloc[np.sort(order[keep])]
+
+
 def convert_to_centroids(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     """
     Convert all geometries in a GeoDataFrame to their centroids.
@@ -105,6 +232,10 @@ def convert_to_centroids(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     if gdf is None or gdf.empty:
         return gdf
 
+    # Point layers are already their own centroids
+    if (shapely.get_type_id(gdf.geometry.values) == 0).all():
+        return gdf
+
     result = gdf.copy()
     result['geometry'] = result.geometry.centroid
     return result
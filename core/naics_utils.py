@@ -94,18 +94,35 @@ def build_naics_values_and_hierarchy(code: str) -> Tuple[str, str]:
     )
 
 
-def build_simple_naics_values(code: str) -> str:
+def build_industry_filter(
+    naics_code: str | List[str] | set[str] | tuple[str, ...] | None,
+) -> Tuple[str, str]:
     """
-    Simplified helper for cases that only distinguish:
-      - full industry code (>4 digits) -> ?industryCode
-      - group/sector (<=4 digits)      -> ?industryGroup
+    Build the NAICS VALUES clause and hierarchy for an industry selection.
+
+    Supports all NAICS levels:
+      - 2 digits (sector): builds full hierarchy chain
+      - 3 digits (subsector): builds hierarchy to subsector
+      - 4 digits (group): binds ?industryGroup directly
+      - 5-6 digits (industry): binds ?industryCode directly
 
-    This mirrors the downstream `_build_industry_filter` behavior.
+    Returns:
+        (industry_values, industry_hierarchy); both empty when nothing is selected.
     """
-    c = str(code).strip()
-    if not c:
-        return ""
-    if len(c) > 4:
-        return f"VALUES ?industryCode {{naics:NAICS-{c}}}."
-    return f"VALUES ?industryGroup {{naics:NAICS-{c}}}."
+    codes = normalize_naics_codes(naics_code)
+    if not codes:
+        return "", ""
+    return build_naics_values_and_hierarchy(codes[0])
+
 
+def industry_code_is_bound(
+    naics_code: str | List[str] | set[str] | tuple[str, ...] | None,
+) -> bool:
+    """
+    True when the selection is a 6-digit national industry, whose VALUES clause
+    binds the facility's ?industryCode itself, so no ?industryGroup /
+    fio:subcodeOf join is needed. 5-digit selections keep the join, which also
+    checks ?industryCode is a NAICS industry code.
+    """
+    codes = normalize_naics_codes(naics_code)
+    return bool(codes) and len(str(codes[0]).strip()) >= 6
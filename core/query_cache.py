@@ -0,0 +1,64 @@
+"""
+In-memory result cache for SPARQL query functions.
+
+Wraps any query function that returns ``(df, error, debug_info)`` in
+``st.cache_data``, keyed on the function and its scalar arguments. Failed
+queries are never cached, and cache hits are marked in the debug info so
+runtime telemetry does not record the original duration twice.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional, Tuple
+import threading
+
+import pandas as pd
+import streamlit as st
+
+
+QueryResult = Tuple[pd.DataFrame, Optional[str], Dict[str, Any]]
+
+_cache_miss = threading.local()
+
+
+class _QueryError(Exception):
+    """Raised inside the cached call so failed queries are never cached."""
+
+    def __init__(self, result: QueryResult):
+        super().__init__(result[1])
+        self.result = result
+
+
+@st.cache_data(ttl=900, max_entries=64, show_spinner=False)
+def _cached_query(
+    _query_fn: Callable[..., QueryResult],
+    query_name: str,
+    **params: Any,
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    df, error, debug_info = _query_fn(**params)
+    if error:
+        raise _QueryError((df, error, debug_info))
+    _cache_miss.flag = True
+    return df, debug_info
+
+
+def execute_cached_query(query_fn: Callable[..., QueryResult], **params: Any) -> QueryResult:
+    """Run ``query_fn(**params)`` through st.cache_data.
+
+    Repeat runs with the same parameters are served from memory for 15 minutes. On a
+    cache hit the debug info reports ``cache_hit`` and zero elapsed time.
+    """
+    _cache_miss.flag = False
+    try:
+        df, debug_info = _cached_query(
+            query_fn, f"{query_fn.__module__}.{query_fn.__qualname__}", **params,
+        )
+    except _QueryError as exc:
+        return exc.result
+    if not _cache_miss.flag:
+        debug_info = {**debug_info, "elapsed_ms": 0.0, "cache_hit": True}
+    return df, None, debug_info
+
+
+def clear_query_cache() -> None:
+    """Drop every cached query result."""
+    _cached_query.clear()
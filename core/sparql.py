@@ -5,15 +5,28 @@ This is the single source of truth for SPARQL utilities.
 """
 from __future__ import annotations
 
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 from datetime import datetime, timezone
+from urllib.parse import urlencode
+import gzip
+import io
+import json
+import os
 import time
 import pandas as pd
 import rdflib
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from SPARQLWrapper import SPARQLWrapper2, JSON, POST, DIGEST
 
+# orjson decodes large result sets noticeably faster; both accept the raw body bytes
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 
 # =============================================================================
 # SPARQL ENDPOINT URLS - Single source of truth
@@ -27,10 +40,38 @@ ENDPOINT_URLS = {
     'federation': "https://frink.apps.renci.org/federation/sparql"
 }
 
+# Point federated queries at a caching federation proxy (FedX etc.) without code changes
+_federation_override = os.getenv("SAWGRAPH_FEDERATION_URL", "").strip()
+if _federation_override:
+    ENDPOINT_URLS['federation'] = _federation_override
+
 # Alias for backward compatibility
 ENDPOINTS = ENDPOINT_URLS
 
 
+def _build_http_session() -> requests.Session:
+    """Create the shared HTTP session; all endpoints live on one host, so keep-alive pays off."""
+    session = requests.Session()
+    # SPARQL queries are read-only, so POSTs are safe to retry on gateway errors;
+    # read timeouts are not retried, and the last error response is returned as-is
+    retry = Retry(
+        total=2,
+        read=0,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared by all SPARQL requests (urllib3's connection pool is thread-safe)
+_HTTP_SESSION = _build_http_session()
+
+
 # =============================================================================
 # SPARQL WRAPPER FUNCTIONS
 # =============================================================================
@@ -359,23 +400,41 @@ def build_facility_values(facility_uris: Optional[list[str]]) -> str:
 # QUERY EXECUTION FUNCTIONS
 # =============================================================================
 
-def post_sparql_with_debug(
-    endpoint_key: str,
-    query: str,
-    timeout: Optional[int] = None,
-) -> tuple[Optional[dict], Optional[str], dict]:
-    """
-    POST a SPARQL query to a known endpoint and return (json, error, debug_info).
+_SPARQL_JSON = "application/sparql-results+json"
+_SPARQL_CSV = "text/csv"
 
-    Args:
-        endpoint_key: Key from ENDPOINT_URLS (e.g. 'federation').
-        query: SPARQL query string.
-        timeout: Request timeout in seconds.
+# Large queries (VALUES batches, long PREFIX headers) are sent gzip-compressed
+_GZIP_MIN_QUERY_CHARS = 1024
+_GZIP_UNSUPPORTED: set[str] = set()
 
-    Returns:
-        (json_response, error_message, debug_dict). debug_dict has endpoint, query,
-        response_status, and optionally exception.
+
+def parse_sparql_csv(content: bytes) -> pd.DataFrame:
     """
+    Convert a SPARQL CSV result body to a DataFrame of strings.
+
+    CSV results carry no term types, so only use them for queries whose columns
+    are plain URIs or literals. Unbound values become NaN.
+    """
+    try:
+        return pd.read_csv(io.BytesIO(content), dtype=str, keep_default_na=False, na_values=[""])
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame()
+
+
+def _decode_csv_response(response: requests.Response) -> pd.DataFrame:
+    # Endpoints that ignore the Accept header answer with JSON
+    if "json" in response.headers.get("Content-Type", ""):
+        return parse_sparql_results(_json_loads(response.content))
+    return parse_sparql_csv(response.content)
+
+
+def _post_sparql(
+    endpoint_key: str,
+    query: str,
+    timeout: Optional[int],
+    accept: str,
+    decode: Callable[[requests.Response], Any],
+) -> tuple[Any, Optional[str], dict]:
     started_perf = time.perf_counter()
     started_at_utc = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
@@ -392,7 +451,7 @@ def post_sparql_with_debug(
         }
     endpoint = ENDPOINT_URLS[endpoint_key]
     headers = {
-        "Accept": "application/sparql-results+json",
+        "Accept": accept,
         "Content-Type": "application/x-www-form-urlencoded",
     }
     debug: dict[str, Any] = {
@@ -402,9 +461,27 @@ def post_sparql_with_debug(
         "started_at_utc": started_at_utc,
     }
     try:
-        response = requests.post(
-            endpoint, data={"query": query}, headers=headers, timeout=timeout
-        )
+        if len(query) > _GZIP_MIN_QUERY_CHARS and endpoint not in _GZIP_UNSUPPORTED:
+            response = _HTTP_SESSION.post(
+                endpoint,
+                data=gzip.compress(urlencode({"query": query}).encode("utf-8")),
+                headers={**headers, "Content-Encoding": "gzip"},
+                timeout=timeout,
+            )
+            if response.status_code in (400, 415):
+                # Some endpoints answer an unreadable compressed body with a plain 400,
+                # which is also their answer to a bad query; only stop compressing for
+                # the endpoint on a 415 or when the uncompressed retry succeeds
+                plain_response = _HTTP_SESSION.post(
+                    endpoint, data={"query": query}, headers=headers, timeout=timeout
+                )
+                if response.status_code == 415 or plain_response.status_code == 200:
+                    _GZIP_UNSUPPORTED.add(endpoint)
+                response = plain_response
+        else:
+            response = _HTTP_SESSION.post(
+                endpoint, data={"query": query}, headers=headers, timeout=timeout
+            )
         debug["elapsed_ms"] = _elapsed_ms()
         debug["response_status"] = response.status_code
         if response.status_code != 200:
@@ -413,7 +490,7 @@ def post_sparql_with_debug(
                 f"Error {response.status_code}: {response.text[:500]}",
                 debug,
             )
-        return response.json(), None, debug
+        return decode(response), None, debug
     except requests.exceptions.RequestException as e:
         debug["elapsed_ms"] = _elapsed_ms()
         debug["exception"] = str(e)
@@ -424,6 +501,46 @@ def post_sparql_with_debug(
         return None, f"Error: {str(e)}", debug
 
 
+def post_sparql_with_debug(
+    endpoint_key: str,
+    query: str,
+    timeout: Optional[int] = None,
+) -> tuple[Optional[dict], Optional[str], dict]:
+    """
+    POST a SPARQL query to a known endpoint and return (json, error, debug_info).
+
+    Args:
+        endpoint_key: Key from ENDPOINT_URLS (e.g. 'federation').
+        query: SPARQL query string.
+        timeout: Request timeout in seconds.
+
+    Returns:
+        (json_response, error_message, debug_dict). debug_dict has endpoint, query,
+        response_status, and optionally exception.
+    """
+    return _post_sparql(
+        endpoint_key, query, timeout, _SPARQL_JSON, lambda response: _json_loads(response.content),
+    )
+
+
+def post_sparql_csv_with_debug(
+    endpoint_key: str,
+    query: str,
+    timeout: Optional[int] = None,
+) -> tuple[Optional[pd.DataFrame], Optional[str], dict]:
+    """
+    Like post_sparql_with_debug, but request the compact CSV result format.
+
+    CSV bodies are several times smaller than JSON bindings and parse straight
+    into a DataFrame. Only suitable for queries whose columns are plain URIs or
+    literals, since term types are not carried.
+
+    Returns:
+        (dataframe, error_message, debug_dict)
+    """
+    return _post_sparql(endpoint_key, query, timeout, _SPARQL_CSV, _decode_csv_response)
+
+
 def build_query_debug_entry(
     label: str,
     debug_info: Optional[dict[str, Any]],
@@ -447,16 +564,25 @@ def build_query_debug_entry(
     }
 
 
+_FILTER_QUERY_LOG_LIMIT = 50
+
+
 def _log_filter_query(entry: dict[str, Any]) -> None:
     """Append a filter/component query debug entry to session state.
 
+    Only the most recent ``_FILTER_QUERY_LOG_LIMIT`` entries are kept, so the
+    log does not grow for the lifetime of the session.
+
     Silently skips logging when called from inside @st.cache_data or
     other contexts where session state is unavailable.
     """
     try:
         if "_filter_query_log" not in st.session_state:
             st.session_state["_filter_query_log"] = []
-        st.session_state["_filter_query_log"].append(entry)
+        log = st.session_state["_filter_query_log"]
+        log.append(entry)
+        if len(log) > _FILTER_QUERY_LOG_LIMIT:
+            del log[:-_FILTER_QUERY_LOG_LIMIT]
     except Exception:
         pass
 
@@ -513,13 +639,13 @@ def execute_sparql_query(
 
     try:
         if method.upper() == 'POST':
-            response = requests.post(resolved_endpoint, data={'query': query}, headers=headers, timeout=timeout)
+            response = _HTTP_SESSION.post(resolved_endpoint, data={'query': query}, headers=headers, timeout=timeout)
         else:
-            response = requests.get(resolved_endpoint, params={'query': query}, headers=headers, timeout=timeout)
+            response = _HTTP_SESSION.get(resolved_endpoint, params={'query': query}, headers=headers, timeout=timeout)
 
         status = response.status_code
         response.raise_for_status()
-        result = response.json()
+        result = _json_loads(response.content)
         row_count = len(result.get("results", {}).get("bindings", []))
     except Exception as e:
         error_msg = str(e)
@@ -8,6 +8,7 @@ from filters.region import (
     render_region_selector,
     render_pfas_region_selector,
     get_region_boundary,
+    get_cached_region_boundary,
     add_region_boundary_layers,
     get_available_states,
     get_available_counties,
@@ -44,6 +45,7 @@ __all__ = [
     "render_region_selector",
     "render_pfas_region_selector",
     "get_region_boundary",
+    "get_cached_region_boundary",
     "add_region_boundary_layers",
     "get_available_states",
     "get_available_counties",
@@ -106,6 +106,13 @@ def convert_to_ant_tree_format(hierarchy: Dict[str, Dict]) -> List[Dict]:
     return tree_data
 
 
+@st.cache_resource(show_spinner=False)
+def _default_naics_tree() -> Tuple[Dict[str, Dict], List[Dict]]:
+    """Hierarchy and st_ant_tree data for the bundled NAICS table (read-only)."""
+    hierarchy = build_naics_hierarchy(load_naics_dict())
+    return hierarchy, convert_to_ant_tree_format(hierarchy)
+
+
 def render_hierarchical_naics_selector(
     naics_dict: Dict[str, str],
     key: str,
@@ -118,10 +125,15 @@ def render_hierarchical_naics_selector(
     """
     Render a hierarchical NAICS industry selector using st_ant_tree dropdown.
     """
-    hierarchy = build_naics_hierarchy(naics_dict)
+    # The shared NAICS table never changes, so its tree is built once per process
+    is_default = naics_dict is load_naics_dict()
+    if is_default:
+        hierarchy, tree_data = _default_naics_tree()
+    else:
+        hierarchy = build_naics_hierarchy(naics_dict)
+        tree_data = convert_to_ant_tree_format(hierarchy)
 
     if ANT_TREE_AVAILABLE:
-        tree_data = convert_to_ant_tree_format(hierarchy)
         default_val = [default_value] if default_value else None
 
         with st.sidebar if use_sidebar else st.container():
@@ -181,9 +193,14 @@ def render_hierarchical_naics_selector(
 
     else:
         container = st.sidebar if use_sidebar else st
+        if is_default:
+            options, option_to_code = _default_fallback_options()
+        else:
+            options, option_to_code = _naics_fallback_options(hierarchy)
         return _render_fallback_selector(
-            hierarchy,
-            naics_dict,
+            options,
+            option_to_code,
+            next(iter(naics_dict), ""),
             key,
             default_index,
             container,
@@ -237,21 +254,10 @@ def render_sidebar_industry_selector(
     return selected_naics_code, selected_industry_display
 
 
-def _render_fallback_selector(
-    hierarchy: Dict[str, Dict],
-    naics_dict: Dict[str, str],
-    key: str,
-    default_index: int,
-    container=None,
-    multi_select: bool = False,
-    allow_empty: bool = False,
-) -> List[str] | str:
-    """Fallback selector using indented selectbox."""
-    if container is None:
-        container = st
-
+def _naics_fallback_options(hierarchy: Dict[str, Dict]) -> Tuple[Tuple[str, ...], Dict[str, str]]:
+    """Indented selectbox labels in tree order, plus the label -> code lookup."""
     options = []
-    code_to_option = {}
+    option_to_code = {}
 
     def add_to_options(node_code: str, node_data: Dict, level: int = 0):
         name = node_data["name"]
@@ -259,7 +265,7 @@ def _render_fallback_selector(
         prefix = "├─ " if level > 0 else ""
         display_name = f"{indent}{prefix}{node_code} - {name}"
         options.append(display_name)
-        code_to_option[node_code] = display_name
+        option_to_code[display_name] = node_code
 
         for child_code, child_data in sorted(node_data.get("children", {}).items()):
             add_to_options(child_code, child_data, level + 1)
@@ -267,7 +273,28 @@ def _render_fallback_selector(
     for code, data in sorted(hierarchy.items()):
         add_to_options(code, data, level=0)
 
-    option_to_code = {v: k for k, v in code_to_option.items()}
+    return tuple(options), option_to_code
+
+
+@st.cache_resource(show_spinner=False)
+def _default_fallback_options() -> Tuple[Tuple[str, ...], Dict[str, str]]:
+    """Fallback selectbox options for the bundled NAICS table (read-only)."""
+    return _naics_fallback_options(_default_naics_tree()[0])
+
+
+def _render_fallback_selector(
+    options: Tuple[str, ...],
+    option_to_code: Dict[str, str],
+    fallback_code: str,
+    key: str,
+    default_index: int,
+    container=None,
+    multi_select: bool = False,
+    allow_empty: bool = False,
+) -> List[str] | str:
+    """Fallback selector using indented selectbox."""
+    if container is None:
+        container = st
 
     if multi_select:
         default_option = options[default_index] if options and not allow_empty else None
@@ -285,7 +312,7 @@ def _render_fallback_selector(
         ]
 
     if allow_empty:
-        options = ["-- All Industries --"] + options
+        options = ("-- All Industries --",) + options
 
     selected_display = container.selectbox(
         "Select Industry Type",
@@ -297,4 +324,4 @@ def _render_fallback_selector(
 
     if allow_empty and selected_display == "-- All Industries --":
         return ""
-    return option_to_code.get(selected_display, list(naics_dict.keys())[0] if naics_dict else "")
+    return option_to_code.get(selected_display, fallback_code)
@@ -4,10 +4,11 @@ SPARQL queries to filter material types based on available observations in a reg
 """
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List
 import pandas as pd
 import streamlit as st
 
+from core.disk_cache import cached_frame
 from core.sparql import ENDPOINT_URLS, parse_sparql_results, execute_sparql_query
 
 
@@ -98,8 +99,24 @@ def get_cached_material_types_with_labels(
     region_code: str,
     is_subdivision: bool = False,
 ) -> pd.DataFrame:
-    """Cached wrapper for region-scoped sample material availability."""
-    return get_available_material_types_with_labels(region_code, is_subdivision)
+    """Cached wrapper for region-scoped sample material availability (memory, then disk)."""
+    return cached_frame(
+        f"material_types|{region_code}|{is_subdivision}|v1",
+        lambda: get_available_material_types_with_labels(region_code, is_subdivision),
+    )
+
+
+@st.cache_resource(ttl=3600, max_entries=256, show_spinner=False)
+def get_cached_material_type_options(region_code: str, is_subdivision: bool = False) -> Dict[str, str]:
+    """Display name -> material type URI for a region's selectbox (read-only).
+
+    Held as a shared resource so reruns with an unchanged region skip the
+    cached frame's copy and the mapping rebuild.
+    """
+    view = get_cached_material_types_with_labels(region_code, is_subdivision)
+    if view.empty:
+        return {}
+    return dict(zip(view["display_name"], view["matType"]))
 
 
 def get_available_material_types(region_code: str, is_subdivision: bool = False) -> List[str]:
@@ -10,6 +10,7 @@ from typing import Callable, Literal, Optional, Tuple
 import streamlit as st
 import pandas as pd
 
+from core.disk_cache import cached_frame
 from core.sparql import ENDPOINT_URLS, parse_sparql_results, execute_sparql_query
 
 
@@ -270,6 +271,22 @@ SELECT * WHERE {{
     return df if not df.empty else None
 
 
+@st.cache_resource(ttl=86400, max_entries=256, show_spinner=False)
+def _boundary_geometry_mapping(boundary_wkt: str) -> dict:
+    """Parse a boundary WKT into a GeoJSON geometry dict, once per distinct polygon.
+
+    The outline is simplified to ~100 m and snapped to a ~1 m grid, which is not
+    visible at region zoom but keeps long coastlines from bloating every map's
+    HTML. The dict is shared between callers (no per-hit unpickling) and must
+    not be mutated.
+    """
+    import shapely
+    from shapely.geometry import mapping
+
+    geom = shapely.simplify(shapely.from_wkt(boundary_wkt), 0.001, preserve_topology=True)
+    return mapping(shapely.set_precision(geom, 1e-5))
+
+
 def add_region_boundary_layers(
     map_obj,
     *,
@@ -324,8 +341,6 @@ def add_region_boundary_layers(
 
     try:
         import folium
-        from shapely import wkt as shapely_wkt
-        from shapely.geometry import mapping
     except Exception as exc:
         _warn(f"Boundary styling unavailable: {exc}")
         return
@@ -334,11 +349,10 @@ def add_region_boundary_layers(
         try:
             boundary_wkt = bdf.iloc[0]["countyWKT"]
             boundary_name = bdf.iloc[0].get("countyName", region_type)
-            boundary_geom = shapely_wkt.loads(boundary_wkt)
             feature = {
                 "type": "Feature",
                 "properties": {"name": boundary_name},
-                "geometry": mapping(boundary_geom),
+                "geometry": _boundary_geometry_mapping(boundary_wkt),
             }
             folium.GeoJson(
                 feature,
@@ -385,10 +399,67 @@ def get_available_subdivision_codes(county_code: str) -> set:
     return set(df["fips_code"].astype(str).str.zfill(10).tolist())
 
 
+class _BoundaryUnavailable(Exception):
+    """Raised inside the cached call so failed boundary fetches are never cached."""
+
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _cached_region_boundary(region_code: str) -> pd.DataFrame:
+    df = cached_frame(
+        f"region_boundary|{region_code}|v1",
+        lambda: get_region_boundary(region_code),
+    )
+    if df is None or df.empty:
+        raise _BoundaryUnavailable(region_code)
+    return df
+
+
+def get_cached_region_boundary(region_code: str) -> Optional[pd.DataFrame]:
+    """Cached wrapper for get_region_boundary (memory, then disk).
+
+    Returns None when the boundary cannot be fetched; that outcome is not
+    cached, so the next call retries the query.
+    """
+    try:
+        return _cached_region_boundary(region_code)
+    except _BoundaryUnavailable:
+        return None
+
+
 # =============================================================================
 # UI COMPONENTS
 # =============================================================================
 
+def _availability_options(
+    df: pd.DataFrame,
+    name_col: str,
+    code_col: str,
+    code_width: int,
+    available_codes: set,
+) -> tuple[list[str], list[str], dict[str, str]]:
+    """
+    Build "✓ name" / "✗ name" selectbox options for a region table, sorted by name.
+
+    Returns:
+        (available_options, unavailable_options, display_to_name)
+    """
+    df = df.sort_values(name_col)
+    names = df[name_col].to_numpy()
+    codes = df[code_col].astype(str).str.zfill(code_width).to_numpy()
+    available_options: list[str] = []
+    unavailable_options: list[str] = []
+    display_to_name: dict[str, str] = {}
+    for name, code in zip(names, codes):
+        if code in available_codes:
+            display_name = f"✓ {name}"
+            available_options.append(display_name)
+        else:
+            display_name = f"✗ {name}"
+            unavailable_options.append(display_name)
+        display_to_name[display_name] = name
+    return available_options, unavailable_options, display_to_name
+
+
 def render_region_selector(
     config: RegionConfig,
     states_df: pd.DataFrame,
@@ -434,21 +505,10 @@ def render_region_selector(
     
     # STATE SELECTION
     if config.state != "hidden":
-        state_name_map = {}
-        available_state_options = []
-        unavailable_state_options = []
-        
-        for _, row in states_df.sort_values("state_name").iterrows():
-            state_name = row["state_name"]
-            state_code = str(row["fipsCode"]).zfill(2)
-            if state_code in available_state_codes:
-                display_name = f"✓ {state_name}"
-                available_state_options.append(display_name)
-            else:
-                display_name = f"✗ {state_name}"
-                unavailable_state_options.append(display_name)
-            state_name_map[display_name] = state_name
-        
+        available_state_options, unavailable_state_options, state_name_map = _availability_options(
+            states_df, "state_name", "fipsCode", 2, available_state_codes,
+        )
+
         # Use "All States" for optional, "Select a State" for required
         default_option = "-- All States --" if config.state == "optional" else "-- Select a State --"
         state_options = [default_option] + available_state_options + unavailable_state_options
@@ -494,20 +554,9 @@ def render_region_selector(
 
         if not state_counties.empty:
             available_county_codes = get_available_county_codes(selection.state_code)
-            available_county_options = []
-            unavailable_county_options = []
-            county_name_map = {}
-
-            for _, row in state_counties.sort_values('county_name').iterrows():
-                county_name = row['county_name']
-                county_code = str(row['county_code']).zfill(5)
-                if county_code in available_county_codes:
-                    display_name = f"✓ {county_name}"
-                    available_county_options.append(display_name)
-                else:
-                    display_name = f"✗ {county_name}"
-                    unavailable_county_options.append(display_name)
-                county_name_map[display_name] = county_name
+            available_county_options, unavailable_county_options, county_name_map = _availability_options(
+                state_counties, "county_name", "county_code", 5, available_county_codes,
+            )
 
             # Valid choices first (✓), then invalid (✗), alphabetically within each group.
             county_options = (
@@ -562,20 +611,13 @@ def render_region_selector(
 
         if not county_subdivisions.empty:
             available_subdivision_codes = get_available_subdivision_codes(selection.county_code)
-            subdivision_name_map = {}
-            available_subdivision_options = []
-            unavailable_subdivision_options = []
-
-            for _, row in county_subdivisions.sort_values('subdivision_name').iterrows():
-                subdivision_name = row['subdivision_name']
-                subdivision_code = str(row['fipsCode']).zfill(10)
-                if subdivision_code in available_subdivision_codes:
-                    display_name = f"✓ {subdivision_name}"
-                    available_subdivision_options.append(display_name)
-                else:
-                    display_name = f"✗ {subdivision_name}"
-                    unavailable_subdivision_options.append(display_name)
-                subdivision_name_map[display_name] = subdivision_name
+            (
+                available_subdivision_options,
+                unavailable_subdivision_options,
+                subdivision_name_map,
+            ) = _availability_options(
+                county_subdivisions, "subdivision_name", "fipsCode", 10, available_subdivision_codes,
+            )
 
             subdivision_options = (
                 ["-- All Subdivisions --"]
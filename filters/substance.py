@@ -6,10 +6,11 @@ graph via a single SPARQL query.  No external API calls are needed.
 """
 from __future__ import annotations
 
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import pandas as pd
 import streamlit as st
 
+from core.disk_cache import cached_frame
 from core.sparql import ENDPOINT_URLS, parse_sparql_results, execute_sparql_query
 
 
@@ -20,6 +21,14 @@ def _fallback_substance_name(substance_uri: str) -> str:
     return cleaned.rsplit("/", 1)[-1]
 
 
+def _stripped_labels(df: pd.DataFrame, column: str) -> pd.Series:
+    """Whitespace-stripped labels from ``column``, with blank or missing labels as NA."""
+    if column not in df.columns:
+        return pd.Series(pd.NA, index=df.index, dtype="string")
+    labels = df[column].astype("string").str.strip()
+    return labels.mask(labels == "")
+
+
 def get_available_substances_with_labels(
     region_code: str,
     is_subdivision: bool = False,
@@ -88,14 +97,10 @@ SELECT ?substance (SAMPLE(?_label) AS ?label) (SAMPLE(?_short_label) AS ?short_l
         df["num"] = 0
 
     # Build display_name: prefer short_label, fall back to label, then URI
-    def _build_display(row):
-        if pd.notna(row.get("short_label")) and str(row["short_label"]).strip():
-            return str(row["short_label"]).strip()
-        if pd.notna(row.get("label")) and str(row["label"]).strip():
-            return str(row["label"]).strip()
-        return _fallback_substance_name(row["substance"])
-
-    df["display_name"] = df.apply(_build_display, axis=1)
+    display = _stripped_labels(df, "short_label").fillna(_stripped_labels(df, "label"))
+    unlabeled = display.isna()
+    display[unlabeled] = df.loc[unlabeled, "substance"].map(_fallback_substance_name)
+    df["display_name"] = display.astype(object)
 
     # Aggregate: sum counts per substance URI, keep first label
     df = (
@@ -112,8 +117,39 @@ def get_cached_substances_with_labels(
     region_code: str,
     is_subdivision: bool = False,
 ) -> pd.DataFrame:
-    """Cached wrapper for region-scoped substance availability."""
-    return get_available_substances_with_labels(region_code, is_subdivision)
+    """Cached wrapper for region-scoped substance availability (memory, then disk)."""
+    return cached_frame(
+        f"substances|{region_code}|{is_subdivision}|v1",
+        lambda: get_available_substances_with_labels(region_code, is_subdivision),
+    )
+
+
+@st.cache_resource(ttl=3600, max_entries=256, show_spinner=False)
+def _substance_options(
+    region_code: str,
+    is_subdivision: bool,
+) -> Tuple[Tuple[str, ...], Dict[str, Tuple[str, str]]]:
+    """Sorted selectbox labels and label -> (URI, display name) for a region (read-only).
+
+    Held as a shared resource so reruns with an unchanged region skip both the
+    cached frame's copy and the option rebuild.
+    """
+    substances_df = get_cached_substances_with_labels(region_code, is_subdivision)
+
+    # Build display -> URI mapping with counts in the label
+    display_to_uri = {}
+    if not substances_df.empty:
+        counts = substances_df["num"].fillna(0).astype(int)
+        names = substances_df["display_name"].astype(str)
+        labeled = substances_df.assign(
+            _label=names.where(counts <= 0, names + " (" + counts.astype(str) + ")"),
+            _is_a=substances_df["substance"].astype(str).str.endswith("_A"),
+        )
+        # Prefer the "_A" variant of a substance URI when several share a label
+        labeled = labeled.sort_values("_is_a", ascending=False, kind="stable").drop_duplicates(subset="_label")
+        display_to_uri = dict(zip(labeled["_label"], zip(labeled["substance"], labeled["display_name"])))
+
+    return tuple(sorted(display_to_uri)), display_to_uri
 
 
 def get_available_substances(region_code: str, is_subdivision: bool = False) -> List[str]:
@@ -137,26 +173,13 @@ def render_sidebar_substance_selector(
     Both are None when the user picks the empty/all option.
     """
     is_subdivision = len(region_code) > 5 if region_code else False
-    substances_df = (
-        get_cached_substances_with_labels(region_code, is_subdivision)
-        if region_code
-        else pd.DataFrame()
+    labels, display_to_uri = (
+        _substance_options(region_code, is_subdivision) if region_code else ((), {})
     )
 
     st.sidebar.markdown(heading)
 
-    # Build display -> URI mapping with counts in the label
-    display_to_uri = {}
-    if not substances_df.empty:
-        for _, row in substances_df.iterrows():
-            name = row["display_name"]
-            uri = row["substance"]
-            count = int(row.get("num", 0))
-            display_label = f"{name} ({count})" if count > 0 else name
-            if display_label not in display_to_uri or str(uri).endswith("_A"):
-                display_to_uri[display_label] = (uri, name)
-
-    options = sorted(display_to_uri.keys())
+    options = list(labels)
     if allow_empty:
         placeholder = f"-- {empty_label} --"
         options = [placeholder] + options
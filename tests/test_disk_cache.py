@@ -0,0 +1,56 @@
+"""
+Tests for the on-disk DataFrame cache.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+
+from core.disk_cache import cached_frame, read_cached_frame, write_cached_frame
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self._old_env = os.environ.get("SAWGRAPH_DISK_CACHE_DIR")
+        os.environ["SAWGRAPH_DISK_CACHE_DIR"] = self.tmpdir.name
+
+    def tearDown(self):
+        if self._old_env is None:
+            os.environ.pop("SAWGRAPH_DISK_CACHE_DIR", None)
+        else:
+            os.environ["SAWGRAPH_DISK_CACHE_DIR"] = self._old_env
+        self.tmpdir.cleanup()
+
+    def test_round_trip(self):
+        df = pd.DataFrame({"substance": ["http://ex.org/a"], "num": [3]})
+        write_cached_frame("k", df)
+        pd.testing.assert_frame_equal(read_cached_frame("k"), df)
+        self.assertIsNone(read_cached_frame("other"))
+
+    def test_stale_entry_is_ignored(self):
+        write_cached_frame("k", pd.DataFrame({"a": [1]}))
+        time.sleep(0.01)
+        self.assertIsNone(read_cached_frame("k", max_age_seconds=0))
+
+    def test_cached_frame_computes_once_and_skips_empty(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return pd.DataFrame({"a": [1]})
+
+        cached_frame("k", compute)
+        cached_frame("k", compute)
+        self.assertEqual(len(calls), 1)
+
+        cached_frame("empty", lambda: pd.DataFrame())
+        self.assertIsNone(read_cached_frame("empty"))
+
+
+if __name__ == "__main__":
+    unittest.main()
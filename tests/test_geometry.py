@@ -0,0 +1,120 @@
+"""
+Tests for core.geometry GeoDataFrame helpers.
+
+Run from project root:
+  python -m unittest discover -s tests -p 'test_*.py'
+  or: python -m pytest tests/ -v
+"""
+from __future__ import annotations
+
+import unittest
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from core.geometry import compact_line_geometries, create_geodataframe, thin_points
+
+
+class TestCreateGeodataframe(unittest.TestCase):
+    def test_keeps_only_parseable_rows_and_replaces_wkt_column(self):
+        df = pd.DataFrame({
+            "name": ["valid", "malformed", "missing", "also valid"],
+            "wkt": ["POINT (1 2)", "POINT (oops", None, "POINT (3 4)"],
+        })
+
+        gdf = create_geodataframe(df, "wkt")
+
+        self.assertEqual(gdf.columns.tolist(), ["name", "geometry"])
+        self.assertEqual(gdf.index.tolist(), [0, 3])
+        self.assertEqual(gdf["name"].tolist(), ["valid", "also valid"])
+        self.assertEqual(gdf.geometry.x.tolist(), [1.0, 3.0])
+        self.assertEqual(gdf.crs.to_epsg(), 4326)
+
+    def test_all_rows_valid_keeps_every_row(self):
+        df = pd.DataFrame({"name": ["a", "b"], "wkt": ["POINT (1 2)", "POINT (3 4)"]})
+
+        gdf = create_geodataframe(df, "wkt")
+
+        self.assertEqual(gdf.columns.tolist(), ["name", "geometry"])
+        self.assertEqual(len(gdf), 2)
+
+    def test_returns_none_without_parseable_geometry(self):
+        self.assertIsNone(create_geodataframe(pd.DataFrame({"wkt": ["POINT (oops", None]}), "wkt"))
+        self.assertIsNone(create_geodataframe(pd.DataFrame({"wkt": [None, None]}), "wkt"))
+        self.assertIsNone(create_geodataframe(pd.DataFrame({"other": ["POINT (1 2)"]}), "wkt"))
+        self.assertIsNone(create_geodataframe(pd.DataFrame(), "wkt"))
+
+
+class TestCompactLineGeometries(unittest.TestCase):
+    @staticmethod
+    def _zigzag(n_vertices: int, offset: float = 0.0) -> shapely.LineString:
+        return shapely.LineString(
+            [(offset + i * 0.01, 0.02 * (i % 2)) for i in range(n_vertices)]
+        )
+
+    def test_dense_layer_is_reduced_under_the_vertex_budget(self):
+        gdf = gpd.GeoDataFrame(
+            {"name": ["a", "b"]},
+            geometry=[self._zigzag(500), self._zigzag(500, offset=10.0)],
+            crs="EPSG:4326",
+        )
+
+        result = compact_line_geometries(gdf, max_coordinates=300)
+
+        self.assertLessEqual(shapely.get_num_coordinates(result.geometry.values).sum(), 300)
+        self.assertEqual(result["name"].tolist(), ["a", "b"])
+        self.assertEqual(shapely.get_num_coordinates(gdf.geometry.values).sum(), 1000)
+
+    def test_small_layer_keeps_its_shape(self):
+        line = shapely.LineString([(0.0, 0.0), (1.0, 1.0), (2.0, 0.0)])
+        gdf = gpd.GeoDataFrame({"name": ["a"]}, geometry=[line], crs="EPSG:4326")
+
+        result = compact_line_geometries(gdf)
+
+        self.assertTrue(result.geometry.iloc[0].equals(line))
+        self.assertEqual(result["name"].tolist(), ["a"])
+
+
+class TestThinPoints(unittest.TestCase):
+    @staticmethod
+    def _points(xy, **columns) -> gpd.GeoDataFrame:
+        return gpd.GeoDataFrame(columns, geometry=shapely.points(np.asarray(xy, dtype=float)), crs="EPSG:4326")
+
+    def test_result_has_at_most_max_points_rows(self):
+        rng = np.random.default_rng(0)
+        gdf = self._points(rng.uniform([-70.0, 43.0], [-68.0, 45.0], size=(5000, 2)))
+
+        thinned = thin_points(gdf, max_points=200)
+
+        self.assertLessEqual(len(thinned), 200)
+        self.assertGreater(len(thinned), 0)
+        self.assertTrue(thinned.index.is_monotonic_increasing)
+
+    def test_small_layer_is_returned_unchanged(self):
+        gdf = self._points([(0.0, 0.0), (1.0, 1.0)])
+
+        self.assertIs(thin_points(gdf, max_points=2), gdf)
+
+    def test_keeps_highest_value_point_in_each_cell(self):
+        # Two tight clusters far apart: each collapses to a single cell
+        gdf = self._points(
+            [(0.0, 0.0), (0.0001, 0.0), (0.0, 0.0001), (10.0, 10.0), (10.0001, 10.0), (10.0, 10.0001)],
+            value=["1", "7", "non-detect", "9", None, "3"],
+        )
+
+        thinned = thin_points(gdf, max_points=2, value_column="value")
+
+        self.assertEqual(thinned.index.tolist(), [1, 3])
+
+    def test_coincident_points_keep_one_row(self):
+        gdf = self._points([(5.0, 5.0)] * 4, value=[1.0, 4.0, 2.0, 3.0])
+
+        thinned = thin_points(gdf, max_points=2, value_column="value")
+
+        self.assertEqual(thinned.index.tolist(), [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
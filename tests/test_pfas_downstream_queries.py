@@ -0,0 +1,184 @@
+"""
+Tests for analyses.pfas_downstream.queries cached step execution.
+
+Uses unittest and mocks requests to avoid network calls. Run from project root:
+  python -m unittest discover -s tests -p 'test_*.py'
+  or: python -m pytest tests/ -v
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import unittest
+from urllib.parse import parse_qs
+from unittest.mock import patch, MagicMock
+
+from analyses.pfas_downstream import queries as downstream_queries
+from core.query_cache import clear_query_cache
+
+
+def _response(status_code: int = 200, bindings: list | None = None) -> MagicMock:
+    response = MagicMock()
+    response.status_code = status_code
+    response.text = "server error"
+    response.content = json.dumps({
+        "head": {"vars": ["facility"]},
+        "results": {"bindings": bindings or []},
+    }).encode()
+    return response
+
+
+def _sent_query(call) -> str:
+    data = call[1]["data"]
+    if isinstance(data, bytes):
+        return parse_qs(gzip.decompress(data).decode())["query"][0]
+    return data["query"]
+
+
+def _csv_response(body: str) -> MagicMock:
+    response = MagicMock()
+    response.status_code = 200
+    response.headers = {"Content-Type": "text/csv"}
+    response.content = body.encode()
+    return response
+
+
+class TestExecuteCachedDownstreamQuery(unittest.TestCase):
+    def setUp(self):
+        clear_query_cache()
+
+    @patch("core.sparql._HTTP_SESSION.post")
+    def test_repeat_call_is_served_from_cache(self, mock_post):
+        mock_post.return_value = _csv_response("facility\r\nhttp://ex.org/f1\r\n")
+
+        df1, err1, debug1 = downstream_queries.execute_cached_downstream_query(
+            "facilities", naics_code="221320", region_code="23",
+        )
+        df2, err2, debug2 = downstream_queries.execute_cached_downstream_query(
+            "facilities", naics_code="221320", region_code="23",
+        )
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertIsNone(err1)
+        self.assertIsNone(err2)
+        self.assertEqual(len(df1), 1)
+        self.assertEqual(len(df2), 1)
+        self.assertNotIn("cache_hit", debug1)
+        self.assertTrue(debug2.get("cache_hit"))
+        self.assertEqual(debug2.get("elapsed_ms"), 0.0)
+
+    @patch("core.sparql._HTTP_SESSION.post")
+    def test_failed_query_is_not_cached(self, mock_post):
+        mock_post.return_value = _response(status_code=500)
+
+        _, err1, _ = downstream_queries.execute_cached_downstream_query(
+            "streams", naics_code="221320", region_code="23",
+        )
+        _, err2, _ = downstream_queries.execute_cached_downstream_query(
+            "streams", naics_code="221320", region_code="23",
+        )
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertIn("500", str(err1))
+        self.assertIn("500", str(err2))
+
+
+class TestDownstreamFacilitiesIndustryPatterns(unittest.TestCase):
+    @patch("core.sparql._HTTP_SESSION.post")
+    def test_six_digit_code_binds_industry_code_without_join(self, mock_post):
+        mock_post.return_value = _csv_response("facility\r\n")
+
+        downstream_queries.execute_downstream_facilities_query(naics_code="221320", region_code="23")
+
+        query = _sent_query(mock_post.call_args)
+        self.assertIn("VALUES ?industryCode {naics:NAICS-221320}.", query)
+        self.assertNotIn("fio:subcodeOf ?industryGroup", query)
+        self.assertNotIn("a naics:NAICS-IndustryCode", query)
+
+    @patch("core.sparql._HTTP_SESSION.post")
+    def test_five_digit_code_keeps_industry_code_join(self, mock_post):
+        mock_post.return_value = _csv_response("facility\r\n")
+
+        downstream_queries.execute_downstream_facilities_query(naics_code="22132", region_code="23")
+
+        query = _sent_query(mock_post.call_args)
+        self.assertIn("VALUES ?industryCode {naics:NAICS-22132}.", query)
+        self.assertIn("?industryCode a naics:NAICS-IndustryCode;", query)
+        self.assertIn("fio:subcodeOf ?industryGroup", query)
+
+
+class TestDownstreamSamplesFromFlowlines(unittest.TestCase):
+    @patch("core.sparql._HTTP_SESSION.post")
+    def test_flowlines_are_sent_in_values_batches(self, mock_post):
+        mock_post.return_value = _response(
+            bindings=[{"facility": {"type": "uri", "value": "http://ex.org/f1"}}],
+        )
+        flowlines = [f"http://ex.org/fl{i}" for i in range(downstream_queries._FLOWLINE_BATCH_SIZE + 1)]
+
+        df, err, debug = downstream_queries.execute_downstream_samples_query(
+            naics_code=None, region_code=None, downstream_flowline_uris=flowlines,
+        )
+
+        self.assertIsNone(err)
+        self.assertEqual(mock_post.call_count, 2)
+        sent = [_sent_query(call) for call in mock_post.call_args_list]
+        self.assertTrue(any("VALUES ?downstream_flowline { <http://ex.org/fl0>" in q for q in sent))
+        self.assertFalse(any("hyf:downstreamFlowPathTC" in q for q in sent))
+        self.assertLess(debug["query"].index("<http://ex.org/fl0>"), debug["query"].index(f"<{flowlines[-1]}>"))
+        self.assertEqual(len(df), 1)
+        self.assertEqual(debug.get("batches"), 2)
+
+
+class TestDownstreamSamplesQueryShape(unittest.TestCase):
+    @staticmethod
+    def _sub_select(query: str) -> str:
+        start = query.index("{ SELECT DISTINCT ?samplePoint")
+        depth = 0
+        for pos in range(start, len(query)):
+            depth += {"{": 1, "}": -1}.get(query[pos], 0)
+            if depth == 0:
+                return query[start:pos + 1]
+        raise AssertionError("unbalanced sub-select")
+
+    def test_concentration_filter_is_correlated_with_sample_points(self):
+        query = downstream_queries._build_samples_query(
+            downstream_queries._flowline_s2cell_block(["http://ex.org/fl1"]),
+            "FILTER (?numericValue >= 1)",
+            "",
+        )
+
+        inner = self._sub_select(query)
+        outer = query.replace(inner, "")
+        for pattern in (
+            "VALUES ?downstream_flowline { <http://ex.org/fl1> }",
+            "?samplePoint spatial:connectedTo ?s2cell",
+            "coso:observedAtSamplePoint ?samplePoint",
+            "coso:hasResult ?res",
+            "FILTER (?numericValue >= 1)",
+        ):
+            self.assertIn(pattern, inner)
+        self.assertNotIn("FILTER", outer)
+        self.assertIn("?substanceURI skos:altLabel ?substance", outer)
+        self.assertIn("OPTIONAL { ?observation coso:observedTime ?date }", outer)
+
+
+class TestDownstreamStreamsFromFacilities(unittest.TestCase):
+    @patch("core.sparql._HTTP_SESSION.post")
+    def test_facilities_are_sent_in_values_batches(self, mock_post):
+        mock_post.return_value = _csv_response("downstream_flowline\r\nhttp://ex.org/fl1\r\n")
+        facilities = [f"http://ex.org/f{i}" for i in range(downstream_queries._FACILITY_BATCH_SIZE + 1)]
+
+        df, err, debug = downstream_queries.execute_downstream_streams_query(
+            naics_code=None, region_code=None, facility_uris=facilities,
+        )
+
+        self.assertIsNone(err)
+        self.assertEqual(mock_post.call_count, 2)
+        sent = [_sent_query(call) for call in mock_post.call_args_list]
+        self.assertTrue(any(f"VALUES ?facility {{ <{facilities[-1]}> }}" in q for q in sent))
+        self.assertEqual(df["downstream_flowline"].tolist(), ["http://ex.org/fl1"])
+        self.assertEqual(debug.get("batches"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,11 +7,15 @@ Uses unittest and mocks requests to avoid network calls. Run from project root:
 """
 from __future__ import annotations
 
+import gzip
+import json
 import unittest
+from urllib.parse import parse_qs
 from unittest.mock import patch, MagicMock
 import pandas as pd
 
 from analyses.pfas_upstream import queries as upstream_queries
+from core.query_cache import clear_query_cache
 
 
 def _sparql_json(vars_list: list, bindings: list) -> dict:
@@ -22,6 +26,14 @@ def _sparql_json(vars_list: list, bindings: list) -> dict:
     }
 
 
+def _sent_query(call) -> str:
+    """Query text from a mocked POST, whether sent plain or gzip-compressed."""
+    data = call[1]["data"]
+    if isinstance(data, bytes):
+        return parse_qs(gzip.decompress(data).decode())["query"][0]
+    return data["query"]
+
+
 def _binding(**kwargs) -> dict:
     """One row: each key is var name, value is plain string (value used as URI/literal)."""
     return {k: {"value": v, "type": "uri"} for k, v in kwargs.items()}
@@ -30,12 +42,22 @@ def _binding(**kwargs) -> dict:
 class TestRunUpstream(unittest.TestCase):
     """run_upstream: 3 self-contained federation queries."""
 
+    def setUp(self):
+        clear_query_cache()
+
     @staticmethod
     def _set_three_empty_success(mock_post):
+        """Step 1 finds one sample (so Steps 2-3 run); Steps 2-3 return no rows."""
+        step1 = MagicMock()
+        step1.status_code = 200
+        step1.content = json.dumps(_sparql_json(
+            ["samplePoint", "spWKT"],
+            [_binding(samplePoint="http://ex.org/sp1", spWKT="POINT(-70.4 43.6)")],
+        )).encode()
         response = MagicMock()
         response.status_code = 200
-        response.json.return_value = _sparql_json([], [])
-        mock_post.side_effect = [response, response, response]
+        response.content = json.dumps(_sparql_json([], [])).encode()
+        mock_post.side_effect = [step1, response, response]
 
     def test_returns_error_when_region_empty(self):
         samples_df, up_s2, up_fl, facilities_df, executed, err = upstream_queries.run_upstream(
@@ -53,12 +75,12 @@ class TestRunUpstream(unittest.TestCase):
         self.assertEqual(executed, [])
         self.assertIn("Region", err)
 
-    @patch("core.sparql.requests.post")
+    @patch("core.sparql._HTTP_SESSION.post")
     def test_returns_dataframes_and_executed_queries_on_success(self, mock_post):
         # Step 1: samples (sp, spWKT, s2cell)
         r1 = MagicMock()
         r1.status_code = 200
-        r1.json.return_value = _sparql_json(
+        r1.content = json.dumps(_sparql_json(
             ["sp", "spWKT", "s2cell"],
             [
                 _binding(
@@ -67,18 +89,18 @@ class TestRunUpstream(unittest.TestCase):
                     s2cell="http://stko-kwg.geog.ucsb.edu/lod/resource/s2.level13.123",
                 ),
             ],
-        )
+        )).encode()
         # Step 2: flowlines
         r2 = MagicMock()
         r2.status_code = 200
-        r2.json.return_value = _sparql_json(
+        r2.content = json.dumps(_sparql_json(
             ["upstream_flowline", "us_ftype", "upstream_flowlineWKT"],
             [_binding(upstream_flowline="http://ex.org/fl1", us_ftype="460", upstream_flowlineWKT="LINESTRING(...)")],
-        )
+        )).encode()
         # Step 3: facilities
         r3 = MagicMock()
         r3.status_code = 200
-        r3.json.return_value = _sparql_json(
+        r3.content = json.dumps(_sparql_json(
             ["facility", "facWKT", "facilityName", "industryCode", "industryName"],
             [
                 _binding(
@@ -89,7 +111,7 @@ class TestRunUpstream(unittest.TestCase):
                     industryName="Fabricated Metal",
                 ),
             ],
-        )
+        )).encode()
         mock_post.side_effect = [r1, r2, r3]
 
         samples_df, up_s2, up_fl, facilities_df, executed, err = upstream_queries.run_upstream(
@@ -116,11 +138,14 @@ class TestRunUpstream(unittest.TestCase):
             self.assertIsInstance(eq["query"], str)
             self.assertIn("SELECT", eq["query"])
 
-    @patch("core.sparql.requests.post")
+    @patch("core.sparql._HTTP_SESSION.post")
     def test_executed_queries_contain_exact_query_sent(self, mock_post):
         r = MagicMock()
         r.status_code = 200
-        r.json.return_value = _sparql_json(["sp", "spWKT", "s2cell"], [])
+        r.content = json.dumps(_sparql_json(
+            ["sp", "spWKT", "s2cell"],
+            [_binding(sp="http://ex.org/sp1", spWKT="POINT(-70.4 43.6)", s2cell="http://ex.org/s2_1")],
+        )).encode()
         mock_post.return_value = r
 
         _, _, _, _, executed, _ = upstream_queries.run_upstream(
@@ -134,11 +159,32 @@ class TestRunUpstream(unittest.TestCase):
 
         self.assertEqual(mock_post.call_count, 3)
         for call_idx, eq in enumerate(executed):
-            sent_data = mock_post.call_args_list[call_idx][1].get("data", {})
-            sent_query = sent_data.get("query", "")
-            self.assertEqual(eq["query"], sent_query)
+            self.assertEqual(eq["query"], _sent_query(mock_post.call_args_list[call_idx]))
+
+    @patch("core.sparql._HTTP_SESSION.post")
+    def test_skips_steps_2_and_3_when_step1_finds_no_samples(self, mock_post):
+        r = MagicMock()
+        r.status_code = 200
+        r.content = json.dumps(_sparql_json(["sp", "spWKT", "s2cell"], [])).encode()
+        mock_post.return_value = r
 
-    @patch("core.sparql.requests.post")
+        samples_df, up_s2, up_fl, facilities_df, executed, err = upstream_queries.run_upstream(
+            substance_uri=None,
+            material_uri=None,
+            min_conc=0,
+            max_conc=500,
+            region_code="23",
+            include_nondetects=False,
+        )
+
+        self.assertIsNone(err)
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(len(executed), 1)
+        self.assertTrue(samples_df.empty)
+        self.assertTrue(up_fl.empty)
+        self.assertTrue(facilities_df.empty)
+
+    @patch("core.sparql._HTTP_SESSION.post")
     def test_returns_error_when_step1_http_error(self, mock_post):
         r = MagicMock()
         r.status_code = 500
@@ -158,7 +204,7 @@ class TestRunUpstream(unittest.TestCase):
         self.assertEqual(len(executed), 1)
         self.assertIn("500", err)
 
-    @patch("core.sparql.requests.post")
+    @patch("core.sparql._HTTP_SESSION.post")
     def test_returns_error_on_network_exception(self, mock_post):
         import requests.exceptions
 
@@ -178,7 +224,7 @@ class TestRunUpstream(unittest.TestCase):
         self.assertIn("Network error", err)
         self.assertIsNotNone(executed[0].get("error") or executed[0].get("exception"))
 
-    @patch("core.sparql.requests.post")
+    @patch("core.sparql._HTTP_SESSION.post")
     def test_step3_query_has_no_naics_values_when_filter_not_selected(self, mock_post):
         self._set_three_empty_success(mock_post)
 
@@ -199,7 +245,7 @@ class TestRunUpstream(unittest.TestCase):
         self.assertNotIn("VALUES ?industryGroup", q3)
         self.assertNotIn("VALUES ?industryCode {naics:NAICS-", q3)
 
-    @patch("core.sparql.requests.post")
+    @patch("core.sparql._HTTP_SESSION.post")
     def test_step3_query_includes_hierarchy_when_sector_filter_selected(self, mock_post):
         self._set_three_empty_success(mock_post)
 
@@ -219,7 +265,7 @@ class TestRunUpstream(unittest.TestCase):
         self.assertIn("?industryGroup fio:subcodeOf ?industrySubsector .", q3)
         self.assertIn("?industrySubsector fio:subcodeOf ?industrySector .", q3)
 
-    @patch("core.sparql.requests.post")
+    @patch("core.sparql._HTTP_SESSION.post")
     def test_step3_query_includes_exact_values_for_industry_code(self, mock_post):
         self._set_three_empty_success(mock_post)
 
@@ -238,7 +284,7 @@ class TestRunUpstream(unittest.TestCase):
         self.assertIn("VALUES ?industryCode {naics:NAICS-332311}.", q3)
         self.assertIn("?industryCode a naics:NAICS-IndustryCode ;", q3)
 
-    @patch("core.sparql.requests.post")
+    @patch("core.sparql._HTTP_SESSION.post")
     def test_step3_query_ignores_invalid_non_numeric_naics_code(self, mock_post):
         self._set_three_empty_success(mock_post)
 
@@ -259,5 +305,26 @@ class TestRunUpstream(unittest.TestCase):
         self.assertNotIn("?industryCode a naics:NAICS-IndustryCode ;", q3)
 
 
+    @patch("core.sparql._HTTP_SESSION.post")
+    def test_repeat_run_is_served_from_cache(self, mock_post):
+        self._set_three_empty_success(mock_post)
+        params = dict(
+            substance_uri=None,
+            material_uri=None,
+            min_conc=0,
+            max_conc=500,
+            region_code="23",
+            include_nondetects=False,
+        )
+
+        upstream_queries.run_upstream(**params)
+        samples_df, _, _, _, executed, err = upstream_queries.run_upstream(**params)
+
+        self.assertIsNone(err)
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual(len(samples_df), 1)
+        self.assertEqual([eq["elapsed_ms"] for eq in executed], [0.0, 0.0, 0.0])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,125 @@
+"""
+Tests for components.sample_popup aggregation.
+
+Run from project root:
+  python -m unittest discover -s tests -p 'test_*.py'
+  or: python -m pytest tests/ -v
+"""
+from __future__ import annotations
+
+import unittest
+
+import pandas as pd
+
+from components.sample_popup import (
+    aggregate_sample_popups,
+    aggregate_sample_popups_lite,
+    compact_sample_results,
+    _LITE_TABLE_HEAD,
+)
+
+
+def _observations() -> pd.DataFrame:
+    return pd.DataFrame([
+        {"samplePoint": "sp1", "spWKT": "POINT (1 1)", "samplePointName": "Well <1>",
+         "sample": "http://ex.org/s#a", "sampleIdentifier": "A", "date": "2021-03-04",
+         "substance": "PFOA", "result": "4.5", "unit": "ng/L", "sampleType": "GW"},
+        {"samplePoint": "sp2", "spWKT": "POINT (2 2)", "samplePointName": "Well 2",
+         "sample": "http://ex.org/s/b", "sampleIdentifier": None, "date": "2022-01-01",
+         "substance": "PFOS", "result": "non-detect", "unit": "ng/L", "sampleType": None},
+        {"samplePoint": "sp1", "spWKT": "POINT (1 1)", "samplePointName": "Well <1>",
+         "sample": "http://ex.org/s#a", "sampleIdentifier": "A", "date": "2021-03-04",
+         "substance": "PFOS", "result": "4.5", "unit": "ng/L", "sampleType": "GW"},
+        {"samplePoint": "sp1", "spWKT": "POINT (1 1)", "samplePointName": "Well <1>",
+         "sample": "http://ex.org/s#c", "sampleIdentifier": "C", "date": "2020-06-07",
+         "substance": "PFHxS", "result": "2", "unit": "ng/L", "sampleType": "GW"},
+    ])
+
+
+class TestAggregateSamplePopups(unittest.TestCase):
+    def test_one_row_per_point_in_first_appearance_order(self):
+        agg = aggregate_sample_popups(_observations())
+
+        self.assertEqual(agg["samplePoint"].tolist(), ["sp1", "sp2"])
+        self.assertEqual(agg["overall_max_result"].iloc[0], 4.5)
+        self.assertTrue(pd.isna(agg["overall_max_result"].iloc[1]))
+        self.assertEqual(agg["Max Result"].iloc[1], "")
+
+    def test_max_result_keeps_first_maximum_and_escapes_html(self):
+        agg = aggregate_sample_popups(_observations())
+
+        self.assertEqual(
+            agg["Max Result"].iloc[0],
+            "<div style='padding-bottom: 5px;'><b>PFOA</b>: 4.5 ng/L"
+            " (from Sample ID: A 2021)<br/></div>",
+        )
+        samples_html = agg["Samples"].iloc[0]
+        self.assertLess(samples_html.index("Sample ID</b>: A"), samples_html.index("Sample ID</b>: C"))
+        self.assertEqual(samples_html.count("<table"), 2)
+        self.assertIn(">a</a>", samples_html)
+
+    def test_point_with_only_non_detects_has_no_max_result(self):
+        obs = _observations()
+        obs["result"] = "non-detect"
+
+        agg = aggregate_sample_popups(obs)
+
+        self.assertEqual(agg["Max Result"].tolist(), ["", ""])
+        self.assertTrue(agg["overall_max_result"].isna().all())
+        self.assertIn("non-detect ng/L", agg["Samples"].iloc[1])
+
+    def test_integer_results_are_formatted_as_floats(self):
+        obs = _observations()
+        obs["result"] = ["12", "non-detect", "3", "2"]
+
+        agg = aggregate_sample_popups(obs)
+
+        self.assertIn("<b>PFOA</b>: 12.0 ng/L", agg["Max Result"].iloc[0])
+        self.assertEqual(agg["overall_max_result"].iloc[0], 12.0)
+
+
+class TestAggregateSamplePopupsLite(unittest.TestCase):
+    def test_substance_summary_counts_non_detects(self):
+        agg = aggregate_sample_popups_lite(_observations())
+
+        self.assertEqual(agg["Observations"].tolist(), [3, 1])
+        self.assertEqual(agg["Max Substance"].iloc[0], "PFOA")
+        self.assertEqual(agg["Max Result (ng/L)"].iloc[0], 4.5)
+        self.assertIsNone(agg["Max Substance"].iloc[1])
+        summary = agg["Substance Summary"].iloc[1]
+        self.assertIn(">PFOS</td>", summary)
+        self.assertIn(">0.00</td>", summary)
+
+    def test_unparseable_results_keep_one_row_per_point(self):
+        obs = _observations()
+        obs["result"] = ["<0.5", "<1", "<0.5", "n/a"]
+
+        agg = aggregate_sample_popups_lite(obs)
+
+        self.assertEqual(agg["samplePoint"].tolist(), ["sp1", "sp2"])
+        self.assertEqual(agg["Observations"].tolist(), [3, 1])
+        self.assertEqual(agg["Max Substance"].tolist(), [None, None])
+        self.assertTrue(agg["overall_max_result"].isna().all())
+        self.assertEqual(agg["Substance Summary"].iloc[0], _LITE_TABLE_HEAD + "</tbody></table>")
+
+
+class TestCompactSampleResults(unittest.TestCase):
+    def test_frames_move_to_arrow_and_max_to_float32(self):
+        obs = _observations()
+        agg = aggregate_sample_popups(obs)
+        facilities = pd.DataFrame({"facility": ["http://ex.org/f1"]})
+
+        samples_df, agg_df, facilities_df, empty_df = compact_sample_results(
+            obs, agg, facilities, pd.DataFrame(),
+        )
+
+        self.assertEqual(agg_df["overall_max_result"].dtype, "float32")
+        self.assertEqual(agg["overall_max_result"].dtype, "float64")
+        self.assertEqual(agg_df["Samples"].tolist(), agg["Samples"].tolist())
+        self.assertEqual(str(samples_df["substance"].dtype), "string[pyarrow]")
+        self.assertEqual(str(facilities_df["facility"].dtype), "string[pyarrow]")
+        self.assertTrue(empty_df.empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
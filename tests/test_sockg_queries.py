@@ -0,0 +1,53 @@
+"""
+Tests for analyses.sockg_sites.queries result caching.
+
+Uses unittest and mocks requests to avoid network calls. Run from project root:
+  python -m unittest discover -s tests -p 'test_*.py'
+  or: python -m pytest tests/ -v
+"""
+from __future__ import annotations
+
+import json
+import unittest
+from unittest.mock import patch, MagicMock
+
+from analyses.sockg_sites import queries as sockg_queries
+from core.query_cache import clear_query_cache
+
+
+def _response(bindings: list) -> MagicMock:
+    response = MagicMock()
+    response.status_code = 200
+    response.content = json.dumps({
+        "head": {"vars": ["location", "locationGeometry", "locationId", "locationDescription"]},
+        "results": {"bindings": bindings},
+    }).encode()
+    return response
+
+
+class TestGetSockgLocations(unittest.TestCase):
+    def setUp(self):
+        clear_query_cache()
+
+    @patch("core.sparql._HTTP_SESSION.post")
+    def test_repeat_call_is_served_from_cache(self, mock_post):
+        mock_post.return_value = _response([{
+            "location": {"type": "uri", "value": "http://ex.org/loc1"},
+            "locationGeometry": {"type": "literal", "value": "POINT (-93.6 42.0)"},
+            "locationId": {"type": "literal", "value": "IAAMES"},
+            "locationDescription": {"type": "literal", "value": "Ames"},
+        }])
+
+        df1, debug1 = sockg_queries.get_sockg_locations("19")
+        df2, debug2 = sockg_queries.get_sockg_locations("19")
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(df1["locationId"].tolist(), ["IAAMES"])
+        self.assertEqual(df2["locationId"].tolist(), ["IAAMES"])
+        self.assertEqual(debug2["label"], "Step 1: SOCKG Locations")
+        self.assertEqual(debug2["row_count"], 1)
+        self.assertTrue(debug2.get("cache_hit"))
+
+
+if __name__ == "__main__":
+    unittest.main()
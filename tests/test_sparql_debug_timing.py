@@ -1,20 +1,25 @@
 """
-Tests for core.sparql.post_sparql_with_debug timing metadata.
+Tests for core.sparql.post_sparql_with_debug timing metadata, request compression
+and CSV results.
 """
 from __future__ import annotations
 
+import gzip
+import json
 import unittest
+from urllib.parse import parse_qs
 from unittest.mock import MagicMock, patch
 
-from core.sparql import post_sparql_with_debug
+from core import sparql
+from core.sparql import post_sparql_csv_with_debug, post_sparql_with_debug
 
 
 class TestPostSparqlWithDebugTiming(unittest.TestCase):
-    @patch("core.sparql.requests.post")
+    @patch("core.sparql._HTTP_SESSION.post")
     def test_success_includes_timing_timeout_and_started_at(self, mock_post):
         response = MagicMock()
         response.status_code = 200
-        response.json.return_value = {"head": {"vars": []}, "results": {"bindings": []}}
+        response.content = json.dumps({"head": {"vars": []}, "results": {"bindings": []}}).encode()
         mock_post.return_value = response
 
         result, error, debug = post_sparql_with_debug("federation", "SELECT * WHERE { ?s ?p ?o } LIMIT 1", timeout=7)
@@ -27,7 +32,7 @@ class TestPostSparqlWithDebugTiming(unittest.TestCase):
         self.assertIn("elapsed_ms", debug)
         self.assertGreaterEqual(float(debug.get("elapsed_ms")), 0.0)
 
-    @patch("core.sparql.requests.post")
+    @patch("core.sparql._HTTP_SESSION.post")
     def test_http_error_includes_elapsed_ms(self, mock_post):
         response = MagicMock()
         response.status_code = 500
@@ -42,7 +47,7 @@ class TestPostSparqlWithDebugTiming(unittest.TestCase):
         self.assertIn("elapsed_ms", debug)
         self.assertGreaterEqual(float(debug.get("elapsed_ms")), 0.0)
 
-    @patch("core.sparql.requests.post")
+    @patch("core.sparql._HTTP_SESSION.post")
     def test_network_error_includes_elapsed_ms(self, mock_post):
         import requests.exceptions
 
@@ -57,5 +62,102 @@ class TestPostSparqlWithDebugTiming(unittest.TestCase):
         self.assertGreaterEqual(float(debug.get("elapsed_ms")), 0.0)
 
 
+class TestPostSparqlCompression(unittest.TestCase):
+    def setUp(self):
+        sparql._GZIP_UNSUPPORTED.clear()
+        self.addCleanup(sparql._GZIP_UNSUPPORTED.clear)
+        self.query = "SELECT * WHERE { ?s ?p ?o } # " + "x" * sparql._GZIP_MIN_QUERY_CHARS
+
+    @staticmethod
+    def _response(status_code: int) -> MagicMock:
+        response = MagicMock()
+        response.status_code = status_code
+        response.text = "unsupported"
+        response.content = json.dumps({"head": {"vars": []}, "results": {"bindings": []}}).encode()
+        return response
+
+    @patch("core.sparql._HTTP_SESSION.post")
+    def test_large_query_is_sent_gzipped(self, mock_post):
+        mock_post.return_value = self._response(200)
+
+        result, error, _ = post_sparql_with_debug("federation", self.query)
+
+        self.assertIsNone(error)
+        kwargs = mock_post.call_args[1]
+        self.assertEqual(kwargs["headers"]["Content-Encoding"], "gzip")
+        self.assertEqual(parse_qs(gzip.decompress(kwargs["data"]).decode())["query"], [self.query])
+
+    @patch("core.sparql._HTTP_SESSION.post")
+    def test_rejected_gzip_falls_back_to_plain_body(self, mock_post):
+        mock_post.side_effect = [self._response(415), self._response(200), self._response(200)]
+
+        _, error, _ = post_sparql_with_debug("federation", self.query)
+        post_sparql_with_debug("federation", self.query)
+
+        self.assertIsNone(error)
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual(mock_post.call_args_list[1][1]["data"], {"query": self.query})
+        self.assertNotIn("Content-Encoding", mock_post.call_args_list[2][1]["headers"])
+
+    @patch("core.sparql._HTTP_SESSION.post")
+    def test_query_rejected_with_and_without_gzip_keeps_compression(self, mock_post):
+        mock_post.side_effect = [self._response(400), self._response(400), self._response(200)]
+
+        _, error, _ = post_sparql_with_debug("federation", self.query)
+        post_sparql_with_debug("federation", self.query)
+
+        self.assertIn("400", error)
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertNotIn(sparql.ENDPOINT_URLS["federation"], sparql._GZIP_UNSUPPORTED)
+        self.assertEqual(mock_post.call_args_list[2][1]["headers"]["Content-Encoding"], "gzip")
+
+    @patch("core.sparql._HTTP_SESSION.post")
+    def test_400_on_gzip_only_disables_compression_when_plain_body_succeeds(self, mock_post):
+        mock_post.side_effect = [self._response(400), self._response(200), self._response(200)]
+
+        _, error, _ = post_sparql_with_debug("federation", self.query)
+        post_sparql_with_debug("federation", self.query)
+
+        self.assertIsNone(error)
+        self.assertIn(sparql.ENDPOINT_URLS["federation"], sparql._GZIP_UNSUPPORTED)
+        self.assertNotIn("Content-Encoding", mock_post.call_args_list[2][1]["headers"])
+
+
+class TestPostSparqlCsvWithDebug(unittest.TestCase):
+    @patch("core.sparql._HTTP_SESSION.post")
+    def test_csv_body_is_parsed_to_strings(self, mock_post):
+        response = MagicMock()
+        response.status_code = 200
+        response.headers = {"Content-Type": "text/csv; charset=utf-8"}
+        response.content = b'facility,name,code\r\nhttp://ex.org/f1,"Plant, ""A""",0221\r\nhttp://ex.org/f2,,\r\n'
+        mock_post.return_value = response
+
+        df, error, debug = post_sparql_csv_with_debug("federation", "SELECT * WHERE { ?s ?p ?o }")
+
+        self.assertIsNone(error)
+        self.assertEqual(mock_post.call_args[1]["headers"]["Accept"], "text/csv")
+        self.assertEqual(df["facility"].tolist(), ["http://ex.org/f1", "http://ex.org/f2"])
+        self.assertEqual(df["name"].iloc[0], 'Plant, "A"')
+        self.assertEqual(df["code"].iloc[0], "0221")
+        self.assertTrue(df["name"].isna().iloc[1])
+        self.assertIn("elapsed_ms", debug)
+
+    @patch("core.sparql._HTTP_SESSION.post")
+    def test_json_answer_is_still_parsed(self, mock_post):
+        response = MagicMock()
+        response.status_code = 200
+        response.headers = {"Content-Type": "application/sparql-results+json"}
+        response.content = json.dumps({
+            "head": {"vars": ["facility"]},
+            "results": {"bindings": [{"facility": {"type": "uri", "value": "http://ex.org/f1"}}]},
+        }).encode()
+        mock_post.return_value = response
+
+        df, error, _ = post_sparql_csv_with_debug("federation", "SELECT * WHERE { ?s ?p ?o }")
+
+        self.assertIsNone(error)
+        self.assertEqual(df["facility"].tolist(), ["http://ex.org/f1"])
+
+
 if __name__ == "__main__":
     unittest.main()